@@ -1,5 +1,8 @@
 from flask import Blueprint, jsonify, request, session
 from src.models.user import User, db
+from src.user_cache import user_cache
+from src.http_cache import make_etag, response_cache
+from src.password_hashing import HasherBusy
 from datetime import datetime, timedelta
 import re
 
@@ -20,6 +23,10 @@ def validate_password(password):
         return False, "Password must contain at least one number"
     return True, "Password is valid"
 
+def hasher_busy_response(error):
+    """503 with Retry-After when the password hashing pool is saturated"""
+    return jsonify({'error': str(error)}), 503, {'Retry-After': str(error.retry_after)}
+
 @auth_bp.route('/auth/register', methods=['POST'])
 def register():
     """Register a new user"""
@@ -65,12 +72,16 @@ def register():
         # Create session
         session['user_id'] = user.id
         session['username'] = user.username
+        user_cache.prime(user)
         
         return jsonify({
             'user': user.to_dict(),
             'message': 'Registration successful'
         }), 201
         
+    except HasherBusy as e:
+        db.session.rollback()
+        return hasher_busy_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -96,17 +107,33 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'Account is deactivated'}), 401
         
+        # Upgrade hashes made with an older algorithm or cost (best effort: a busy
+        # pool must not turn a valid login into a 503; the next login retries)
+        if user.password_needs_rehash():
+            try:
+                user.set_password(data['password'])
+            except HasherBusy:
+                pass
+            else:
+                db.session.commit()
+                response_cache.invalidate(('user', user.id))
+        
         # Create session
         session['user_id'] = user.id
         session['username'] = user.username
         session['is_admin'] = user.is_admin
+        user_cache.prime(user)
         
         return jsonify({
             'user': user.to_dict(),
             'message': 'Login successful'
         }), 200
         
+    except HasherBusy as e:
+        db.session.rollback()
+        return hasher_busy_response(e)
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/auth/logout', methods=['POST'])
@@ -122,12 +149,14 @@ def get_current_user():
         if 'user_id' not in session:
             return jsonify({'error': 'Not authenticated'}), 401
         
-        user = User.query.get(session['user_id'])
+        user = user_cache.get(session['user_id'])
         if not user:
             session.clear()
             return jsonify({'error': 'User not found'}), 404
         
-        return jsonify(user.to_dict()), 200
+        # The snapshot is already cached, so a 304 costs no query at all
+        etag = make_etag('user', user['id'], user['updated_at'])
+        return response_cache.respond(('user', user['id']), etag, lambda: user, variant=b'')
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -140,7 +169,9 @@ def change_password():
             return jsonify({'error': 'Not authenticated'}), 401
         
         data = request.json
-        user = User.query.get(session['user_id'])
+        user = db.session.get(User, session['user_id'])
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
         
         if not user.check_password(data.get('current_password', '')):
             return jsonify({'error': 'Current password is incorrect'}), 400
@@ -153,9 +184,13 @@ def change_password():
         user.set_password(data['new_password'])
         user.updated_at = datetime.utcnow()
         db.session.commit()
+        response_cache.invalidate(('user', user.id))
         
         return jsonify({'message': 'Password changed successfully'}), 200
         
+    except HasherBusy as e:
+        db.session.rollback()
+        return hasher_busy_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -168,7 +203,9 @@ def update_profile():
             return jsonify({'error': 'Not authenticated'}), 401
         
         data = request.json
-        user = User.query.get(session['user_id'])
+        user = db.session.get(User, session['user_id'])
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
         
         # Update allowed fields
         user.first_name = data.get('first_name', user.first_name)
@@ -189,6 +226,7 @@ def update_profile():
             user.email = data['email']
         
         db.session.commit()
+        response_cache.invalidate(('user', user.id))
         
         return jsonify({
             'user': user.to_dict(),
@@ -207,7 +245,9 @@ def subscribe():
             return jsonify({'error': 'Not authenticated'}), 401
         
         data = request.json
-        user = User.query.get(session['user_id'])
+        user = db.session.get(User, session['user_id'])
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
         
         plan = data.get('plan')
         if plan not in ['starter', 'pro', 'ultimate']:
@@ -219,6 +259,7 @@ def subscribe():
         user.updated_at = datetime.utcnow()
         
         db.session.commit()
+        response_cache.invalidate(('user', user.id))
         
         return jsonify({
             'user': user.to_dict(),
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Cart Checkout Benchmark
+This script buys the same carts twice against a scratch SQLite database:
+once through the single-order path (POST /orders + process-payment for every
+item) and once through POST /orders/checkout, and reports carts/s, items/s
+and the number of HTTP requests and commits each path needs.
+
+Usage:
+    python bench-checkout.py --carts 200 --cart-size 5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from sqlalchemy import event, insert
+from src.models.user import User, db
+from src.models.order import Order
+from src.models.payment import Payment
+from src.models.product_key import ProductKey
+from src.routes.orders import orders_bp
+from src.key_inventory import key_pool
+from src.database import init_database
+
+ITEM = {
+    'product_type': 'steam_key',
+    'product_name': 'Benchmark Game',
+    'product_price': 9.99,
+    'original_price': 19.99,
+    'discount_percentage': 50,
+}
+
+def make_app(database_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{database_path}"
+    app.register_blueprint(orders_bp, url_prefix='/api')
+    init_database(app)
+    return app
+
+def seed(app, keys):
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.execute(insert(ProductKey), [
+            {'product_type': 'steam_key', 'product_name': ITEM['product_name'], 'key_value': f"BENCH-{number:08d}"}
+            for number in range(keys)
+        ])
+        db.session.commit()
+
+def single_path(client, cart_size):
+    for _ in range(cart_size):
+        order = client.post('/api/orders', json=dict(ITEM, user_id=1, payment_method='stripe')).get_json()
+        response = client.post(f"/api/orders/{order['id']}/process-payment", json={'payment_provider': 'stripe'})
+        assert response.status_code == 200, response.get_json()
+    return cart_size * 2
+
+def cart_path(client, cart_size):
+    response = client.post('/api/orders/checkout', json={
+        'user_id': 1,
+        'payment_method': 'stripe',
+        'items': [dict(ITEM, quantity=cart_size)],
+    })
+    assert response.status_code == 201 and not response.get_json()['failures'], response.get_json()
+    return 1
+
+def run(app, name, func, carts, cart_size):
+    client = app.test_client()
+    commits = [0]
+    with app.app_context():
+        engine = db.engine
+    listener = lambda connection: commits.__setitem__(0, commits[0] + 1)
+    event.listen(engine, 'commit', listener)
+    requests = 0
+    started = time.perf_counter()
+    for _ in range(carts):
+        requests += func(client, cart_size)
+    elapsed = time.perf_counter() - started
+    event.remove(engine, 'commit', listener)
+    print(f"{name:<14} {carts / elapsed:8.1f} carts/s  {carts * cart_size / elapsed:8.1f} items/s  "
+          f"{requests / carts:5.1f} requests/cart  {commits[0] / carts:5.1f} commits/cart")
+    return elapsed
+
+def main():
+    """Run the checkout benchmark"""
+    parser = argparse.ArgumentParser(description='Compare single-order checkout with cart checkout')
+    parser.add_argument('--carts', type=int, default=200)
+    parser.add_argument('--cart-size', type=int, default=5)
+    args = parser.parse_args()
+
+    print("🚀 Cart checkout benchmark")
+    print(f"{args.carts} carts x {args.cart_size} items")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'bench.db'))
+        seed(app, args.carts * args.cart_size * 2)
+        key_pool.clear()
+        single = run(app, 'single orders', single_path, args.carts, args.cart_size)
+        cart = run(app, 'cart checkout', cart_path, args.carts, args.cart_size)
+        with app.app_context():
+            sold = ProductKey.query.filter_by(status='sold').count()
+            orders = Order.query.count()
+            payments = Payment.query.count()
+            db.engine.dispose()
+
+    print("=" * 60)
+    print(f"Orders {orders}, payments {payments}, keys sold {sold}")
+    print(f"Speedup (cart vs single orders): {single / cart:.1f}x")
+
+if __name__ == "__main__":
+    main()
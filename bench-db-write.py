@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Database Write Contention Benchmark
+This script runs concurrent checkout-style write transactions (create order,
+create payment, complete order) from several worker processes against a
+scratch SQLite database, once per database profile, and reports throughput,
+latency and "database is locked" errors.
+
+Usage:
+    python bench-db-write.py --workers 8 --checkouts 200
+    python bench-db-write.py --profiles baseline production
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from multiprocessing import Pool
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+from src.models.user import User, db
+from src.models.order import Order
+from src.models.payment import Payment
+from src.database import DATABASE_PROFILES, init_database
+
+def make_app(profile, database_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{database_path}"
+    init_database(app, profile)
+    return app
+
+def run_worker(args):
+    """Run checkouts from one process; returns (latencies, errors)"""
+    profile, worker, checkouts, database_path = args
+    app = make_app(profile, database_path)
+    latencies = []
+    errors = 0
+    with app.app_context():
+        for number in range(checkouts):
+            started = time.perf_counter()
+            try:
+                order = Order(
+                    user_id=1,
+                    order_number=f"B{worker:03d}{number:08d}",
+                    product_type='steam_key',
+                    product_name='Benchmark Game',
+                    product_price=9.99,
+                    original_price=19.99,
+                    payment_method='stripe'
+                )
+                db.session.add(order)
+                db.session.flush()
+                payment = Payment(
+                    order_id=order.id,
+                    user_id=1,
+                    payment_method='stripe',
+                    payment_provider='stripe',
+                    transaction_id=f"txn_{uuid.uuid4().hex[:16]}",
+                    amount=order.product_price,
+                    status='completed',
+                    completed_at=datetime.utcnow()
+                )
+                order.status = 'completed'
+                order.payment_status = 'completed'
+                db.session.add(payment)
+                db.session.commit()
+                latencies.append(time.perf_counter() - started)
+            except OperationalError:
+                db.session.rollback()
+                errors += 1
+        db.engine.dispose()
+    return latencies, errors
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def benchmark(profile, workers, checkouts):
+    """Run one profile and print its results"""
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, 'bench.db')
+        app = make_app(profile, database_path)
+        with app.app_context():
+            db.create_all()
+            user = User(username='bench', email='bench@example.com')
+            user.set_password('benchmark123')
+            db.session.add(user)
+            db.session.commit()
+            db.engine.dispose()
+
+        started = time.perf_counter()
+        with Pool(workers) as pool:
+            results = pool.map(run_worker, [
+                (profile, worker, checkouts, database_path) for worker in range(workers)
+            ])
+        elapsed = time.perf_counter() - started
+
+    latencies = [latency for result in results for latency in result[0]]
+    errors = sum(result[1] for result in results)
+    print(f"{profile:>12}: {len(latencies) / elapsed:8.0f} checkouts/s  "
+          f"p50 {percentile(latencies, 0.50) * 1000:7.2f}ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:7.2f}ms  "
+          f"locked errors {errors}")
+
+def main():
+    """Run the write contention benchmark"""
+    parser = argparse.ArgumentParser(description='Compare database profiles under concurrent writes')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--checkouts', type=int, default=200, help='checkouts per worker')
+    parser.add_argument('--profiles', nargs='+', default=list(DATABASE_PROFILES), choices=list(DATABASE_PROFILES))
+    args = parser.parse_args()
+
+    print("🚀 Database write contention benchmark")
+    print(f"{args.workers} workers x {args.checkouts} checkouts")
+    print("=" * 60)
+
+    for profile in args.profiles:
+        benchmark(profile, args.workers, args.checkouts)
+
+if __name__ == "__main__":
+    main()
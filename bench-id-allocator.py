@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Order Number Allocator Benchmark
+This script hammers the order number allocators from several processes and
+threads at once and reports throughput and collisions for each strategy.
+
+Usage:
+    python bench-id-allocator.py --processes 4 --threads 8 --count 5000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from src.models.user import db
+from src.models.id_sequence import IdSequence
+from src.id_allocator import build_allocator
+
+def make_app(database_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{database_path}"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 30}}
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+def run_worker(args):
+    """Generate ids from one process; returns the list of ids"""
+    strategy, worker_id, threads, count, database_path = args
+    app = make_app(database_path)
+    with app.app_context():
+        options = {'worker_id': worker_id} if strategy == 'time' else {}
+        allocator = build_allocator('order', strategy, **options)
+
+        def generate(_):
+            with app.app_context():
+                return [allocator.next_id() for _ in range(count)]
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            batches = list(executor.map(generate, range(threads)))
+        db.engine.dispose()
+    return [order_number for batch in batches for order_number in batch]
+
+def benchmark(strategy, processes, threads, count):
+    """Run one strategy and print its results"""
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, 'bench.db')
+        app = make_app(database_path)
+        with app.app_context():
+            db.create_all()
+
+        started = time.perf_counter()
+        with Pool(processes) as pool:
+            results = pool.map(run_worker, [
+                (strategy, worker_id, threads, count, database_path)
+                for worker_id in range(processes)
+            ])
+        elapsed = time.perf_counter() - started
+
+    order_numbers = [order_number for result in results for order_number in result]
+    collisions = len(order_numbers) - len(set(order_numbers))
+    longest = max(len(order_number) for order_number in order_numbers)
+    print(f"{strategy:>6}: {len(order_numbers):>9} ids in {elapsed:6.2f}s "
+          f"({len(order_numbers) / elapsed:>10.0f}/s), max length {longest}, collisions {collisions}")
+    return collisions
+
+def main():
+    """Run the allocator benchmark"""
+    parser = argparse.ArgumentParser(description='Benchmark order number allocation')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--count', type=int, default=5000, help='ids per thread')
+    parser.add_argument('--strategy', choices=['time', 'block', 'all'], default='all')
+    args = parser.parse_args()
+
+    print("🚀 Order number allocator benchmark")
+    print(f"{args.processes} processes x {args.threads} threads x {args.count} ids")
+    print("=" * 60)
+
+    strategies = ['time', 'block'] if args.strategy == 'all' else [args.strategy]
+    collisions = sum(benchmark(strategy, args.processes, args.threads, args.count) for strategy in strategies)
+    sys.exit(1 if collisions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Login Throughput Benchmark
+This script runs concurrent POST /api/auth/login requests against a scratch
+SQLite database for several password hashing pool sizes, and reports login
+throughput, latency, 503 (pool saturated) responses and the latency of a
+cheap endpoint probed during the storm.
+
+Usage:
+    python bench-login.py --workers 0 1 2 4 --clients 16 --logins 400
+    python bench-login.py --method pbkdf2:sha256:600000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from src.models.user import User, db
+from src.routes.auth import auth_bp
+from src.database import init_database
+from src.password_hashing import DEFAULT_METHOD, password_hasher
+
+def make_app(database_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{database_path}"
+    app.config['SECRET_KEY'] = 'benchmark'
+    app.register_blueprint(auth_bp, url_prefix='/api')
+    init_database(app)
+    return app
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def storm(app, clients, logins):
+    """Run ``logins`` logins from ``clients`` threads; returns (elapsed, latencies, busy, probes)"""
+    latencies, probes = [], []
+    busy = [0]
+    lock = threading.Lock()
+    remaining = [logins]
+    done = threading.Event()
+
+    def client():
+        test_client = app.test_client()
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            started = time.perf_counter()
+            response = test_client.post('/api/auth/login', json={'username': 'bench', 'password': 'benchmark123'})
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code == 503:
+                    busy[0] += 1
+                else:
+                    latencies.append(elapsed)
+
+    def probe():
+        test_client = app.test_client()
+        while not done.is_set():
+            started = time.perf_counter()
+            test_client.post('/api/auth/logout')
+            probes.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    prober = threading.Thread(target=probe)
+    started = time.perf_counter()
+    prober.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    prober.join()
+    return elapsed, latencies, busy[0], probes
+
+def main():
+    """Run the login throughput benchmark"""
+    parser = argparse.ArgumentParser(description='Benchmark login throughput against hashing pool size')
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4], help='pool sizes (0 = hash inline)')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--queue-size', type=int, default=None, help='pending hashes allowed beyond the pool size')
+    parser.add_argument('--method', default=DEFAULT_METHOD)
+    args = parser.parse_args()
+
+    print("🚀 Login throughput benchmark")
+    print(f"{args.clients} clients x {args.logins} logins, method {args.method}")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'bench.db'))
+        password_hasher.configure(method=args.method)
+        with app.app_context():
+            db.create_all()
+            user = User(username='bench', email='bench@example.com')
+            user.set_password('benchmark123')
+            db.session.add(user)
+            db.session.commit()
+
+        for workers in args.workers:
+            queue_size = args.queue_size if args.queue_size is not None else args.clients
+            password_hasher.configure(method=args.method, workers=workers, queue_size=queue_size)
+            with app.app_context():
+                # Start the pool before timing
+                User.query.first().check_password('warmup')
+            elapsed, latencies, busy, probes = storm(app, args.clients, args.logins)
+            print(f"workers {workers:>2}: {len(latencies) / elapsed:7.1f} logins/s  "
+                  f"p50 {percentile(latencies, 0.50) * 1000:7.1f}ms  "
+                  f"p95 {percentile(latencies, 0.95) * 1000:7.1f}ms  "
+                  f"503s {busy:>4}  "
+                  f"probe p95 {percentile(probes, 0.95) * 1000:6.1f}ms")
+        password_hasher.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Payment Config Cache Benchmark
+This script compares reading the active payment configs straight from the
+database (query + to_dict() per read, as before) with the cached snapshot,
+counting the SQL statements each path issues. It then checks cross-worker
+invalidation: two caches sharing a file marker stand in for two workers, and
+a config saved through one must show up in the other.
+
+Usage:
+    python bench-payment-config.py --reads 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from sqlalchemy import event
+from src.models.user import User, db
+from src.models.payment_config import PaymentConfig
+from src.database import init_database
+from src.payment_config_cache import FileMarker, PaymentConfigCache
+
+CONFIGS = [
+    {'payment_method': 'stripe', 'stripe_publishable_key': 'pk_test', 'stripe_secret_key': 'sk_test'},
+    {'payment_method': 'paypal', 'paypal_email': 'shop@example.com', 'paypal_client_id': 'client'},
+    {'payment_method': 'bank', 'bank_name': 'Example Bank', 'bank_iban': 'DE00123456780000000000'},
+    {'payment_method': 'crypto', 'crypto_currency': 'BTC', 'crypto_network': 'Bitcoin', 'is_active': False},
+]
+
+def make_app(database_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{database_path}"
+    init_database(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='admin', email='admin@example.com', password_hash='x', is_admin=True))
+        db.session.flush()
+        for config in CONFIGS:
+            db.session.add(PaymentConfig(created_by=1, **config))
+        db.session.commit()
+    return app
+
+def uncached_read():
+    configs = PaymentConfig.query.filter_by(is_active=True).all()
+    return [config.to_dict() for config in configs]
+
+def timed(app, name, read, reads):
+    statements = [0]
+    with app.app_context():
+        engine = db.engine
+        listener = lambda *args: statements.__setitem__(0, statements[0] + 1)
+        event.listen(engine, 'before_cursor_execute', listener)
+        started = time.perf_counter()
+        for _ in range(reads):
+            read()
+        elapsed = time.perf_counter() - started
+        event.remove(engine, 'before_cursor_execute', listener)
+        db.session.rollback()
+    print(f"{name:<12} {reads / elapsed:>12,.0f} reads/s  SQL statements: {statements[0]}")
+
+def main():
+    """Run the payment config cache benchmark"""
+    parser = argparse.ArgumentParser(description='Benchmark the payment config cache')
+    parser.add_argument('--reads', type=int, default=100000)
+    args = parser.parse_args()
+
+    print("🚀 Payment config cache benchmark")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'bench.db'))
+        marker_path = os.path.join(directory, 'payment-config.version')
+        worker_a = PaymentConfigCache(FileMarker(marker_path), check_interval=0.05)
+        worker_b = PaymentConfigCache(FileMarker(marker_path), check_interval=0.05)
+
+        timed(app, 'database', uncached_read, args.reads // 10)
+        timed(app, 'cached', worker_a.public, args.reads)
+
+        with app.app_context():
+            before = worker_b.public()
+            config = PaymentConfig.query.filter_by(payment_method='crypto').first()
+            config.is_active = True
+            db.session.commit()
+            # The commit hook bumps the shared marker through the module cache;
+            # worker A stands in for that worker here
+            worker_a.invalidate()
+            time.sleep(0.1)
+            after = worker_b.public()
+            db.engine.dispose()
+
+    print("=" * 60)
+    print(f"Worker B active methods: {sorted(c['payment_method'] for c in before)} -> {sorted(c['payment_method'] for c in after)}")
+    if len(after) != len(before) + 1:
+        print("❌ Worker B did not see the change")
+        sys.exit(1)
+    print("✅ Change reached the other worker")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Payout Benchmark
+This script seeds a scratch SQLite database with millions of completed and
+refunded payments spread over several months and three payment configs
+(daily, weekly and monthly payouts), then times:
+
+* a full payout run over the whole history (first run, no watermark yet),
+* an incremental run after one more day of payments (only the new day is read),
+* optionally (--naive) the per-payment ORM loop the engine replaces.
+
+It also checks that paid-out plus carried-forward amounts equal the expected
+net of every payment.
+
+Usage:
+    python bench-payouts.py --payments 2000000 --days 120 --naive
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from sqlalchemy import func, insert, select
+from src.models.user import User, db
+from src.models.order import Order
+from src.models.payment import Payment
+from src.models.payment_config import PaymentConfig, PayoutRecord
+from src.models.payout_ledger import PayoutLedger
+from src.database import init_database
+from src.payouts import compute_payouts, period_start
+
+CONFIGS = [
+    {'payment_method': 'stripe', 'payout_frequency': 'daily', 'commission_percentage': 2.9, 'minimum_payout': 50.0},
+    {'payment_method': 'paypal', 'payout_frequency': 'weekly', 'commission_percentage': 3.5, 'minimum_payout': 100.0},
+    {'payment_method': 'crypto', 'payout_frequency': 'monthly', 'commission_percentage': 1.0, 'minimum_payout': 500.0},
+]
+BATCH_ROWS = 50000
+
+def make_app(database_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{database_path}"
+    init_database(app)
+    return app
+
+def payment_rows(count, first_day, days, offset, rng):
+    """Yield payment dicts: ~97% completed, ~3% refunded a few days later"""
+    methods = [config['payment_method'] for config in CONFIGS]
+    for number in range(offset, offset + count):
+        completed_at = first_day + timedelta(seconds=rng.randrange(days * 86400))
+        refunded = rng.random() < 0.03
+        amount = round(rng.uniform(1, 60), 2)
+        refunded_at = completed_at + timedelta(days=rng.randrange(4)) if refunded else None
+        yield {
+            'order_id': 1,
+            'user_id': 1,
+            'payment_method': methods[number % len(methods)],
+            'payment_provider': 'bench',
+            'transaction_id': f"BENCH-{number:010d}",
+            'amount': amount,
+            'currency': 'USD',
+            'status': 'refunded' if refunded else 'completed',
+            'refund_amount': amount if refunded else 0.0,
+            'created_at': completed_at,
+            'completed_at': completed_at,
+            'refunded_at': refunded_at,
+            'updated_at': refunded_at or completed_at,
+        }
+
+def insert_payments(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_ROWS:
+            db.session.execute(insert(Payment), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Payment), batch)
+    db.session.commit()
+
+def seed(app, payments, first_day, days, rng):
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='bench', email='bench@example.com', password_hash='x'))
+        db.session.flush()
+        for config in CONFIGS:
+            db.session.add(PaymentConfig(created_by=1, **config))
+        db.session.commit()
+        insert_payments(payment_rows(payments, first_day, days, 0, rng))
+
+def naive_run(app, cutoff):
+    """The per-payment loop: load every settled payment and bucket it in Python"""
+    with app.app_context():
+        configs = {config.payment_method: config for config in PaymentConfig.query.filter_by(is_active=True)}
+        periods = defaultdict(float)
+        for payment in Payment.query.filter(Payment.status.in_(('completed', 'refunded'))).yield_per(10000):
+            config = configs.get(payment.payment_method)
+            if config is None:
+                continue
+            high = period_start(cutoff.date(), config.payout_frequency)
+            if payment.completed_at.date() < high:
+                periods[(config.id, period_start(payment.completed_at.date(), config.payout_frequency))] += payment.amount
+            if payment.status == 'refunded' and payment.refunded_at.date() < high:
+                periods[(config.id, period_start(payment.refunded_at.date(), config.payout_frequency))] -= payment.refund_amount
+        db.session.rollback()
+        return len(periods)
+
+def expected_net(app, cutoff):
+    """Net of all payments before each config's current period, less commission"""
+    with app.app_context():
+        total = 0.0
+        for config in PaymentConfig.query.filter_by(is_active=True):
+            high = datetime.combine(period_start(cutoff.date(), config.payout_frequency), datetime.min.time())
+            sales = db.session.execute(select(func.sum(Payment.amount)).where(
+                Payment.payment_method == config.payment_method, Payment.completed_at < high
+            )).scalar() or 0.0
+            refunds = db.session.execute(select(func.sum(Payment.refund_amount)).where(
+                Payment.payment_method == config.payment_method, Payment.status == 'refunded', Payment.refunded_at < high
+            )).scalar() or 0.0
+            total += (sales - refunds) * (1 - config.commission_percentage / 100.0)
+        paid = db.session.execute(select(func.sum(PayoutRecord.amount))).scalar() or 0.0
+        carried = db.session.execute(select(func.sum(PayoutLedger.carried_balance))).scalar() or 0.0
+        return total, paid + carried
+
+def timed_run(app, name, now):
+    with app.app_context():
+        started = time.perf_counter()
+        summary = compute_payouts(now=now, lag=timedelta(0))
+        elapsed = time.perf_counter() - started
+    sales = sum(config['sales'] for config in summary['configs'])
+    print(f"{name:<18} {elapsed:8.2f}s  payments read: {sales:>9}  payout records: {summary['payouts']:>5}")
+    return elapsed
+
+def main():
+    """Run the payout benchmark"""
+    parser = argparse.ArgumentParser(description='Benchmark batched payout computation')
+    parser.add_argument('--payments', type=int, default=1000000)
+    parser.add_argument('--days', type=int, default=120, help='history the payments are spread over')
+    parser.add_argument('--naive', action='store_true', help='also time the per-payment ORM loop')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print("🚀 Payout benchmark")
+    print(f"{args.payments} payments over {args.days} days, {len(CONFIGS)} payment configs")
+    print("=" * 60)
+
+    first_day = datetime(2024, 1, 1)
+    run_at = first_day + timedelta(days=args.days, hours=1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'bench.db'))
+        started = time.perf_counter()
+        seed(app, args.payments, first_day, args.days, rng)
+        print(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+        if args.naive:
+            started = time.perf_counter()
+            buckets = naive_run(app, run_at)
+            print(f"{'naive ORM loop':<18} {time.perf_counter() - started:8.2f}s  ({buckets} period buckets)")
+
+        timed_run(app, 'full run', run_at)
+
+        # One more day of traffic, then the next daily run
+        daily = max(1, args.payments // args.days)
+        with app.app_context():
+            insert_payments(payment_rows(daily, run_at.replace(hour=0), 1, args.payments, rng))
+        timed_run(app, 'incremental run', run_at + timedelta(days=1))
+        timed_run(app, 'repeated run', run_at + timedelta(days=1))
+
+        expected, accounted = expected_net(app, run_at + timedelta(days=1))
+        with app.app_context():
+            db.engine.dispose()
+
+    print("=" * 60)
+    print(f"Expected net: {expected:.2f}, paid out + carried: {accounted:.2f}")
+    if abs(expected - accounted) > 0.01 * len(CONFIGS) * (args.days + 1):
+        print("❌ Payout totals do not add up")
+        sys.exit(1)
+    print("✅ Payout totals add up")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Order Serialization Benchmark
+This script loads a list of orders from an in-memory database and compares
+the old path (ORM objects + to_dict + stdlib JSON, as jsonify does) with the
+serializer layer (column rows + field plan + fast JSON backend).
+
+Usage:
+    python bench-serialize.py --orders 10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from src.models.user import User, db
+from src.models.order import Order
+from src.serializers import dumps, order_serializer, orjson
+
+def seed(count):
+    user = User(username='bench', email='bench@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    started = datetime.utcnow() - timedelta(days=30)
+    db.session.execute(Order.__table__.insert(), [
+        {
+            'user_id': user.id,
+            'order_number': f"GV{number:012d}",
+            'product_type': 'steam_key',
+            'product_name': 'Cyberpunk 2077',
+            'product_price': 29.99,
+            'original_price': 59.99,
+            'discount_percentage': 50,
+            'status': 'completed',
+            'payment_method': 'stripe',
+            'payment_status': 'completed',
+            'transaction_id': f"txn_{number:016x}",
+            'product_key': 'ABCDE-FGHIJ-KLMNO',
+            'created_at': started + timedelta(seconds=number),
+            'updated_at': started + timedelta(seconds=number),
+        }
+        for number in range(count)
+    ])
+    db.session.commit()
+
+def orm_to_dict():
+    orders = Order.query.order_by(Order.created_at.desc()).all()
+    return json.dumps([order.to_dict() for order in orders]).encode()
+
+def orm_serializer():
+    orders = Order.query.order_by(Order.created_at.desc()).all()
+    return dumps([order_serializer.dump(order) for order in orders])
+
+def row_serializer(fields=None):
+    fields = order_serializer.fields(fields)
+    rows = order_serializer.query(Order.query, fields).order_by(Order.created_at.desc()).all()
+    return dumps(order_serializer.dump_rows(rows, fields))
+
+def measure(name, func, repeat):
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        body = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<38} {best * 1000:9.1f}ms  {len(body) / 1024:8.0f} KiB")
+    return best
+
+def main():
+    """Run the serialization benchmark"""
+    parser = argparse.ArgumentParser(description='Benchmark order list serialization')
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite://"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        seed(args.orders)
+
+        print("🚀 Order serialization benchmark")
+        print(f"{args.orders} orders, best of {args.repeat}, JSON backend: {'orjson' if orjson else 'stdlib'}")
+        print("=" * 60)
+        baseline = measure('ORM + to_dict + json', orm_to_dict, args.repeat)
+        measure('ORM + field plan', orm_serializer, args.repeat)
+        rows = measure('rows + field plan', row_serializer, args.repeat)
+        measure('rows + field plan (fields=id,status)', lambda: row_serializer(['id', 'status']), args.repeat)
+        print("=" * 60)
+        print(f"Speedup (rows vs ORM + to_dict): {baseline / rows:.1f}x")
+
+if __name__ == "__main__":
+    main()
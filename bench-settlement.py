@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Payment Settlement Benchmark
+This script pays a batch of orders against a scratch SQLite database through
+synchronous process-payment and through async settlement with the mock
+gateway. It reports request throughput (what checkout sees) separately from
+settlement drain time (what the gateway sees) for several gateway latencies.
+
+Usage:
+    python bench-settlement.py --orders 200 --latency 0.05 0.2 --workers 8
+    python bench-settlement.py --queue database --failure-rate 0.1
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from sqlalchemy import func, insert, select
+from src.models.user import User, db
+from src.models.order import Order
+from src.models.product_key import ProductKey
+from src.models.settlement_job import SettlementJob
+from src.routes.orders import orders_bp
+from src.database import init_database
+from src.key_inventory import key_pool
+from src import settlement
+
+ORDER = {
+    'user_id': 1,
+    'product_type': 'steam_key',
+    'product_name': 'Benchmark Game',
+    'product_price': 9.99,
+    'original_price': 19.99,
+    'payment_method': 'stripe',
+}
+
+def make_app(database_path, args, latency):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{database_path}"
+    app.config.update(
+        SETTLEMENT_QUEUE=args.queue,
+        SETTLEMENT_WORKERS=args.workers,
+        SETTLEMENT_BACKOFF=0.05,
+        SETTLEMENT_POLL_INTERVAL=0.02,
+        MOCK_GATEWAY_LATENCY=latency,
+        MOCK_GATEWAY_FAILURE_RATE=args.failure_rate,
+    )
+    app.register_blueprint(orders_bp, url_prefix='/api')
+    init_database(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='bench', email='bench@example.com', password_hash='x'))
+        db.session.execute(insert(ProductKey), [
+            {'product_type': 'steam_key', 'product_name': ORDER['product_name'], 'key_value': f"BENCH-{number:08d}"}
+            for number in range(args.orders * 2)
+        ])
+        db.session.commit()
+    key_pool.clear()
+    return app
+
+def pay(client, count, mode):
+    order_ids = [client.post('/api/orders', json=ORDER).get_json()['id'] for _ in range(count)]
+    started = time.perf_counter()
+    for order_id in order_ids:
+        response = client.post(f"/api/orders/{order_id}/process-payment?mode={mode}", json={'payment_provider': 'stripe'})
+        assert response.status_code in (200, 202), response.get_json()
+    return time.perf_counter() - started
+
+def unfinished(app):
+    with app.app_context():
+        count = db.session.execute(
+            select(func.count(SettlementJob.id)).where(SettlementJob.status.in_(('queued', 'processing')))
+        ).scalar_one()
+        db.session.remove()
+        return count
+
+def benchmark(args, latency):
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'bench.db'), args, latency)
+        client = app.test_client()
+
+        # Synchronous path: the gateway call would sit inside the request
+        sync_elapsed = pay(client, args.orders, 'sync') + args.orders * latency
+
+        settlement.configure_settlement(app)
+        pool = settlement.start_settlement_workers(app)
+        started = time.perf_counter()
+        async_elapsed = pay(client, args.orders, 'async')
+        while unfinished(app):
+            time.sleep(0.01)
+        drained = time.perf_counter() - started
+        pool.stop()
+
+        with app.app_context():
+            failed = SettlementJob.query.filter_by(status='failed').count()
+            db.engine.dispose()
+
+    print(f"latency {latency * 1000:5.0f}ms: sync {args.orders / sync_elapsed:7.1f} payments/s  "
+          f"async accept {args.orders / async_elapsed:7.1f} requests/s  "
+          f"settled {args.orders / drained:7.1f} jobs/s  failed {failed}")
+
+def main():
+    """Run the settlement benchmark"""
+    parser = argparse.ArgumentParser(description='Compare synchronous and asynchronous payment settlement')
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--latency', type=float, nargs='+', default=[0.05, 0.2], help='mock gateway latency in seconds')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--queue', choices=['memory', 'database'], default='memory')
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    print("🚀 Payment settlement benchmark")
+    print(f"{args.orders} orders, {args.workers} workers, {args.queue} queue, failure rate {args.failure_rate}")
+    print("(sync adds the gateway latency to each request, as a real gateway call would)")
+    print("=" * 60)
+
+    for latency in args.latency:
+        benchmark(args, latency)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Startup Time Benchmark
+This script starts fresh Python processes against a scratch SQLite database
+and measures how long a new worker needs to become useful: importing
+src.main, building the app with create_app() and serving its first request
+(GET /api/health). It compares startup with and without
+AUTO_BOOTSTRAP_SCHEMA on a database that is already up to date, which is
+what every autoscaled worker sees, and reports the median of several runs.
+Background workers are disabled so that only startup is timed.
+
+Usage:
+    python bench-startup.py --runs 10
+    python bench-startup.py --imports 15    # also list the slowest imports
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+import src.main
+imported = time.perf_counter()
+app = src.main.create_app()
+created = time.perf_counter()
+response = app.test_client().get('/api/health')
+assert response.status_code == 200, response.status_code
+served = time.perf_counter()
+print(json.dumps({'import': imported - started, 'create_app': created - imported, 'first_request': served - created}))
+"""
+
+def child_env(database_path, bootstrap):
+    env = dict(os.environ)
+    env.update({
+        'PYTHONPATH': ROOT,
+        'DATABASE_URL': f"sqlite:///{database_path}",
+        'AUTO_BOOTSTRAP_SCHEMA': 'true' if bootstrap else 'false',
+        'SETTLEMENT_WORKERS': '0',
+        'KEY_STOCK_WATCHER_INTERVAL': '0',
+        'PASSWORD_HASH_WORKERS': '0',
+        'PAYMENT_CONFIG_MARKER': '',
+    })
+    return env
+
+def run_child(env):
+    """Import, create_app and first request timings of one fresh process"""
+    result = subprocess.run([sys.executable, '-c', CHILD], env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def slowest_imports(env, count):
+    """(cumulative microseconds, module) of the slowest imports during create_app()"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import src.main; src.main.create_app()'],
+        env=env, cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:'):
+            _, cumulative, module = (part.strip() for part in line[len('import time:'):].split('|'))
+            if cumulative.isdigit():  # skips the header line
+                timings.append((int(cumulative), module))
+    return sorted(timings, reverse=True)[:count]
+
+def interpreter_startup(env, runs):
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], env=env, check=True)
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations)
+
+def main():
+    """Run the startup benchmark"""
+    parser = argparse.ArgumentParser(description='Benchmark API worker startup time')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--imports', type=int, default=0, help='list the N slowest imports')
+    args = parser.parse_args()
+
+    print("🚀 Startup benchmark")
+    print(f"{args.runs} fresh processes per mode")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, 'bench.db')
+
+        # Bring the scratch database up to date once, as a deploy would
+        run_child(child_env(database_path, bootstrap=True))
+
+        print(f"Interpreter alone: {interpreter_startup(child_env(database_path, False), args.runs) * 1000:8.1f} ms")
+        print(f"\n{'mode':<22} {'import':>10} {'create_app':>12} {'1st request':>12} {'total':>10}")
+        for label, bootstrap in (('bootstrap on startup', True), ('migrate-db on deploy', False)):
+            samples = [run_child(child_env(database_path, bootstrap)) for _ in range(args.runs)]
+            medians = {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+            total = sum(medians.values())
+            print(
+                f"{label:<22} {medians['import'] * 1000:8.1f} ms {medians['create_app'] * 1000:9.1f} ms "
+                f"{medians['first_request'] * 1000:9.1f} ms {total * 1000:7.1f} ms"
+            )
+
+        if args.imports:
+            print("\nSlowest imports (cumulative)")
+            for cumulative, module in slowest_imports(child_env(database_path, False), args.imports):
+                print(f"  {module:<50} {cumulative / 1000:8.1f} ms")
+
+    print("=" * 60)
+    print("✅ Done")
+
+if __name__ == "__main__":
+    main()
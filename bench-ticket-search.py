@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Ticket Search Benchmark
+This script fills a scratch SQLite database with support tickets and
+hundreds of thousands of messages of generated text (Zipf-distributed words,
+so common support terms match tens of thousands of rows), builds the FTS5
+search index, and times the same searches through the index and through the
+LIKE scan it replaces (per query and per filter combination).
+
+Usage:
+    python bench-ticket-search.py --tickets 20000 --messages 300000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from sqlalchemy import insert
+from src.models.user import User, db
+from src.models.order import Order
+from src.models.support import SupportTicket, SupportMessage
+from src.database import init_database
+from src.ticket_search import _filters, _like_search, create_search_index, rebuild_search_index, search_tickets
+
+WORDS = (
+    'payment refund key steam activation account login password email order charge card paypal crypto '
+    'invoice subscription region locked invalid expired code download game purchase receipt missing delay '
+    'error please help thanks issue problem still waiting update again cannot works broken wrong twice'
+).split()
+RARE_WORDS = ['chargeback', 'blacklisted', 'ransomware', 'duplicate', 'voucher']
+FILLER_WORDS = 5000
+QUERIES = ['refund', 'steam activation', 'chargeback', 'region locked key', 'voucher expired', 'password email']
+CATEGORIES = ('payment', 'technical', 'account', 'refund', 'general')
+STATUSES = ('open', 'in_progress', 'resolved', 'closed')
+
+def make_app(database_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{database_path}"
+    init_database(app)
+    return app
+
+def vocabulary():
+    """Zipf-distributed words: filler terms with the support words spread over the common ranks"""
+    words = [f"w{number:04d}" for number in range(FILLER_WORDS)]
+    for position, word in enumerate(WORDS):
+        words.insert(5 + position * 4, word)
+    return words, list(accumulate(1.0 / rank for rank in range(1, len(words) + 1)))
+
+def sentence(rng, length, vocab=vocabulary()):
+    words = rng.choices(vocab[0], cum_weights=vocab[1], k=length)
+    if rng.random() < 0.01:
+        words[rng.randrange(length)] = rng.choice(RARE_WORDS)
+    return ' '.join(words)
+
+def seed(app, tickets, messages, rng):
+    started = datetime(2024, 1, 1)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='bench', email='bench@example.com', password_hash='x'))
+        db.session.execute(insert(SupportTicket), [
+            {
+                'user_id': 1,
+                'ticket_number': f"TKT{number:010d}",
+                'subject': sentence(rng, 5),
+                'category': rng.choice(CATEGORIES),
+                'priority': 'medium',
+                'status': rng.choice(STATUSES),
+                'description': sentence(rng, 30),
+                'created_at': started + timedelta(minutes=number),
+                'updated_at': started + timedelta(minutes=number),
+            }
+            for number in range(tickets)
+        ])
+        for offset in range(0, messages, 50000):
+            db.session.execute(insert(SupportMessage), [
+                {
+                    'ticket_id': rng.randrange(1, tickets + 1),
+                    'sender_type': 'user',
+                    'sender_name': 'Bench',
+                    'message': sentence(rng, 25),
+                }
+                for _ in range(min(50000, messages - offset))
+            ])
+        db.session.commit()
+
+        # Bulk inserts bypass the ORM listeners, so the index is built in one pass
+        started_index = time.perf_counter()
+        with db.engine.begin() as connection:
+            create_search_index(connection)
+            rebuild_search_index(connection)
+        print(f"Index built in {time.perf_counter() - started_index:.1f}s")
+
+def time_searches(app, name, search, repeat):
+    print(f"\n{name}")
+    with app.app_context():
+        for query_text in QUERIES:
+            for filters in ({}, {'category': 'refund', 'status': 'open'}):
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    results, total = search(query_text, **filters)
+                elapsed = (time.perf_counter() - started) / repeat
+                label = f"{query_text!r}" + (' +filters' if filters else '')
+                print(f"  {label:<34} {elapsed * 1000:9.1f} ms  {total:>6} tickets")
+        db.session.rollback()
+
+def main():
+    """Run the ticket search benchmark"""
+    parser = argparse.ArgumentParser(description='Benchmark full-text ticket search against LIKE scans')
+    parser.add_argument('--tickets', type=int, default=20000)
+    parser.add_argument('--messages', type=int, default=300000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--skip-like', action='store_true', help='only time the FTS index')
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    print("🚀 Ticket search benchmark")
+    print(f"{args.tickets} tickets, {args.messages} messages")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'bench.db'))
+        started = time.perf_counter()
+        seed(app, args.tickets, args.messages, rng)
+        print(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+        time_searches(app, 'FTS5 index', search_tickets, args.repeat)
+        if not args.skip_like:
+            like = lambda query_text, **filters: _like_search(query_text, _filters(**filters), 1, 20)
+            time_searches(app, 'LIKE scan', like, 1)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print("=" * 60)
+    print("✅ Done")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Static Asset Build Script
+This script prepares the static folder for serving by static_assets.py:
+it writes a content-hash fingerprinted copy of every asset except the HTML
+entry points, rewrites references in HTML and CSS files to those copies,
+records the mapping in asset-manifest.json and writes .br (with the brotli
+package) and .gz variants of text assets. Run it after every frontend build
+and before starting the server; running it again replaces the previous
+build's outputs.
+
+Usage:
+    python build-assets.py
+    python build-assets.py --static path/to/static --no-fingerprint
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.static_assets import ENCODINGS, MANIFEST_NAME
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('.html', '.css', '.js', '.mjs', '.json', '.map', '.svg', '.txt', '.xml', '.webmanifest', '.ico')
+REWRITE_TYPES = ('.html', '.css')
+MIN_COMPRESS_SIZE = 256
+MIN_SAVING = 0.1  # keep a variant only if it is at least 10% smaller
+
+def static_files(folder):
+    """Relative names of the source files, without previous build outputs"""
+    names = []
+    for directory, _, files in os.walk(folder):
+        for filename in files:
+            name = os.path.relpath(os.path.join(directory, filename), folder).replace(os.sep, '/')
+            if name != MANIFEST_NAME and not name.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                names.append(name)
+    return sorted(names)
+
+def load_manifest(folder):
+    try:
+        with open(os.path.join(folder, MANIFEST_NAME)) as manifest:
+            return json.load(manifest).get('assets', {})
+    except FileNotFoundError:
+        return {}
+
+def references(name, mapping):
+    """{spelling: replacement} for root-absolute and relative references from ``name``"""
+    directory = os.path.dirname(name) or '.'
+    spellings = {}
+    for target, replacement in mapping.items():
+        spellings['/' + target] = '/' + replacement
+        spellings[os.path.relpath(target, directory).replace(os.sep, '/')] = \
+            os.path.relpath(replacement, directory).replace(os.sep, '/')
+    return spellings
+
+def rewrite(folder, name, mapping):
+    """Replace references to the keys of ``mapping`` in ``name`` with their values"""
+    if not mapping:
+        return False
+    path = os.path.join(folder, name)
+    with open(path, encoding='utf-8') as source:
+        text = source.read()
+    spellings = references(name, mapping)
+    pattern = '|'.join(re.escape(spelling) for spelling in sorted(spellings, key=len, reverse=True))
+    rewritten = re.sub(rf"""(?<=["'(=\s])({pattern})(?=["')?#\s])""", lambda match: spellings[match.group(1)], text)
+    if rewritten == text:
+        return False
+    with open(path, 'w', encoding='utf-8') as target:
+        target.write(rewritten)
+    return True
+
+def clean(folder, previous):
+    """Undo the previous build: restore references, delete copies and variants"""
+    originals = {fingerprinted: name for name, fingerprinted in previous.items()}
+    for name in static_files(folder):
+        if name.endswith(REWRITE_TYPES) and name not in originals:
+            rewrite(folder, name, originals)
+    for fingerprinted in originals:
+        path = os.path.join(folder, fingerprinted)
+        if os.path.exists(path):
+            os.remove(path)
+    for directory, _, files in os.walk(folder):
+        for filename in files:
+            if filename.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                os.remove(os.path.join(directory, filename))
+    manifest = os.path.join(folder, MANIFEST_NAME)
+    if os.path.exists(manifest):
+        os.remove(manifest)
+
+def fingerprint(folder, name):
+    """Copy ``name`` to ``stem.<hash>.ext`` and return the new name"""
+    path = os.path.join(folder, name)
+    with open(path, 'rb') as source:
+        digest = hashlib.sha256(source.read()).hexdigest()[:10]
+    stem, extension = os.path.splitext(name)
+    fingerprinted = f"{stem}.{digest}{extension}"
+    shutil.copy2(path, os.path.join(folder, fingerprinted))
+    return fingerprinted
+
+def compress(folder, name):
+    """Write .br and .gz variants of ``name``; returns the encodings written"""
+    path = os.path.join(folder, name)
+    with open(path, 'rb') as source:
+        data = source.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return []
+    written = []
+    compressors = {'gzip': lambda raw: gzip.compress(raw, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressors['br'] = lambda raw: brotli.compress(raw, quality=11)
+    for encoding, suffix in ENCODINGS:
+        if encoding not in compressors:
+            continue
+        compressed = compressors[encoding](data)
+        if len(compressed) <= len(data) * (1 - MIN_SAVING):
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+            shutil.copystat(path, path + suffix)
+            written.append(encoding)
+    return written
+
+def build_assets():
+    """Fingerprint and precompress the static folder"""
+    parser = argparse.ArgumentParser(description='Fingerprint and precompress static assets')
+    parser.add_argument('--static', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
+    parser.add_argument('--no-fingerprint', action='store_true', help='only write compressed variants')
+    args = parser.parse_args()
+    folder = args.static
+
+    if not os.path.isdir(folder):
+        print(f"❌ Static folder not found: {folder}")
+        sys.exit(1)
+
+    print(f"📦 Building static assets in {folder}")
+    if brotli is None:
+        print("⚠️  brotli is not installed, writing gzip variants only")
+    print("=" * 60)
+
+    clean(folder, load_manifest(folder))
+    names = static_files(folder)
+
+    mapping = {}
+    if not args.no_fingerprint:
+        # Files without references first, then CSS (so its hash covers the rewritten
+        # references), then the HTML entry points, which keep their names
+        for name in names:
+            if not name.endswith(REWRITE_TYPES):
+                mapping[name] = fingerprint(folder, name)
+        for name in names:
+            if name.endswith('.css'):
+                rewrite(folder, name, mapping)
+                mapping[name] = fingerprint(folder, name)
+        for name in names:
+            if name.endswith('.html'):
+                rewrite(folder, name, mapping)
+        with open(os.path.join(folder, MANIFEST_NAME), 'w') as manifest:
+            json.dump({'version': 1, 'assets': mapping}, manifest, indent=2, sort_keys=True)
+
+    compressed = 0
+    for name in static_files(folder):
+        if name.lower().endswith(COMPRESSIBLE_TYPES):
+            encodings = compress(folder, name)
+            if encodings:
+                compressed += 1
+                print(f"  {name:<50} {', '.join(encodings)}")
+
+    print("=" * 60)
+    print(f"✅ {len(mapping)} assets fingerprinted, {compressed} precompressed")
+
+if __name__ == "__main__":
+    build_assets()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Query Count Check Script
+This script seeds a scratch SQLite database twice, once small and once ten
+times larger, and counts the SQL statements the ticket list, ticket detail
+and message endpoints run. It exits non-zero if any of them exceeds its
+QUERY_BUDGETS entry or runs more statements on the larger database, which is
+what an N+1 regression looks like. Run it in CI next to check-query-plans.py.
+
+Usage:
+    python check-query-counts.py
+    python check-query-counts.py --strategy lazy    # shows the N+1 it prevents
+"""
+
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from sqlalchemy import insert
+from src.models.user import User, db
+from src.models.order import Order
+from src.models.payment import Payment
+from src.models.support import SupportTicket, SupportMessage
+from src.routes.tickets import tickets_bp
+from src.database import init_database
+from src.query_plans import QueryCounter
+from src.ticket_loading import QUERY_BUDGETS, ticket_detail, ticket_list_query, ticket_summary
+
+def make_app(strategy):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite://"
+    app.config['TICKET_LOADING_STRATEGY'] = strategy
+    app.config['SECRET_KEY'] = 'check'
+    app.register_blueprint(tickets_bp, url_prefix='/api')
+    init_database(app)
+    return app
+
+def seed(app, tickets, messages_per_ticket):
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(User), [
+            {'username': f"user{number}", 'email': f"user{number}@example.com", 'password_hash': 'x'}
+            for number in range(1, tickets + 1)
+        ])
+        db.session.execute(insert(Order), [
+            {
+                'user_id': number,
+                'order_number': f"GV{number:010d}",
+                'product_type': 'steam_key',
+                'product_name': 'Check Game',
+                'product_price': 9.99,
+                'original_price': 19.99,
+                'payment_method': 'stripe',
+            }
+            for number in range(1, tickets + 1)
+        ])
+        db.session.execute(insert(SupportTicket), [
+            {
+                'user_id': number,
+                'ticket_number': f"TKT{number:010d}",
+                'subject': 'Key does not work',
+                'category': 'technical',
+                'description': 'The key was rejected',
+                'order_id': number,
+            }
+            for number in range(1, tickets + 1)
+        ])
+        db.session.execute(insert(SupportMessage), [
+            {'ticket_id': 1, 'sender_type': 'user', 'sender_name': 'Check', 'message': f"Message {number}"}
+            for number in range(messages_per_ticket)
+        ])
+        db.session.commit()
+
+def measure(app, tickets):
+    """Return {name: QueryCounter} for each read path"""
+    counters = {}
+    with app.app_context():
+        with QueryCounter() as counter:
+            query = ticket_list_query()
+            rows = query.limit(tickets).all()
+            query.order_by(None).count()
+            [ticket_summary(ticket) for ticket in rows]
+        counters['ticket list'] = counter
+        db.session.remove()
+
+        with QueryCounter() as counter:
+            ticket_detail(1)
+        counters['ticket detail'] = counter
+        db.session.remove()
+
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = 1
+        with QueryCounter() as counter:
+            response = client.get('/api/support/tickets/1/messages?after_id=5&limit=20')
+            assert response.status_code == 200, response.get_json()
+        counters['messages after id'] = counter
+    return counters
+
+def check_query_counts():
+    """Compare statement counts at two data sizes against the budgets"""
+    parser = argparse.ArgumentParser(description='Check ticket read paths for N+1 queries')
+    parser.add_argument('--strategy', default='selectin', help='TICKET_LOADING_STRATEGY to check')
+    args = parser.parse_args()
+
+    results = []
+    for tickets, messages in ((10, 30), (100, 300)):
+        app = make_app(args.strategy)
+        seed(app, tickets, messages)
+        results.append(measure(app, tickets))
+
+    print(f"🔍 Query counts with the {args.strategy} strategy")
+    failures = []
+    for name, budget in QUERY_BUDGETS.items():
+        small, large = results[0][name], results[1][name]
+        print(f"{name:<20} {small.count:>4} queries (10 tickets) {large.count:>4} queries (100 tickets)  budget {budget}")
+        problem = large.problems(budget)
+        if problem:
+            failures.append(f"{name}: {problem}")
+        elif large.count > small.count:
+            failures.append(f"{name}: grows with the data ({small.count} -> {large.count})")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ Query counts are within budget and independent of data size")
+
+if __name__ == "__main__":
+    check_query_counts()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Query Plan Check Script
+This script builds a scratch SQLite database from the models, runs
+EXPLAIN QUERY PLAN for every hot query and exits non-zero if any of them
+needs a full table scan or a temporary sort. Run it in CI.
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from src.models.user import db
+from src.models.order import Order
+from src.models.payment import Payment
+from src.models.support import SupportTicket, SupportMessage
+from src.models.payment_config import PaymentConfig, PayoutRecord
+from src.models.product_key import ProductKey
+from src.models.id_sequence import IdSequence
+from src.query_plans import HOT_QUERIES, check_hot_queries
+
+def check_query_plans():
+    """Check every hot query plan against an in-memory database"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite://"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        failures = check_hot_queries()
+
+    print(f"🔍 Checked {len(HOT_QUERIES)} hot queries")
+    for name, problems in failures.items():
+        print(f"❌ {name}: {'; '.join(problems)}")
+    if failures:
+        sys.exit(1)
+    print("✅ All hot queries use an index")
+
+if __name__ == "__main__":
+    check_query_plans()
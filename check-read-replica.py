@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Read Replica Check Script
+This script creates a primary and a replica SQLite file with different
+contents, points DATABASE_REPLICA_URL at the replica and checks where
+RoutingSession sends each statement: reads inside ``@read_only`` go to the
+replica, reads outside it stay on the primary, and flushes, writes and every
+read that follows a write inside ``@read_only`` fall back to the primary.
+It exits non-zero on the first misrouted statement. Run it in CI next to
+check-query-plans.py.
+
+Usage:
+    python check-read-replica.py
+"""
+
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from sqlalchemy import create_engine, func, select, update
+from src.models.user import User, db
+from src.database import init_database
+from src.migrations import load_models
+from src.read_replica import REPLICA_BIND, read_only
+
+def make_app(primary_path, replica_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{primary_path}"
+    app.config['DATABASE_REPLICA_URL'] = f"sqlite:///{replica_path}"
+    init_database(app)
+    return app
+
+def seed(path, name):
+    """One user named after the database, so every read shows where it went"""
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert().values(
+            username=name, email=f"{name}@example.com", password_hash='x'
+        ))
+    engine.dispose()
+
+def source():
+    """'primary' or 'replica', depending on where the session sends a read"""
+    return db.session.execute(select(User.username).order_by(User.id)).scalars().first()
+
+def count_users(engine):
+    with engine.connect() as connection:
+        return connection.execute(select(func.count(User.id))).scalar_one()
+
+@read_only
+def replica_read():
+    return source()
+
+@read_only
+def read_with_pending_insert():
+    db.session.add(User(username='pending', email='pending@example.com', password_hash='x'))
+    # The query autoflushes the insert, which must land on the primary
+    result = db.session.execute(select(func.count(User.id)).where(User.username == 'pending')).scalar_one()
+    db.session.rollback()
+    return result
+
+@read_only
+def read_after_flush():
+    db.session.add(User(username='flushed', email='flushed@example.com', password_hash='x'))
+    db.session.flush()
+    result = db.session.execute(select(func.count(User.id)).where(User.username == 'flushed')).scalar_one()
+    db.session.rollback()
+    return result
+
+@read_only
+def write_and_commit():
+    db.session.execute(update(User).where(User.username == 'primary').values(first_name='written'))
+    result = db.session.execute(select(User.first_name).where(User.username == 'primary')).scalar()
+    db.session.commit()
+    return result
+
+@read_only
+def read_after_commit():
+    return source()
+
+def check_read_replica():
+    """Check statement routing between a primary and a replica file"""
+    print("🔀 Read replica routing check")
+    print("=" * 60)
+
+    failures = []
+
+    def check(label, actual, expected):
+        if actual == expected:
+            print(f"✅ {label}")
+        else:
+            print(f"❌ {label}: expected {expected!r}, got {actual!r}")
+            failures.append(label)
+
+    with tempfile.TemporaryDirectory() as directory:
+        primary_path = os.path.join(directory, 'primary.db')
+        replica_path = os.path.join(directory, 'replica.db')
+        load_models()
+        seed(primary_path, 'primary')
+        seed(replica_path, REPLICA_BIND)
+        app = make_app(primary_path, replica_path)
+
+        with app.test_request_context():
+            check("reads outside @read_only use the primary", source(), 'primary')
+            check("reads inside @read_only use the replica", replica_read(), REPLICA_BIND)
+            check("autoflushed inserts inside @read_only go to the primary", read_with_pending_insert(), 1)
+            check("reads after a flush inside @read_only stay on the primary", read_after_flush(), 1)
+            check("UPDATE statements inside @read_only go to the primary", write_and_commit(), 'written')
+            check("reads after the commit use the replica again", read_after_commit(), REPLICA_BIND)
+            db.session.remove()
+
+            check("the replica was never written", count_users(db.engines[REPLICA_BIND]), 1)
+            check("no rolled-back insert reached the primary", count_users(db.engine), 1)
+
+        with app.app_context():
+            db.engine.dispose()
+            db.engines[REPLICA_BIND].dispose()
+
+    print("=" * 60)
+    if failures:
+        sys.exit(1)
+    print("✅ Reads and writes are routed correctly")
+
+if __name__ == "__main__":
+    check_read_replica()
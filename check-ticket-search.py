@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Ticket Search Check Script
+This script indexes a few support tickets and messages in an in-memory
+SQLite database and runs a table of searches through the FTS5 index and
+through the LIKE fallback. Both must return the expected tickets, including
+multi-word searches whose words are spread over a ticket's subject,
+description and replies. It exits non-zero on the first mismatch. Run it in
+CI next to check-query-plans.py.
+
+Usage:
+    python check-ticket-search.py
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from src.models.user import User, db
+from src.models.support import SupportTicket, SupportMessage
+from src.database import init_database
+from src.migrations import load_models
+from src.ticket_search import _filters, _like_search, create_search_index, search_tickets
+
+TICKETS = [
+    # (subject, description, messages)
+    ('Steam key problem', 'The key I bought does not work', ['Activation fails with an error']),
+    ('Activation limit reached', 'Waiting for a paypal refund', []),
+    ('Steam activation', 'Region locked code', ['Still waiting']),
+]
+
+# query -> ticket numbers (1-based positions in TICKETS) found by both search paths
+SEARCHES = {
+    'steam': {1, 3},
+    'activation': {1, 2, 3},
+    'steam activation': {1, 3},
+    'steam error': {1},
+    'activation waiting': {2, 3},
+    'paypal refund': {2},
+    'steam refund': set(),
+}
+
+# Word forms only the FTS index matches
+STEMMED_SEARCHES = {
+    'refunded paypal': {2},
+}
+
+def make_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite://"
+    init_database(app)
+    return app
+
+def seed():
+    load_models()
+    db.create_all()
+    with db.engine.begin() as connection:
+        if not create_search_index(connection):
+            print("❌ This SQLite build has no FTS5")
+            sys.exit(1)
+    user = User(username='search', email='search@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    ids = {}
+    for number, (subject, description, messages) in enumerate(TICKETS, start=1):
+        ticket = SupportTicket(
+            user_id=user.id, ticket_number=f"TKT{number:08d}", subject=subject,
+            category='technical', description=description
+        )
+        db.session.add(ticket)
+        db.session.flush()
+        for message in messages:
+            db.session.add(SupportMessage(ticket_id=ticket.id, sender_type='user', sender_name='search', message=message))
+        ids[ticket.id] = number
+    db.session.commit()
+    return ids
+
+def check_ticket_search():
+    """Compare FTS and LIKE search results against the expected tickets"""
+    print("🔍 Ticket search check")
+    print("=" * 60)
+
+    failures = []
+    app = make_app()
+    with app.app_context():
+        ids = seed()
+        paths = {
+            'FTS5': lambda query_text: search_tickets(query_text, per_page=100),
+            'LIKE': lambda query_text: _like_search(query_text, _filters(), 1, 100),
+        }
+        cases = [(name, query, expected) for name in paths for query, expected in SEARCHES.items()]
+        cases += [('FTS5', query, expected) for query, expected in STEMMED_SEARCHES.items()]
+        for name, query, expected in cases:
+            results, total = paths[name](query)
+            found = {ids[ticket.id] for ticket, *_ in results}
+            if found == expected and total == len(expected):
+                print(f"✅ {name} {query!r}: {sorted(found)}")
+            else:
+                print(f"❌ {name} {query!r}: expected {sorted(expected)}, got {sorted(found)} (total {total})")
+                failures.append((name, query))
+        db.session.rollback()
+
+    print("=" * 60)
+    if failures:
+        sys.exit(1)
+    print("✅ Both search paths find the same tickets")
+
+if __name__ == "__main__":
+    check_ticket_search()
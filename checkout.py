@@ -0,0 +1,145 @@
+"""
+Cart checkout.
+
+Buying several products one by one costs two requests and two commits per
+item (create order, process payment). ``checkout_cart`` does the whole cart in
+one transaction:
+
+1. validate every line and claim a product key for it (one conditional
+   UPDATE per key, as in process-payment);
+2. insert all orders in one executemany, already completed and carrying
+   their keys;
+3. insert all payments in one executemany and link the claimed keys to
+   their orders with a single bulk UPDATE.
+
+A line that is invalid or out of stock is reported in ``failures`` and
+skipped, and the rest of the cart goes through. With ``all_or_nothing`` any
+failure raises ``CheckoutFailed`` instead, and the caller rolls back.
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from src.models.user import db
+from src.models.order import Order
+from src.models.payment import Payment
+from src.key_inventory import OutOfStock, assign_product_keys, reserve_product_key
+from src.id_allocator import next_order_number
+
+MAX_CART_ITEMS = 50
+REQUIRED_ITEM_FIELDS = ('product_type', 'product_name', 'product_price', 'original_price')
+
+class CheckoutFailed(Exception):
+    """Raised for an all-or-nothing cart with at least one failed line"""
+
+    def __init__(self, failures):
+        super().__init__('Checkout failed for one or more items')
+        self.failures = failures
+
+def expand_items(items):
+    """Expand ``quantity`` so each line becomes one order.
+
+    Raises ValueError for a quantity that is not an integer from 1 to
+    MAX_CART_ITEMS, or once the cart grows past MAX_CART_ITEMS, before
+    expanding the offending line.
+    """
+    lines = []
+    for index, item in enumerate(items):
+        quantity = item.get('quantity', 1) if isinstance(item, dict) else 1
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or not 1 <= quantity <= MAX_CART_ITEMS:
+            raise ValueError(f'Item {index}: quantity must be an integer from 1 to {MAX_CART_ITEMS}')
+        if len(lines) + quantity > MAX_CART_ITEMS:
+            raise ValueError(f'A cart may contain at most {MAX_CART_ITEMS} items')
+        lines.extend((index, item) for _ in range(quantity))
+    return lines
+
+def validate_item(item):
+    """Return an error message for an unusable cart line, or None"""
+    if not isinstance(item, dict):
+        return 'Item must be an object'
+    for field in REQUIRED_ITEM_FIELDS:
+        if field not in item:
+            return f'Missing required field: {field}'
+    try:
+        float(item['product_price'])
+        float(item['original_price'])
+    except (TypeError, ValueError):
+        return 'Invalid price'
+    return None
+
+def checkout_cart(user_id, items, payment_method, payment_provider='stripe', all_or_nothing=False, fallback_key=None):
+    """Create and pay one order per cart line; returns (order_ids, failures).
+
+    ``fallback_key(product_type, product_name)`` supplies a key when stock
+    runs out (development only); without it the line fails. Nothing is
+    committed here.
+    """
+    lines = expand_items(items)
+
+    now = datetime.utcnow()
+    failures = []
+    order_rows = []
+    key_ids = []
+    for index, item in lines:
+        error = validate_item(item)
+        if error:
+            failures.append({'index': index, 'product_name': item.get('product_name') if isinstance(item, dict) else None, 'error': error})
+            continue
+        try:
+            key_id, product_key = reserve_product_key(item['product_type'], item['product_name'])
+        except OutOfStock as e:
+            if fallback_key is None:
+                failures.append({'index': index, 'product_name': item['product_name'], 'error': str(e)})
+                continue
+            key_id, product_key = None, fallback_key(item['product_type'], item['product_name'])
+
+        key_ids.append(key_id)
+        order_rows.append({
+            'user_id': user_id,
+            'order_number': next_order_number(),
+            'product_type': item['product_type'],
+            'product_name': item['product_name'],
+            'product_price': float(item['product_price']),
+            'original_price': float(item['original_price']),
+            'discount_percentage': item.get('discount_percentage', 0),
+            'status': 'completed',
+            'payment_method': payment_method,
+            'payment_status': 'completed',
+            'transaction_id': f"txn_{uuid.uuid4().hex[:16]}",
+            'product_key': product_key,
+            'created_at': now,
+            'updated_at': now,
+        })
+
+    if failures and all_or_nothing:
+        raise CheckoutFailed(failures)
+    if not order_rows:
+        return [], failures
+
+    order_ids = db.session.execute(
+        insert(Order).returning(Order.id, sort_by_parameter_order=True), order_rows
+    ).scalars().all()
+
+    db.session.execute(insert(Payment), [
+        {
+            'order_id': order_id,
+            'user_id': user_id,
+            'payment_method': payment_method,
+            'payment_provider': payment_provider,
+            'transaction_id': row['transaction_id'],
+            'amount': row['product_price'],
+            'currency': 'USD',
+            'status': 'completed',  # Mock successful payment
+            'created_at': now,
+            'updated_at': now,
+            'completed_at': now,
+        }
+        for order_id, row in zip(order_ids, order_rows)
+    ])
+
+    assign_product_keys({
+        key_id: order_id for key_id, order_id in zip(key_ids, order_ids) if key_id is not None
+    })
+    return order_ids, failures
@@ -8,18 +8,18 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from gamevault_backend.src.models.user import User, db
+from src.models.user import User, db
+from src.config import get_config
+from src.database import init_database
 from flask import Flask
 
 def create_admin_user():
     """Create an admin user"""
     
-    # Configure Flask app
+    # Configure Flask app (same database settings as the API server)
     app = Flask(__name__)
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'gamevault-backend', 'src', 'database', 'app.db')}"
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    
-    db.init_app(app)
+    app.config.from_object(get_config())
+    init_database(app)
     
     with app.app_context():
         # Create tables if they don't exist
@@ -0,0 +1,126 @@
+"""
+Database configuration profiles.
+
+The database URL and server pool sizes come from the app config (see
+config.py). For SQLite, a profile bundles the pragmas applied to every new
+connection with the SQLAlchemy engine/pool options. The profile is picked
+with the GAMEVAULT_DB_PROFILE environment variable:
+
+* ``baseline``: SQLite defaults (rollback journal, synchronous=FULL); kept
+  for comparison in bench-db-write.py.
+* ``development`` (default): WAL journal and a busy timeout, so the dev
+  server no longer reports ``database is locked`` when requests overlap.
+* ``production``: WAL with synchronous=NORMAL (no fsync per commit; a power
+  loss may drop the last transactions but never corrupts the file), larger
+  page cache, memory-mapped reads and a sized connection pool.
+"""
+
+import os
+
+from sqlalchemy import event
+
+from src.models.user import db
+from src.read_replica import REPLICA_BIND, replica_pragmas, replica_uri
+
+DATABASE_PROFILES = {
+    'baseline': {
+        'pragmas': {},
+        'engine_options': {},
+    },
+    'development': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'busy_timeout': 5000,
+        },
+        'engine_options': {},
+    },
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 10000,
+            'cache_size': -65536,  # 64 MiB
+            'mmap_size': 268435456,  # 256 MiB
+            'temp_store': 'MEMORY',
+        },
+        'engine_options': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_timeout': 30,
+        },
+    },
+}
+
+DEFAULT_PROFILE = 'development'
+
+def default_database_uri():
+    return f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+
+def get_profile(name=None):
+    name = name or os.environ.get('GAMEVAULT_DB_PROFILE', DEFAULT_PROFILE)
+    if name not in DATABASE_PROFILES:
+        raise ValueError(f"Unknown database profile: {name}")
+    return name, DATABASE_PROFILES[name]
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run the given pragmas on every new connection of a SQLite engine"""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in pragmas.items():
+                cursor.execute(f"PRAGMA {pragma}={value}")
+        finally:
+            cursor.close()
+
+def server_pool_options(config):
+    """Pool options for client-server databases from the DB_POOL_* settings"""
+    return {
+        'pool_size': config.get('DB_POOL_SIZE', 10),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+    }
+
+def init_database(app, profile=None):
+    """Configure SQLAlchemy for ``app`` from its settings and a database profile, then bind ``db``.
+
+    SQLite databases get the profile's pragmas and pool options; any other
+    backend (e.g. PostgreSQL via DATABASE_URL) gets a QueuePool sized from
+    the DB_POOL_* settings. SQLALCHEMY_ENGINE_OPTIONS set on the app win over
+    both. DATABASE_REPLICA_URL adds the ``replica`` bind used by read_only views.
+    """
+    name, settings = get_profile(profile or app.config.get('DATABASE_PROFILE'))
+    if not app.config.get('SQLALCHEMY_DATABASE_URI'):
+        app.config['SQLALCHEMY_DATABASE_URI'] = default_database_uri()
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['DATABASE_PROFILE'] = name
+
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('sqlite'):
+        engine_options = dict(settings['engine_options'])
+        if uri in ('sqlite://', 'sqlite:///:memory:'):
+            # In-memory databases use a single static connection; pool sizing does not apply
+            for option in ('pool_size', 'max_overflow', 'pool_timeout'):
+                engine_options.pop(option, None)
+    else:
+        engine_options = server_pool_options(app.config)
+    engine_options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+
+    if app.config.get('DATABASE_REPLICA_URL'):
+        replica = replica_uri(uri, app.config['DATABASE_REPLICA_URL'])
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds[REPLICA_BIND] = {'url': replica, **engine_options} if not replica.startswith('sqlite') else replica
+        app.config['SQLALCHEMY_BINDS'] = binds
+
+    db.init_app(app)
+    with app.app_context():
+        for key, engine in db.engines.items():
+            pragmas = replica_pragmas(settings['pragmas']) if key == REPLICA_BIND else settings['pragmas']
+            apply_sqlite_pragmas(engine, pragmas)
+    return name
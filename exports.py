@@ -0,0 +1,124 @@
+from flask import Blueprint, Response, jsonify, request, session, stream_with_context
+from src.models.user import db
+from src.models.order import Order
+from src.models.payment import Payment
+from src.models.payment_config import PayoutRecord
+from src.read_replica import use_replica
+from src.serializers import UnknownField, dumps, order_serializer, payment_serializer, payout_serializer, requested_fields
+from sqlalchemy import select
+from datetime import datetime, timedelta
+import csv
+import io
+import zlib
+
+exports_bp = Blueprint('exports', __name__)
+
+EXPORT_CHUNK_ROWS = 1000
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+class InvalidExportFilter(ValueError):
+    """Raised for an unparseable date or format parameter"""
+
+def parse_date(value, end=False):
+    """Parse ?from=/?to= values; a bare date used as ``to`` covers that whole day"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise InvalidExportFilter(f'Invalid date: {value}')
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+def export_statement(serializer, fields, date_column):
+    """Build the filtered SELECT for an export from ?from=, ?to= and ?status="""
+    columns = [serializer.columns[name].label(name) for name in fields]
+    statement = select(*columns).order_by(serializer.model.id)
+    if request.args.get('from'):
+        statement = statement.where(date_column >= parse_date(request.args['from']))
+    if request.args.get('to'):
+        statement = statement.where(date_column < parse_date(request.args['to'], end=True))
+    if request.args.get('status'):
+        statuses = [status.strip() for status in request.args['status'].split(',') if status.strip()]
+        statement = statement.where(serializer.model.status.in_(statuses))
+    return statement
+
+def csv_chunks(fields, rows):
+    """Yield CSV text in chunks of EXPORT_CHUNK_ROWS rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(value.isoformat() if isinstance(value, datetime) else value for value in row)
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+def ndjson_chunks(fields, rows):
+    """Yield newline-delimited JSON in chunks of EXPORT_CHUNK_ROWS rows"""
+    lines = []
+    for row in rows:
+        lines.append(dumps(dict(zip(fields, row))))
+        if len(lines) == EXPORT_CHUNK_ROWS:
+            yield b'\n'.join(lines) + b'\n'
+            lines = []
+    if lines:
+        yield b'\n'.join(lines) + b'\n'
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def stream_export(name, serializer, date_column):
+    """Stream ``serializer``'s model as CSV or NDJSON without loading it into memory"""
+    if not session.get('is_admin'):
+        return jsonify({'error': 'Admin access required'}), 403
+    try:
+        export_format = request.args.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            raise InvalidExportFilter(f'Unknown format: {export_format}')
+        fields = requested_fields(serializer, default_view='export' if 'export' in serializer.views else 'detail')
+        statement = export_statement(serializer, fields, date_column)
+    except (InvalidExportFilter, UnknownField) as e:
+        return jsonify({'error': str(e)}), 400
+
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+
+    def generate():
+        # Rows arrive from a server-side cursor in yield_per batches
+        with use_replica():
+            rows = db.session.execute(
+                statement.execution_options(stream_results=True, yield_per=EXPORT_CHUNK_ROWS)
+            )
+            chunks = csv_chunks(fields, rows) if export_format == 'csv' else ndjson_chunks(fields, rows)
+            yield from gzip_chunks(chunks) if compress else chunks
+
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    filename = f"{name}-{datetime.utcnow():%Y%m%d%H%M%S}.{extension}{'.gz' if compress else ''}"
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+    if compress:
+        mimetype = 'application/gzip'
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers=headers)
+
+@exports_bp.route('/exports/orders', methods=['GET'])
+def export_orders():
+    """Export orders as CSV or NDJSON (admin only)"""
+    return stream_export('orders', order_serializer, Order.created_at)
+
+@exports_bp.route('/exports/payments', methods=['GET'])
+def export_payments():
+    """Export payments as CSV or NDJSON (admin only)"""
+    return stream_export('payments', payment_serializer, Payment.created_at)
+
+@exports_bp.route('/exports/payouts', methods=['GET'])
+def export_payouts():
+    """Export payout records as CSV or NDJSON (admin only)"""
+    return stream_export('payouts', payout_serializer, PayoutRecord.created_at)
@@ -0,0 +1,141 @@
+"""
+Conditional GETs and cached responses for read endpoints.
+
+``/orders/<id>``, ``/orders/user/<id>`` and ``/auth/me`` used to load, serialize
+and resend the full body every time, even when the client already had it.
+Each of them now derives an ETag from the columns that change with every
+write: ``version`` and ``updated_at`` for orders, and ``updated_at`` for users.
+Only those columns are read first, with a single narrow query, or they come
+from the user cache.
+
+* If-None-Match: when the client sends the current ETag, the endpoint answers
+  304 with no body, before loading or serializing anything else.
+* Response cache: encoded bodies are kept in a bounded per-process LRU with a
+  TTL (HTTP_CACHE_SIZE, HTTP_CACHE_TTL), grouped by tag, e.g.
+  ``('order', 12)`` or ``('user_orders', 3)``. A cached body is only served
+  when its ETag still matches. A write from another worker, the settlement
+  workers or a script is therefore detected even before the entry expires.
+  The write paths in orders.py and auth.py call ``response_cache.invalidate``
+  after they commit, so replaced bodies do not take up room until they expire.
+
+Responses carry ``Cache-Control: private, no-cache``. Browsers keep them but
+revalidate on each use, and shared proxies never store per-user data.
+Bulk UPDATE statements must bump ``updated_at`` (and ``version`` for orders),
+or clients keep their old copy.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, request
+
+from src.serializers import dumps
+
+MAX_VARIANTS = 8
+
+def make_etag(*parts):
+    """Strong ETag value (without quotes) for the given validator values"""
+    return hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+def client_has(etag):
+    return request.if_none_match.contains_weak(etag)
+
+def _validators(response, etag):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def not_modified(etag):
+    return _validators(Response(status=304), etag)
+
+class ResponseCache:
+    """Thread-safe LRU of encoded bodies: tag -> {variant: (etag, body, expires)}"""
+
+    def __init__(self, max_size=2000, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, tag, variant, etag):
+        """The body stored for ``etag``, or None when it is missing, stale or expired"""
+        with self._lock:
+            variants = self._entries.get(tag)
+            entry = variants.get(variant) if variants else None
+            if entry is None or entry[0] != etag or entry[2] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(tag)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, tag, variant, etag, body):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            variants = self._entries.setdefault(tag, {})
+            variants.pop(variant, None)
+            variants[variant] = (etag, body, time.monotonic() + self.ttl)
+            while len(variants) > MAX_VARIANTS:
+                del variants[next(iter(variants))]
+            self._entries.move_to_end(tag)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *tags):
+        """Drop every cached variant of ``tags``"""
+        with self._lock:
+            self.invalidations += 1
+            for tag in tags:
+                self._entries.pop(tag, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def respond(self, tag, etag, build, variant=None):
+        """304 if the client has ``etag``, else the cached body or ``dumps(build())``
+
+        ``variant`` tells apart bodies of the same resource (defaults to the
+        query string, which carries ``fields=``, ``view=`` and paging); it
+        must also be part of ``etag``.
+        """
+        if client_has(etag):
+            with self._lock:
+                self.not_modified += 1
+            return not_modified(etag)
+        variant = request.query_string if variant is None else variant
+        body = self.get(tag, variant, etag)
+        if body is None:
+            body = dumps(build())
+            self.set(tag, variant, etag, body)
+        return _validators(Response(body, mimetype='application/json'), etag)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'not_modified': self.not_modified,
+                'invalidations': self.invalidations,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+            }
+
+response_cache = ResponseCache()
+
+def configure_http_cache(app):
+    """Size the response cache from HTTP_CACHE_SIZE (0 disables it) and HTTP_CACHE_TTL"""
+    response_cache.max_size = app.config.get('HTTP_CACHE_SIZE', 2000)
+    response_cache.ttl = app.config.get('HTTP_CACHE_TTL', 60)
+    response_cache.clear()
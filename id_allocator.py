@@ -0,0 +1,217 @@
+"""
+Order and ticket number allocation.
+
+Numbers are handed out by an allocator instead of drawn at random, so the
+unique constraints on Order.order_number and SupportTicket.ticket_number no
+longer turn a random collision into a failed request. Two strategies are
+available:
+
+* ``time`` (default): time-ordered ids built from a millisecond timestamp,
+  a worker id and a per-millisecond sequence. No database access at all, but
+  ids are only unique if every process writing to the database has a
+  distinct ``GAMEVAULT_WORKER_ID`` (0-1023). Without one the low bits of the
+  process id are used, which is only acceptable on a single development
+  host; production (``ID_PID_WORKER_FALLBACK`` off) refuses to start
+  instead.
+* ``block``: a sequence row per id kind in the IdSequence table. Each process
+  reserves a block of values with a single UPDATE and then hands them out
+  from memory, so the database is touched once per ``block_size`` ids.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.models.user import db
+from src.models.id_sequence import IdSequence
+
+# 2025-01-01T00:00:00Z in milliseconds
+EPOCH_MS = 1735689600000
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+def _base36(value, width):
+    chars = []
+    while value:
+        value, remainder = divmod(value, 36)
+        chars.append(ALPHABET[remainder])
+    return ''.join(reversed(chars)).rjust(width, '0')
+
+def default_worker_id(pid_fallback=True):
+    """Worker id from GAMEVAULT_WORKER_ID, else the low bits of the process id if allowed.
+
+    Containers and separate hosts routinely reuse the same pids, so the
+    fallback can hand two processes the same id; it is only meant for a
+    single development host. With ``pid_fallback=False`` a missing id raises.
+    """
+    configured = os.environ.get('GAMEVAULT_WORKER_ID')
+    if configured is not None:
+        worker_id = int(configured)
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"GAMEVAULT_WORKER_ID must be between 0 and {MAX_WORKER_ID}")
+        return worker_id
+    if not pid_fallback:
+        raise RuntimeError(
+            "GAMEVAULT_WORKER_ID is not set; give every process a distinct id (0-"
+            f"{MAX_WORKER_ID}) or use ID_ALLOCATOR=block"
+        )
+    return os.getpid() & MAX_WORKER_ID
+
+class TimeOrderedAllocator:
+    """Snowflake-style ids: 41 bits of milliseconds, 10 bits of worker, 12 bits of sequence.
+
+    Rendered as 13 base36 characters after the prefix, so the ids sort by
+    creation time and fit comfortably in the 20-character number columns.
+    Without an explicit ``worker_id`` the id is re-read after a fork, so a
+    pre-fork server can set GAMEVAULT_WORKER_ID per worker in its post-fork
+    hook.
+    """
+
+    def __init__(self, prefix, worker_id=None, clock=time.time, pid_fallback=True):
+        if worker_id is not None and not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}")
+        self.prefix = prefix
+        self._fixed_worker_id = worker_id
+        self._clock = clock
+        self._pid_fallback = pid_fallback
+        self._lock = threading.Lock()
+        self._pid = None
+        self.worker_id = None
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _bind_process(self):
+        self._pid = os.getpid()
+        self.worker_id = self._fixed_worker_id if self._fixed_worker_id is not None else default_worker_id(self._pid_fallback)
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _now_ms(self):
+        return int(self._clock() * 1000) - EPOCH_MS
+
+    def next_value(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._bind_process()
+            now = self._now_ms()
+            # Never step backwards if the wall clock is adjusted
+            if now < self._last_ms:
+                now = self._last_ms
+            if now == self._last_ms:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    # Sequence exhausted for this millisecond; borrow the next one
+                    now = self._last_ms + 1
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return (now << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+    def next_id(self):
+        return f"{self.prefix}{_base36(self.next_value(), 13)}"
+
+class BlockSequenceAllocator:
+    """Database-backed sequence handed out from per-process blocks.
+
+    Reservations run on their own connection and commit immediately, so a
+    block is never returned to the pool by a rolled-back request; gaps are
+    possible, duplicates are not. Call ``next_id`` before the request starts
+    writing so the reservation does not wait on the request's own SQLite lock.
+    """
+
+    def __init__(self, name, prefix, block_size=100, width=8):
+        self.name = name
+        self.prefix = prefix
+        self.block_size = block_size
+        self.width = width
+        self._lock = threading.Lock()
+        self._next = 0
+        self._limit = 0
+
+    def _reserve_block(self):
+        table = IdSequence.__table__
+        while True:
+            try:
+                with db.engine.begin() as connection:
+                    result = connection.execute(
+                        update(table)
+                        .where(table.c.name == self.name)
+                        .values(next_value=table.c.next_value + self.block_size, updated_at=datetime.utcnow())
+                    )
+                    if result.rowcount == 0:
+                        connection.execute(insert(table).values(
+                            name=self.name,
+                            next_value=1 + self.block_size,
+                            updated_at=datetime.utcnow()
+                        ))
+                        return 1
+                    limit = connection.execute(
+                        select(table.c.next_value).where(table.c.name == self.name)
+                    ).scalar_one()
+                    return limit - self.block_size
+            except IntegrityError:
+                # Another process created the sequence row first; reserve from it
+                continue
+
+    def next_value(self):
+        with self._lock:
+            if self._next >= self._limit:
+                self._next = self._reserve_block()
+                self._limit = self._next + self.block_size
+            value = self._next
+            self._next += 1
+            return value
+
+    def next_id(self):
+        return f"{self.prefix}{datetime.utcnow().strftime('%Y%m%d')}{self.next_value():0{self.width}d}"
+
+ID_PREFIXES = {
+    'order': 'GV',
+    'ticket': 'TKT',
+}
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+def build_allocator(kind, strategy='time', **options):
+    """Create an allocator for ``kind`` ('order' or 'ticket')"""
+    prefix = ID_PREFIXES[kind]
+    if strategy == 'time':
+        return TimeOrderedAllocator(prefix, **options)
+    if strategy == 'block':
+        return BlockSequenceAllocator(kind, prefix, **options)
+    raise ValueError(f"Unknown id allocator strategy: {strategy}")
+
+def configure_id_allocators(app):
+    """Install allocators from the app's ID_ALLOCATOR / ID_BLOCK_SIZE settings"""
+    strategy = app.config.get('ID_ALLOCATOR', 'time')
+    options = {}
+    if strategy == 'time':
+        options['pid_fallback'] = app.config.get('ID_PID_WORKER_FALLBACK', True)
+        # Fail at startup rather than on the first order
+        default_worker_id(options['pid_fallback'])
+    elif strategy == 'block':
+        options['block_size'] = app.config.get('ID_BLOCK_SIZE', 100)
+    with _allocators_lock:
+        for kind in ID_PREFIXES:
+            _allocators[kind] = build_allocator(kind, strategy, **options)
+
+def get_allocator(kind):
+    with _allocators_lock:
+        allocator = _allocators.get(kind)
+        if allocator is None:
+            allocator = _allocators[kind] = build_allocator(kind)
+        return allocator
+
+def next_order_number():
+    return get_allocator('order').next_id()
+
+def next_ticket_number():
+    return get_allocator('ticket').next_id()
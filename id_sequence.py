@@ -0,0 +1,18 @@
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+from src.models.user import db
+
+class IdSequence(db.Model):
+    name = db.Column(db.String(50), primary_key=True)  # 'order', 'ticket'
+    next_value = db.Column(db.BigInteger, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<IdSequence {self.name}={self.next_value}>'
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'next_value': self.next_value,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,203 @@
+"""
+Idempotency keys for write endpoints.
+
+A client that times out and retries process-payment, refund, create-order
+or checkout must not cause a second payment, refund or order. Clients send an
+``Idempotency-Key`` header (any unique string, e.g. a UUID, up to 255
+characters). The ``idempotent`` decorator handles it as follows:
+
+* The first request with a key reserves it in the IdempotencyRecord table
+  and runs the view. Its response is stored for IDEMPOTENCY_TTL seconds.
+* Later requests with the same key, from the same user, to the same endpoint
+  get the stored response back (``Idempotent-Replayed: true``) without
+  running the view again. If the body differs, the answer is 422.
+* A duplicate that arrives while the first request is still running waits
+  for it, up to IDEMPOTENCY_WAIT seconds, and then returns the same response.
+  This is request coalescing. Waiters in the same process are woken by an
+  event; other processes poll the record. If the first request takes longer
+  than that, the duplicate gets 409 with Retry-After.
+
+Responses that are worth retrying (5xx, 409, 429, 503) are not stored, so
+the key is released and the retry runs for real. A reservation whose request
+died is taken over once IDEMPOTENCY_LOCK_TIMEOUT has passed. Expired records
+are purged opportunistically. Requests without the header behave as before.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import Response, current_app, jsonify, make_response, request, session
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.models.user import db
+from src.models.idempotency_record import IdempotencyRecord
+
+MAX_KEY_LENGTH = 255
+RETRYABLE_STATUSES = frozenset((409, 429, 503))
+REPLAYED_HEADERS = ('Location', 'Retry-After')
+
+class IdempotencyStore:
+    """Reserve, wait for, store and replay responses keyed by (scope, key)"""
+
+    def __init__(self, purge_interval=60):
+        self.purge_interval = purge_interval
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._last_purge = 0.0
+        self.replays = 0
+        self.coalesced = 0
+
+    @property
+    def table(self):
+        return IdempotencyRecord.__table__
+
+    def _find(self, scope, key):
+        with db.engine.connect() as connection:
+            return connection.execute(
+                select(self.table).where(self.table.c.scope == scope, self.table.c.key == key)
+            ).first()
+
+    def _reserve(self, scope, key, fingerprint, lock_timeout):
+        """Insert an in-progress record; returns None if reserved, else the existing row"""
+        while True:
+            now = datetime.utcnow()
+            try:
+                with db.engine.begin() as connection:
+                    # Expired results and abandoned reservations can be taken over
+                    connection.execute(delete(self.table).where(
+                        self.table.c.scope == scope,
+                        self.table.c.key == key,
+                        self.table.c.expires_at < now,
+                    ))
+                    connection.execute(insert(self.table).values(
+                        scope=scope, key=key, fingerprint=fingerprint, status='in_progress',
+                        created_at=now, expires_at=now + timedelta(seconds=lock_timeout),
+                    ))
+                return None
+            except IntegrityError:
+                row = self._find(scope, key)
+                if row is not None:
+                    return row
+                # The holder released the key in between: try to reserve it again
+
+    def _release(self, scope, key):
+        with db.engine.begin() as connection:
+            connection.execute(delete(self.table).where(
+                self.table.c.scope == scope,
+                self.table.c.key == key,
+                self.table.c.status == 'in_progress',
+            ))
+
+    def _store(self, scope, key, response, ttl):
+        headers = {name: response.headers[name] for name in REPLAYED_HEADERS if name in response.headers}
+        with db.engine.begin() as connection:
+            connection.execute(update(self.table).where(
+                self.table.c.scope == scope, self.table.c.key == key
+            ).values(
+                status='completed',
+                response_status=response.status_code,
+                response_body=response.get_data(),
+                response_headers=json.dumps({'Content-Type': response.content_type, **headers}),
+                expires_at=datetime.utcnow() + timedelta(seconds=ttl),
+            ))
+
+    def _replay(self, row):
+        self.replays += 1
+        headers = json.loads(row.response_headers or '{}')
+        response = Response(row.response_body, status=row.response_status, content_type=headers.pop('Content-Type', None))
+        response.headers.update(headers)
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
+
+    def purge_expired(self):
+        """Delete expired records; returns the number removed"""
+        with db.engine.begin() as connection:
+            result = connection.execute(delete(self.table).where(self.table.c.expires_at < datetime.utcnow()))
+        return result.rowcount
+
+    def _maybe_purge(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_purge < self.purge_interval:
+                return
+            self._last_purge = now
+        self.purge_expired()
+
+    def run(self, scope, key, fingerprint, view, ttl=86400, wait=10, lock_timeout=60):
+        """Run ``view`` at most once per (scope, key); returns a response"""
+        self._maybe_purge()
+        deadline = time.monotonic() + wait
+        while True:
+            row = self._reserve(scope, key, fingerprint, lock_timeout)
+            if row is None:
+                return self._execute(scope, key, view, ttl)
+            if row.fingerprint != fingerprint:
+                return jsonify({'error': 'Idempotency-Key was already used with a different request'}), 422
+            if row.status == 'completed':
+                return self._replay(row)
+
+            # Another request holds the key: wait for it to finish
+            self.coalesced += 1
+            with self._lock:
+                event = self._in_flight.get((scope, key))
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return jsonify({'error': 'A request with this Idempotency-Key is still being processed'}), 409, {'Retry-After': '1'}
+            if event is not None:
+                event.wait(remaining)
+            else:
+                time.sleep(min(0.05, remaining))
+
+    def _execute(self, scope, key, view, ttl):
+        event = threading.Event()
+        with self._lock:
+            self._in_flight[(scope, key)] = event
+        stored = False
+        try:
+            response = make_response(view())
+            if response.status_code < 500 and response.status_code not in RETRYABLE_STATUSES and not response.is_streamed:
+                self._store(scope, key, response, ttl)
+                stored = True
+            return response
+        finally:
+            if not stored:
+                self._release(scope, key)
+            with self._lock:
+                self._in_flight.pop((scope, key), None)
+            event.set()
+
+idempotency_store = IdempotencyStore()
+
+def request_fingerprint():
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.full_path.encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+def idempotent(view):
+    """Decorator making a write view safe to retry with an Idempotency-Key header"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters'}), 400
+
+        scope = f"{session.get('user_id', 'anonymous')} {request.method} {request.path}"
+        return idempotency_store.run(
+            scope,
+            key,
+            request_fingerprint(),
+            lambda: view(*args, **kwargs),
+            ttl=current_app.config.get('IDEMPOTENCY_TTL', 86400),
+            wait=current_app.config.get('IDEMPOTENCY_WAIT', 10),
+            lock_timeout=current_app.config.get('IDEMPOTENCY_LOCK_TIMEOUT', 60),
+        )
+    return wrapper
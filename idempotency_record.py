@@ -0,0 +1,34 @@
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+from src.models.user import db
+
+class IdempotencyRecord(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(300), nullable=False)  # "<user> <METHOD> <path>"
+    key = db.Column(db.String(255), nullable=False)  # Idempotency-Key header
+    fingerprint = db.Column(db.String(64), nullable=False)  # SHA-256 of the request body
+    status = db.Column(db.String(20), nullable=False, default='in_progress')  # in_progress, completed
+    response_status = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.LargeBinary, nullable=True)
+    response_headers = db.Column(db.Text, nullable=True)  # JSON object
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'key', name='uq_idempotency_scope_key'),
+        db.Index('ix_idempotency_expires_at', 'expires_at'),
+    )
+
+    def __repr__(self):
+        return f'<IdempotencyRecord {self.key} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'scope': self.scope,
+            'key': self.key,
+            'status': self.status,
+            'response_status': self.response_status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Import Product Keys Script
+This script bulk-loads Steam keys or OTT account details from a supplier file
+into the GameVault key inventory.
+
+Usage:
+    python import-keys.py steam_key keys.txt --product "Cyberpunk 2077"
+    python import-keys.py ott_service netflix.csv
+"""
+
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from src.models.user import db
+from src.models.order import Order
+from src.models.product_key import ProductKey
+from src.config import get_config
+from src.database import init_database
+from src.key_inventory import load_supplier_file, stock_levels
+
+def import_keys():
+    """Load a supplier file into the key inventory"""
+    parser = argparse.ArgumentParser(description='Bulk-load product keys from a supplier file')
+    parser.add_argument('product_type', choices=['steam_key', 'ott_service'])
+    parser.add_argument('path', help='CSV with key[,product_name] columns, or one key per line')
+    parser.add_argument('--product', help='Product name (required for plain-text files)')
+    parser.add_argument('--batch', help='Batch reference (defaults to the file name)')
+    args = parser.parse_args()
+
+    # Configure Flask app
+    app = Flask(__name__)
+    app.config.from_object(get_config())
+    init_database(app)
+
+    with app.app_context():
+        db.create_all()
+
+        inserted = load_supplier_file(args.path, args.product_type, args.product, args.batch)
+        print(f"✅ Imported {inserted} keys from {args.path}")
+
+        print("\n📦 Available stock:")
+        for product_name, available in sorted(stock_levels().items()):
+            print(f"  {product_name}: {available}")
+
+if __name__ == "__main__":
+    import_keys()
@@ -0,0 +1,272 @@
+"""
+Product key inventory.
+
+Keys are bought from suppliers ahead of time and bulk-loaded into the
+ProductKey table. Checkout claims a pre-loaded key instead of building one
+inside the payment transaction: each process keeps a small in-memory queue of
+available key ids per product, so a claim is a pop from that queue plus one
+conditional UPDATE on the primary key. A background watcher tops the queues
+up and reports products that are running low on stock.
+"""
+
+import csv
+import logging
+import random
+import threading
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+
+from src.models.user import db
+from src.models.product_key import ProductKey
+
+logger = logging.getLogger(__name__)
+
+KEYED_PRODUCT_TYPES = ('steam_key', 'ott_service')
+SUBSCRIPTION_ACTIVATION_MESSAGE = "Subscription activated successfully"
+
+class OutOfStock(Exception):
+    """Raised when no available key is left for a product"""
+
+    def __init__(self, product_name):
+        super().__init__(f"{product_name} is out of stock")
+        self.product_name = product_name
+
+def _read_supplier_file(path, product_name):
+    """Yield (product_name, key_value) pairs from a supplier file.
+
+    CSV files need a ``key`` column and may carry a ``product_name`` column;
+    any other file is read as one key per line for ``product_name``.
+    """
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as handle:
+            for row in csv.DictReader(handle):
+                name = (row.get('product_name') or product_name or '').strip()
+                key_value = (row.get('key') or '').strip()
+                if name and key_value:
+                    yield name, key_value
+    else:
+        if not product_name:
+            raise ValueError("product_name is required for plain-text key files")
+        with open(path, encoding='utf-8') as handle:
+            for line in handle:
+                key_value = line.strip()
+                if key_value:
+                    yield product_name, key_value
+
+def load_supplier_file(path, product_type, product_name=None, batch_reference=None, chunk_size=1000):
+    """Bulk-load keys from a supplier file, skipping keys already in stock.
+
+    Returns the number of keys inserted.
+    """
+    batch_reference = batch_reference or path.rsplit('/', 1)[-1]
+    inserted = 0
+    seen = set()
+    chunk = []
+
+    def flush(rows):
+        names = {name for name, _ in rows}
+        existing = set(db.session.execute(
+            select(ProductKey.product_name, ProductKey.key_value).where(
+                ProductKey.product_name.in_(names),
+                ProductKey.key_value.in_([key_value for _, key_value in rows])
+            )
+        ).all())
+        new_rows = [
+            {
+                'product_type': product_type,
+                'product_name': name,
+                'key_value': key_value,
+                'status': 'available',
+                'batch_reference': batch_reference,
+                'created_at': datetime.utcnow()
+            }
+            for name, key_value in rows if (name, key_value) not in existing
+        ]
+        if new_rows:
+            db.session.execute(ProductKey.__table__.insert(), new_rows)
+        return len(new_rows)
+
+    for pair in _read_supplier_file(path, product_name):
+        if pair in seen:
+            continue
+        seen.add(pair)
+        chunk.append(pair)
+        if len(chunk) >= chunk_size:
+            inserted += flush(chunk)
+            chunk = []
+    if chunk:
+        inserted += flush(chunk)
+
+    db.session.commit()
+    return inserted
+
+def stock_levels():
+    """Return {product_name: available_count} for every product with stock rows"""
+    rows = db.session.execute(
+        select(ProductKey.product_name, func.count(ProductKey.id))
+        .where(ProductKey.status == 'available')
+        .group_by(ProductKey.product_name)
+    ).all()
+    return dict(rows)
+
+class KeyReservationPool:
+    """Per-process queue of available key ids, refilled in batches.
+
+    Several workers may cache the same ids; the conditional UPDATE in
+    ``claim`` makes sure each key is sold once, and a worker that loses the
+    race simply moves on to the next id. Batches are shuffled to keep those
+    collisions rare.
+    """
+
+    def __init__(self, batch_size=50, low_watermark=10, max_refills=3):
+        self.batch_size = batch_size
+        self.low_watermark = low_watermark
+        self.max_refills = max_refills
+        self._lock = threading.Lock()
+        self._queues = {}
+
+    def _fetch_batch(self, product_name):
+        rows = db.session.execute(
+            select(ProductKey.id, ProductKey.key_value)
+            .where(ProductKey.product_name == product_name, ProductKey.status == 'available')
+            .order_by(ProductKey.id)
+            .limit(self.batch_size)
+        ).all()
+        rows = [tuple(row) for row in rows]
+        random.shuffle(rows)
+        return rows
+
+    def refill(self, product_name, force=False):
+        """Top up the queue for a product; returns the queue length"""
+        with self._lock:
+            queue = self._queues.setdefault(product_name, deque())
+            if not force and len(queue) > self.low_watermark:
+                return len(queue)
+            queued = {key_id for key_id, _ in queue}
+        batch = [row for row in self._fetch_batch(product_name) if row[0] not in queued]
+        with self._lock:
+            queue = self._queues.setdefault(product_name, deque())
+            queue.extend(batch)
+            return len(queue)
+
+    def queued(self, product_name):
+        with self._lock:
+            return len(self._queues.get(product_name, ()))
+
+    def _pop(self, product_name):
+        with self._lock:
+            queue = self._queues.get(product_name)
+            if queue:
+                return queue.popleft()
+        return None
+
+    def claim(self, product_name, order_id):
+        """Mark one available key as sold to ``order_id`` and return its value.
+
+        The UPDATE runs on the current session, so the claim commits or rolls
+        back together with the payment.
+        """
+        return self.claim_entry(product_name, order_id)[1]
+
+    def claim_entry(self, product_name, order_id=None):
+        """Like ``claim`` but returns (key_id, key_value); ``order_id`` may be set later"""
+        refills = 0
+        while True:
+            entry = self._pop(product_name)
+            if entry is None:
+                if refills >= self.max_refills or not self.refill(product_name, force=True):
+                    raise OutOfStock(product_name)
+                refills += 1
+                continue
+
+            key_id, key_value = entry
+            result = db.session.execute(
+                update(ProductKey)
+                .where(ProductKey.id == key_id, ProductKey.status == 'available')
+                .values(status='sold', order_id=order_id, sold_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                return key_id, key_value
+            # Sold by another worker since it was queued; try the next one
+
+    def clear(self):
+        with self._lock:
+            self._queues.clear()
+
+key_pool = KeyReservationPool()
+
+def claim_product_key(product_type, product_name, order_id):
+    """Return the key or account details to deliver for an order"""
+    if product_type not in KEYED_PRODUCT_TYPES:
+        return SUBSCRIPTION_ACTIVATION_MESSAGE
+    return key_pool.claim(product_name, order_id)
+
+def reserve_product_key(product_type, product_name):
+    """Claim a key before its order exists; returns (key_id, value).
+
+    ``key_id`` is None for products without keys. Link the keys to their
+    orders with ``assign_product_keys`` in the same transaction.
+    """
+    if product_type not in KEYED_PRODUCT_TYPES:
+        return None, SUBSCRIPTION_ACTIVATION_MESSAGE
+    return key_pool.claim_entry(product_name)
+
+def assign_product_keys(assignments):
+    """Set ProductKey.order_id for {key_id: order_id} in one executemany"""
+    if assignments:
+        db.session.execute(update(ProductKey), [
+            {'id': key_id, 'order_id': order_id} for key_id, order_id in assignments.items()
+        ])
+
+class LowStockWatcher(threading.Thread):
+    """Background thread that refills the reservation pool and warns on low stock.
+
+    ``on_low_stock(product_name, available)`` is called for every product
+    whose available count is at or below ``threshold``; use it to trigger a
+    supplier reorder or an alert.
+    """
+
+    def __init__(self, app, pool=None, interval=60, threshold=25, on_low_stock=None):
+        super().__init__(name='low-stock-watcher', daemon=True)
+        self.app = app
+        self.pool = pool or key_pool
+        self.interval = interval
+        self.threshold = threshold
+        self.on_low_stock = on_low_stock
+        self._stopped = threading.Event()
+
+    def check(self):
+        """Run one refill/low-stock pass; returns the stock levels seen"""
+        with self.app.app_context():
+            try:
+                levels = stock_levels()
+                for product_name, available in levels.items():
+                    self.pool.refill(product_name)
+                    if available <= self.threshold:
+                        logger.warning("Low stock for %s: %d keys left", product_name, available)
+                        if self.on_low_stock:
+                            self.on_low_stock(product_name, available)
+                return levels
+            finally:
+                db.session.remove()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Low-stock check failed")
+
+    def stop(self):
+        self._stopped.set()
+
+def start_low_stock_watcher(app, **kwargs):
+    """Start the watcher using the app's KEY_STOCK_* settings"""
+    kwargs.setdefault('interval', app.config.get('KEY_STOCK_WATCHER_INTERVAL', 60))
+    kwargs.setdefault('threshold', app.config.get('KEY_STOCK_LOW_THRESHOLD', 25))
+    watcher = LowStockWatcher(app, **kwargs)
+    watcher.start()
+    return watcher
@@ -3,66 +3,157 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
-from src.models.user import db
-from src.models.order import Order
-from src.models.payment import Payment
-from src.models.support import SupportTicket, SupportMessage
-from src.models.payment_config import PaymentConfig, PayoutRecord
-from src.routes.user import user_bp
-from src.routes.auth import auth_bp
-from src.routes.orders import orders_bp
-from src.routes.support import support_bp
-from src.routes.payment_config import payment_config_bp
-
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-
-# Register blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(auth_bp, url_prefix='/api')
-app.register_blueprint(orders_bp, url_prefix='/api')
-app.register_blueprint(support_bp, url_prefix='/api')
-app.register_blueprint(payment_config_bp, url_prefix='/api')
-
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-
-# Create all tables
-with app.app_context():
-    db.create_all()
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
+from importlib import import_module
+
+from flask import Flask
+
+# Importing this module only defines the factory. Models, blueprints and the
+# background services are imported by create_app(), and the schema is left to
+# migrate-db.py / `flask init-db` unless AUTO_BOOTSTRAP_SCHEMA is set.
+BLUEPRINTS = (
+    ('src.routes.user', 'user_bp'),
+    ('src.routes.auth', 'auth_bp'),
+    ('src.routes.orders', 'orders_bp'),
+    ('src.routes.support', 'support_bp'),
+    ('src.routes.payment_config', 'payment_config_bp'),
+    ('src.routes.exports', 'exports_bp'),
+    ('src.routes.tickets', 'tickets_bp'),
+)
+
+def create_app(config_name=None, overrides=None):
+    """Build the API server (e.g. ``gunicorn 'src.main:create_app()'``)"""
+    from src.config import get_config
+    from src.database import init_database
+    from src.migrations import bootstrap_schema, load_models
+
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config.from_object(get_config(config_name))
+    app.config.update(overrides or {})
+
+    # Every model first, so relationships between them resolve
+    load_models()
+
+    # Register blueprints
+    for module_name, blueprint_name in BLUEPRINTS:
+        app.register_blueprint(getattr(import_module(module_name), blueprint_name), url_prefix='/api')
+    register_core_routes(app)
+
+    # Database configuration (DATABASE_URL / GAMEVAULT_DB_PROFILE)
+    init_database(app)
+
+    # Only for in-memory test databases by default; deploys run migrate-db.py
+    if app.config['AUTO_BOOTSTRAP_SCHEMA']:
+        with app.app_context():
+            bootstrap_schema()
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create missing tables and apply pending migrations"""
+        applied = bootstrap_schema()
+        print(f"Applied migrations: {', '.join(f'{version:03d}' for version in applied) or 'none'}")
+
+    configure_services(app)
+    return app
+
+def configure_services(app):
+    from src.key_inventory import start_low_stock_watcher
+    from src.id_allocator import configure_id_allocators
+    from src.user_cache import configure_user_cache
+    from src.payment_config_cache import configure_payment_config_cache
+    from src.ticket_events import configure_ticket_events
+    from src.http_cache import configure_http_cache
+    from src.static_assets import configure_static_assets
+    from src.password_hashing import configure_password_hasher
+    from src.settlement import configure_settlement, start_settlement_workers
+    from src import support_stats  # keeps SupportStatCounter in sync with ticket writes
+
+    # Order and ticket number allocation
+    configure_id_allocators(app)
+
+    # Session user cache
+    configure_user_cache(app)
+
+    # Active payment method cache
+    configure_payment_config_cache(app)
+
+    # Live ticket event streams
+    configure_ticket_events(app)
+
+    # ETags and cached read responses
+    configure_http_cache(app)
+
+    # Static asset manifest (see build-assets.py)
+    configure_static_assets(app)
+
+    # Password hashing pool
+    configure_password_hasher(app)
+
+    # Asynchronous payment settlement
+    configure_settlement(app)
+    if app.config['SETTLEMENT_WORKERS'] > 0:
+        start_settlement_workers(app)
+
+    # Product key inventory
+    if app.config['KEY_STOCK_WATCHER_INTERVAL'] > 0:
+        start_low_stock_watcher(app)
+
+def register_core_routes(app):
+    from src.user_cache import user_cache
+    from src.payment_config_cache import payment_config_cache
+    from src.ticket_events import ticket_events
+    from src.http_cache import response_cache
+    from src.static_assets import send_asset, static_assets
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        if app.static_folder is None:
             return "Static folder not configured", 404
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
+        # Existing files, else index.html for SPA routes, from the startup manifest
+        asset = static_assets.resolve(path)
+        if asset is None:
             return "index.html not found", 404
+        return send_asset(asset)
+
+    # API health check
+    @app.route('/api/health', methods=['GET'])
+    def health_check():
+        return {
+            'status': 'healthy',
+            'message': 'GameVault API is running',
+            'user_cache': user_cache.stats(),
+            'payment_config_cache': payment_config_cache.stats(),
+            'ticket_events': ticket_events.stats(),
+            'response_cache': response_cache.stats(),
+            'static_assets': static_assets.stats()
+        }, 200
+
+    # Admin routes
+    @app.route('/admin')
+    def admin_redirect():
+        return admin_page()
+
+    @app.route('/admin/payments')
+    def admin_payments():
+        return admin_page()
 
-# API health check
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    return {'status': 'healthy', 'message': 'GameVault API is running'}, 200
+    def admin_page():
+        asset = static_assets.lookup('admin-payment-setup.html')
+        if asset is None:
+            return "admin-payment-setup.html not found", 404
+        return send_asset(asset)
 
-# Admin routes
-@app.route('/admin')
-def admin_redirect():
-    return send_from_directory(app.static_folder, 'admin-payment-setup.html')
+_app = None
 
-@app.route('/admin/payments')
-def admin_payments():
-    return send_from_directory(app.static_folder, 'admin-payment-setup.html')
+def __getattr__(name):
+    # ``src.main:app`` keeps working; the app is built on first access
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    create_app().run(host='0.0.0.0', port=5001, debug=True)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script
+This script brings an existing GameVault database up to date: it creates any
+missing tables and applies pending schema migrations (new indexes, columns).
+Run it on every deploy; the production API server does not change the schema.
+
+Usage:
+    python migrate-db.py            # apply pending migrations
+    python migrate-db.py --status   # list pending migrations only
+"""
+
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from src.config import get_config
+from src.database import init_database
+from src.migrations import bootstrap_schema, pending_migrations
+
+def migrate():
+    """Apply pending migrations"""
+    parser = argparse.ArgumentParser(description='Apply GameVault schema migrations')
+    parser.add_argument('--status', action='store_true', help='only list pending migrations')
+    args = parser.parse_args()
+
+    # Configure Flask app
+    app = Flask(__name__)
+    app.config.from_object(get_config())
+    init_database(app)
+
+    with app.app_context():
+        pending = pending_migrations()
+        if args.status:
+            print(f"📋 {len(pending)} pending migration(s)")
+            for version, name, _ in pending:
+                print(f"  {version:03d} {name}")
+            return
+
+        applied = bootstrap_schema()
+        if applied:
+            print(f"✅ Applied migrations: {', '.join(f'{version:03d}' for version in applied)}")
+        else:
+            print("✅ Database is up to date")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,171 @@
+"""
+Schema migrations.
+
+``db.create_all()`` only creates missing tables; it never touches a table
+that already exists, so new indexes and columns declared on the models never
+reach an existing app.db. Migrations fill that gap. Each one is a function
+that receives a connection, is recorded in the ``schema_migrations`` table
+once applied, and is written to be safe on a fresh database as well (which
+create_all has already brought up to date).
+
+Add new migrations to the end of MIGRATIONS; never renumber or edit one that
+has shipped.
+
+The API server does not touch the schema when it starts (except for
+in-memory test databases, see AUTO_BOOTSTRAP_SCHEMA): run
+``bootstrap_schema`` (``python migrate-db.py`` or ``flask init-db``) before
+the first start and on every deploy. A new model module must also be listed in MODEL_MODULES, or
+create_all will not know its table.
+"""
+
+import logging
+from datetime import datetime
+from importlib import import_module
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+
+from src.models.user import db
+from src.support_stats import rebuild_counters
+from src.ticket_search import create_search_index, rebuild_search_index
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', _metadata,
+    Column('version', Integer, primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+MIGRATIONS = []
+
+MODEL_MODULES = (
+    'src.models.user',
+    'src.models.order',
+    'src.models.payment',
+    'src.models.support',
+    'src.models.payment_config',
+    'src.models.product_key',
+    'src.models.id_sequence',
+    'src.models.support_counter',
+    'src.models.settlement_job',
+    'src.models.idempotency_record',
+    'src.models.payout_ledger',
+)
+
+def migration(version, name):
+    """Register a migration function under ``version``"""
+    def register(func):
+        if any(existing[0] == version for existing in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS.append((version, name, func))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return func
+    return register
+
+def create_missing_indexes(connection, *table_names):
+    """Create every index declared on the models for the given tables"""
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    for table_name in table_names:
+        if table_name not in existing_tables:
+            continue
+        table = db.metadata.tables[table_name]
+        existing = {index['name'] for index in inspector.get_indexes(table_name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                logger.info("Creating index %s on %s", index.name, table_name)
+                index.create(connection)
+
+def add_missing_columns(connection, table_name, *column_names):
+    """ALTER TABLE ... ADD COLUMN for model columns the table does not have yet.
+
+    The columns need a server default (or must be nullable) so existing rows get a value.
+    """
+    inspector = inspect(connection)
+    if table_name not in inspector.get_table_names():
+        return
+    existing = {column['name'] for column in inspector.get_columns(table_name)}
+    preparer = connection.dialect.identifier_preparer
+    for name in column_names:
+        if name in existing:
+            continue
+        column = db.metadata.tables[table_name].c[name]
+        ddl = f"ALTER TABLE {preparer.quote(table_name)} ADD COLUMN {preparer.quote(name)} {column.type.compile(connection.dialect)}"
+        if column.server_default is not None:
+            ddl += f" DEFAULT {column.server_default.arg}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+        logger.info("Adding column %s.%s", table_name, name)
+        connection.execute(text(ddl))
+
+@migration(1, 'hot query indexes for orders, payments and support tickets')
+def add_hot_query_indexes(connection):
+    create_missing_indexes(connection, 'order', 'payment', 'support_ticket', 'support_message', 'product_key')
+
+@migration(2, 'backfill materialized support statistics')
+def backfill_support_stats(connection):
+    rebuild_counters(connection)
+
+@migration(3, 'version columns for optimistic concurrency on orders and payments')
+def add_version_columns(connection):
+    add_missing_columns(connection, 'order', 'version')
+    add_missing_columns(connection, 'payment', 'version')
+
+@migration(4, 'payout window index on payments')
+def add_payout_index(connection):
+    create_missing_indexes(connection, 'payment')
+
+@migration(5, 'full-text search index for support tickets and messages')
+def add_ticket_search_index(connection):
+    if create_search_index(connection):
+        rebuild_search_index(connection)
+
+@migration(6, 'support message index for after_id reads')
+def add_message_cursor_index(connection):
+    create_missing_indexes(connection, 'support_message')
+
+@migration(7, 'refund time column for payouts')
+def add_refunded_at(connection):
+    add_missing_columns(connection, 'payment', 'refunded_at')
+    # Best guess for existing refunds: nothing else wrote to them after the refund
+    connection.execute(text(
+        "UPDATE payment SET refunded_at = updated_at WHERE status = 'refunded' AND refunded_at IS NULL"
+    ))
+    create_missing_indexes(connection, 'payment')
+
+def applied_versions(connection):
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+def pending_migrations(engine=None):
+    engine = engine or db.engine
+    with engine.begin() as connection:
+        _metadata.create_all(connection)
+        applied = applied_versions(connection)
+    return [entry for entry in MIGRATIONS if entry[0] not in applied]
+
+def load_models():
+    """Import every model module so that db.metadata has all tables"""
+    for module_name in MODEL_MODULES:
+        import_module(module_name)
+
+def bootstrap_schema():
+    """Create missing tables and apply pending migrations (inside an app context)"""
+    load_models()
+    db.create_all()
+    return upgrade()
+
+def upgrade(engine=None):
+    """Apply pending migrations in order; returns the versions applied"""
+    engine = engine or db.engine
+    applied_now = []
+    for version, name, func in pending_migrations(engine):
+        with engine.begin() as connection:
+            logger.info("Applying migration %03d: %s", version, name)
+            func(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+        applied_now.append(version)
+    return applied_now
@@ -15,9 +15,16 @@ class Order(db.Model):
     payment_method = db.Column(db.String(50), nullable=False)
     payment_status = db.Column(db.String(20), nullable=False, default='pending')
     transaction_id = db.Column(db.String(100), nullable=True)
-    product_key = db.Column(db.String(500), nullable=True)  # For steam keys or account details
+    product_key = db.deferred(db.Column(db.String(500), nullable=True))  # For steam keys or account details; loaded on access
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # Bumped by every status change
+
+    __table_args__ = (
+        db.Index('ix_order_user_created', 'user_id', 'created_at'),
+        db.Index('ix_order_created_at', 'created_at'),
+    )
+    __mapper_args__ = {'version_id_col': version}
 
     # Relationship
     user = db.relationship('User', backref=db.backref('orders', lazy=True))
@@ -41,6 +48,7 @@ class Order(db.Model):
             'transaction_id': self.transaction_id,
             'product_key': self.product_key,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'version': self.version
         }
 
@@ -0,0 +1,91 @@
+"""
+Order and payment state machine.
+
+Status changes used to be plain attribute assignments preceded by a read
+("is the order completed? then refund it"). Two concurrent requests could
+both pass the read, which led to double refunds and a second payment for the
+same order. Every status change now goes through ``transition_order`` or
+``transition_payment``. Each one checks the move against the tables below
+and then issues one conditional UPDATE:
+
+    UPDATE "order" SET status=:new, ..., version=version + 1
+    WHERE id=:id AND status=:old AND payment_status=:old AND version=:version
+
+When it matches no row, somebody else changed the record first. That raises
+``TransitionConflict`` (409), and the caller rolls back its transaction. No
+row is locked and no lock is held while the request thinks. The ``version``
+columns are also the mappers' ``version_id_col``, so ordinary ORM flushes of
+an Order or Payment are checked the same way and raise StaleDataError.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import update
+
+from src.models.user import db
+from src.models.order import Order
+from src.models.payment import Payment
+
+ORDER_STATUS_TRANSITIONS = {
+    'pending': ('completed', 'failed'),
+    'completed': ('refunded',),
+    'failed': (),
+    'refunded': (),
+}
+
+ORDER_PAYMENT_STATUS_TRANSITIONS = {
+    'pending': ('processing', 'completed', 'failed'),
+    'processing': ('completed', 'failed'),
+    'completed': ('refunded',),
+    'failed': (),
+    'refunded': (),
+}
+
+PAYMENT_STATUS_TRANSITIONS = {
+    'pending': ('completed', 'failed'),
+    'completed': ('refunded',),
+    'failed': (),
+    'refunded': (),
+}
+
+class InvalidTransition(ValueError):
+    """Raised for a status change the state machine does not allow"""
+
+class TransitionConflict(Exception):
+    """Raised when the row changed between reading it and updating it"""
+
+def check_transition(transitions, field, current, new):
+    if new != current and new not in transitions.get(current, ()):
+        raise InvalidTransition(f"Cannot change {field} from {current} to {new}")
+
+def _transition(model, obj, state_fields, values):
+    """Conditionally apply ``values`` to ``obj``'s row; expires ``obj`` afterwards"""
+    criteria = [model.id == obj.id, model.version == obj.version]
+    criteria.extend(getattr(model, field) == getattr(obj, field) for field in state_fields)
+    result = db.session.execute(
+        update(model)
+        .where(*criteria)
+        .values(version=model.version + 1, **values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise TransitionConflict(f"{model.__name__} {obj.id} was modified concurrently")
+    db.session.expire(obj)
+
+def transition_order(order, status=None, payment_status=None, **values):
+    """Move ``order`` to a new status and/or payment_status (plus other column ``values``)"""
+    if status is not None:
+        check_transition(ORDER_STATUS_TRANSITIONS, 'order status', order.status, status)
+        values['status'] = status
+    if payment_status is not None:
+        check_transition(ORDER_PAYMENT_STATUS_TRANSITIONS, 'payment status', order.payment_status, payment_status)
+        values['payment_status'] = payment_status
+    _transition(Order, order, ('status', 'payment_status'), values)
+
+def transition_payment(payment, status, **values):
+    """Move ``payment`` to a new status (plus other column ``values``)"""
+    check_transition(PAYMENT_STATUS_TRANSITIONS, 'payment status', payment.status, status)
+    if status == 'refunded':
+        # Payouts count the refund on this day; updated_at moves on every later write
+        values.setdefault('refunded_at', values.get('updated_at') or datetime.utcnow())
+    _transition(Payment, payment, ('status',), dict(values, status=status))
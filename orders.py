@@ -1,7 +1,21 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app, url_for
 from src.models.user import User, db
 from src.models.order import Order
 from src.models.payment import Payment
+from src.models.settlement_job import SettlementJob
+from src.key_inventory import OutOfStock, claim_product_key
+from src.checkout import CheckoutFailed, checkout_cart
+from src.settlement import enqueue_settlement, notify_settlement
+from src.order_states import InvalidTransition, TransitionConflict, transition_order, transition_payment
+from src.id_allocator import next_order_number
+from src.pagination import InvalidCursor, count_cache, cursor_args, cursor_requested, keyset_paginate
+from src.read_replica import read_only
+from src.idempotency import idempotent
+from src.http_cache import make_etag, response_cache
+from src.payment_config_cache import payment_config_cache
+from src.serializers import UnknownField, json_response, order_serializer, requested_fields
+from sqlalchemy import func
+from sqlalchemy.orm.exc import StaleDataError
 import uuid
 import random
 import string
@@ -11,10 +25,10 @@ orders_bp = Blueprint('orders', __name__)
 
 def generate_order_number():
     """Generate a unique order number"""
-    return f"GV{datetime.now().strftime('%Y%m%d')}{random.randint(1000, 9999)}"
+    return next_order_number()
 
 def generate_product_key(product_type, product_name):
-    """Generate a mock product key or account details"""
+    """Generate a mock product key or account details (development fallback only)"""
     if product_type == 'steam_key':
         # Generate a mock Steam key
         key_parts = [''.join(random.choices(string.ascii_uppercase + string.digits, k=5)) for _ in range(3)]
@@ -28,6 +42,7 @@ def generate_product_key(product_type, product_name):
         return "Subscription activated successfully"
 
 @orders_bp.route('/orders', methods=['POST'])
+@idempotent
 def create_order():
     """Create a new order"""
     try:
@@ -38,6 +53,8 @@ def create_order():
         for field in required_fields:
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
+        if not payment_config_cache.accepts(data['payment_method']):
+            return jsonify({'error': f"Payment method not available: {data['payment_method']}"}), 400
         
         # Create new order
         order = Order(
@@ -55,6 +72,8 @@ def create_order():
         
         db.session.add(order)
         db.session.commit()
+        count_cache.invalidate('orders')
+        response_cache.invalidate(('user_orders', order.user_id))
         
         return jsonify(order.to_dict()), 201
         
@@ -63,36 +82,57 @@ def create_order():
         return jsonify({'error': str(e)}), 500
 
 @orders_bp.route('/orders/<int:order_id>/process-payment', methods=['POST'])
+@idempotent
 def process_payment(order_id):
     """Process payment for an order"""
     try:
         order = Order.query.get_or_404(order_id)
         data = request.json
         
+        if settlement_requested(data):
+            return queue_settlement(order, data)
+        
+        if order.payment_status != 'pending':
+            return jsonify({'error': 'Order is not awaiting payment'}), 400
+        
+        # Claim a pre-loaded key from inventory
+        try:
+            product_key = claim_product_key(order.product_type, order.product_name, order.id)
+        except OutOfStock as e:
+            if not current_app.config.get('KEY_INVENTORY_MOCK_FALLBACK', False):
+                db.session.rollback()
+                return jsonify({'error': str(e)}), 409
+            product_key = generate_product_key(order.product_type, order.product_name)
+        
         # Generate transaction ID
         transaction_id = f"txn_{uuid.uuid4().hex[:16]}"
+        now = datetime.utcnow()
+        
+        # Complete the order only if nobody else paid for it in the meantime
+        transition_order(
+            order,
+            status='completed',
+            payment_status='completed',
+            transaction_id=transaction_id,
+            product_key=product_key,
+            updated_at=now
+        )
         
         # Create payment record
         payment = Payment(
-            order_id=order.id,
+            order_id=order_id,
             user_id=order.user_id,
             payment_method=order.payment_method,
             payment_provider=data.get('payment_provider', 'stripe'),
             transaction_id=transaction_id,
             amount=order.product_price,
             status='completed',  # Mock successful payment
-            completed_at=datetime.utcnow()
+            completed_at=now
         )
         
-        # Update order status
-        order.payment_status = 'completed'
-        order.status = 'completed'
-        order.transaction_id = transaction_id
-        order.product_key = generate_product_key(order.product_type, order.product_name)
-        order.updated_at = datetime.utcnow()
-        
         db.session.add(payment)
         db.session.commit()
+        response_cache.invalidate(('order', order.id), ('user_orders', order.user_id))
         
         return jsonify({
             'order': order.to_dict(),
@@ -100,49 +140,222 @@ def process_payment(order_id):
             'message': 'Payment processed successfully'
         }), 200
         
+    except InvalidTransition as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except (TransitionConflict, StaleDataError):
+        db.session.rollback()
+        return jsonify({'error': 'Order was modified by another request, please retry'}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def settlement_requested(data):
+    """Async settlement: PAYMENT_SETTLEMENT_MODE=async, ?mode=async or {"async": true}"""
+    if request.args.get('mode') in ('async', 'sync'):
+        return request.args['mode'] == 'async'
+    if isinstance(data, dict) and 'async' in data:
+        return bool(data['async'])
+    return current_app.config.get('PAYMENT_SETTLEMENT_MODE', 'sync') == 'async'
+
+def settlement_accepted(job, message):
+    status_url = url_for('orders.get_settlement', job_id=job.id)
+    return jsonify({
+        'job': job.to_dict(),
+        'status_url': status_url,
+        'message': message
+    }), 202, {'Location': status_url}
+
+def queue_settlement(order, data):
+    """Enqueue a settlement job for ``order`` and answer 202"""
+    if order.payment_status == 'processing':
+        job = SettlementJob.query.filter_by(order_id=order.id).order_by(SettlementJob.id.desc()).first()
+        if job:
+            return settlement_accepted(job, 'Payment is already being settled')
+    if order.payment_status != 'pending':
+        return jsonify({'error': 'Order is not awaiting payment'}), 400
+    
+    fallback = generate_product_key if current_app.config.get('KEY_INVENTORY_MOCK_FALLBACK', False) else None
+    try:
+        job = enqueue_settlement(
+            order,
+            payment_provider=data.get('payment_provider', 'stripe'),
+            max_attempts=current_app.config.get('SETTLEMENT_MAX_ATTEMPTS', 5),
+            fallback_key=fallback
+        )
+    except OutOfStock as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 409
+    
+    db.session.commit()
+    response_cache.invalidate(('order', order.id), ('user_orders', order.user_id))
+    notify_settlement(job.id)
+    return settlement_accepted(job, 'Payment queued for settlement')
+
+@orders_bp.route('/settlements/<int:job_id>', methods=['GET'])
+def get_settlement(job_id):
+    """Get the status of an asynchronous payment settlement"""
+    try:
+        job = SettlementJob.query.get_or_404(job_id)
+        result = job.to_dict()
+        result['order'] = order_serializer.dump(job.order, order_serializer.view('summary'))
+        result['payment_status'] = job.payment.status
+        if job.status == 'succeeded':
+            result['product_key'] = job.product_key
+        return json_response(result)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@orders_bp.route('/orders/checkout', methods=['POST'])
+@idempotent
+def checkout():
+    """Create and pay for several orders in one transaction"""
+    try:
+        data = request.json
+        
+        # Validate required fields
+        for field in ['user_id', 'payment_method', 'items']:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+        if not isinstance(data['items'], list) or not data['items']:
+            return jsonify({'error': 'items must be a non-empty list'}), 400
+        if not payment_config_cache.accepts(data['payment_method']):
+            return jsonify({'error': f"Payment method not available: {data['payment_method']}"}), 400
+        
+        fallback = generate_product_key if current_app.config.get('KEY_INVENTORY_MOCK_FALLBACK', False) else None
+        order_ids, failures = checkout_cart(
+            data['user_id'],
+            data['items'],
+            data['payment_method'],
+            payment_provider=data.get('payment_provider', 'stripe'),
+            all_or_nothing=bool(data.get('all_or_nothing', False)),
+            fallback_key=fallback
+        )
+        
+        if not order_ids:
+            db.session.rollback()
+            return jsonify({'error': 'No items could be purchased', 'failures': failures}), 409
+        
+        db.session.commit()
+        count_cache.invalidate('orders')
+        response_cache.invalidate(('user_orders', data['user_id']))
+        
+        orders = Order.query.options(db.undefer(Order.product_key)).filter(Order.id.in_(order_ids)).order_by(Order.id).all()
+        payments = Payment.query.options(db.undefer(Payment.gateway_response)).filter(Payment.order_id.in_(order_ids)).order_by(Payment.order_id).all()
+        
+        return jsonify({
+            'orders': [order.to_dict() for order in orders],
+            'payments': [payment.to_dict() for payment in payments],
+            'product_keys': [
+                {'order_id': order.id, 'order_number': order.order_number, 'product_name': order.product_name, 'product_key': order.product_key}
+                for order in orders
+            ],
+            'total_amount': round(sum(payment.amount for payment in payments), 2),
+            'failures': failures,
+            'message': 'Checkout completed' if not failures else 'Checkout completed with failures'
+        }), 201
+        
+    except CheckoutFailed as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'failures': e.failures}), 409
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @orders_bp.route('/orders/user/<int:user_id>', methods=['GET'])
 def get_user_orders(user_id):
-    """Get all orders for a specific user"""
+    """Get orders for a specific user (all of them, or one page with ?limit=/&cursor=; ?view=summary skips product keys)"""
     try:
-        orders = Order.query.filter_by(user_id=user_id).order_by(Order.created_at.desc()).all()
-        return jsonify([order.to_dict() for order in orders]), 200
+        fields = requested_fields(order_serializer)
+        
+        # Any insert or ORM update changes the count, the newest updated_at or the version sum
+        validator = db.session.query(
+            func.count(Order.id), func.max(Order.updated_at), func.coalesce(func.sum(Order.version), 0)
+        ).filter(Order.user_id == user_id).one()
+        etag = make_etag('user_orders', user_id, *validator, request.query_string)
+        
+        def build():
+            query = order_serializer.query(Order.query.filter_by(user_id=user_id), fields, extra=('created_at', 'id'))
+            if cursor_requested() or 'limit' in request.args:
+                cursor, limit = cursor_args()
+                rows, next_cursor = keyset_paginate(query, Order.created_at, Order.id, cursor, limit)
+                return {
+                    'orders': order_serializer.dump_rows(rows, fields),
+                    'next_cursor': next_cursor
+                }
+            rows = query.order_by(Order.created_at.desc()).all()
+            return order_serializer.dump_rows(rows, fields)
+        
+        return response_cache.respond(('user_orders', user_id), etag, build)
+    except (InvalidCursor, UnknownField) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @orders_bp.route('/orders/<int:order_id>', methods=['GET'])
 def get_order(order_id):
-    """Get a specific order"""
+    """Get a specific order (304 while the client's If-None-Match is current)"""
     try:
-        order = Order.query.get_or_404(order_id)
-        return jsonify(order.to_dict()), 200
+        fields = requested_fields(order_serializer)
+        validator = db.session.query(Order.version, Order.updated_at).filter(Order.id == order_id).first()
+        if validator is None:
+            return jsonify({'error': 'Order not found'}), 404
+        etag = make_etag('order', order_id, *validator, fields)
+        
+        def build():
+            query = Order.query
+            if 'product_key' in fields:
+                query = query.options(db.undefer(Order.product_key))
+            return order_serializer.dump(query.get(order_id), fields)
+        
+        return response_cache.respond(('order', order_id), etag, build)
+    except UnknownField as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @orders_bp.route('/orders', methods=['GET'])
+@read_only
 def get_all_orders():
     """Get all orders (admin only)"""
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        fields = requested_fields(order_serializer)
+        query = order_serializer.query(Order.query, fields, extra=('created_at', 'id'))
         
-        orders = Order.query.order_by(Order.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        # Totals are cached briefly instead of counted on every page
+        total = count_cache.get(('orders',), Order.query)
         
-        return jsonify({
-            'orders': [order.to_dict() for order in orders.items],
-            'total': orders.total,
-            'pages': orders.pages,
+        if cursor_requested():
+            cursor, limit = cursor_args()
+            rows, next_cursor = keyset_paginate(query, Order.created_at, Order.id, cursor, limit)
+            return json_response({
+                'orders': order_serializer.dump_rows(rows, fields),
+                'next_cursor': next_cursor,
+                'total': total
+            })
+        
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = max(request.args.get('per_page', 20, type=int), 1)
+        
+        rows = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(per_page).offset((page - 1) * per_page).all()
+        
+        return json_response({
+            'orders': order_serializer.dump_rows(rows, fields),
+            'total': total,
+            'pages': -(-total // per_page),
             'current_page': page
-        }), 200
+        })
+    except (InvalidCursor, UnknownField) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @orders_bp.route('/orders/<int:order_id>/refund', methods=['POST'])
+@idempotent
 def refund_order(order_id):
     """Process a refund for an order"""
     try:
@@ -152,26 +365,37 @@ def refund_order(order_id):
         if order.status != 'completed':
             return jsonify({'error': 'Only completed orders can be refunded'}), 400
         
-        # Update order status
-        order.status = 'refunded'
-        order.updated_at = datetime.utcnow()
+        now = datetime.utcnow()
+        refund_amount = order.product_price
+        
+        # Update order status (fails if another request refunded it first)
+        transition_order(order, status='refunded', payment_status='refunded', updated_at=now)
         
         # Update payment record
-        payment = Payment.query.filter_by(order_id=order.id).first()
+        payment = Payment.query.filter_by(order_id=order_id, status='completed').first()
         if payment:
-            payment.status = 'refunded'
-            payment.refund_amount = order.product_price
-            payment.refund_reason = data.get('reason', 'Customer request')
-            payment.updated_at = datetime.utcnow()
+            transition_payment(
+                payment,
+                'refunded',
+                refund_amount=refund_amount,
+                refund_reason=data.get('reason', 'Customer request'),
+                updated_at=now
+            )
         
         db.session.commit()
+        response_cache.invalidate(('order', order.id), ('user_orders', order.user_id))
         
         return jsonify({
             'order': order.to_dict(),
             'message': 'Refund processed successfully'
         }), 200
         
+    except InvalidTransition as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except (TransitionConflict, StaleDataError):
+        db.session.rollback()
+        return jsonify({'error': 'Order was modified by another request, please retry'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
-
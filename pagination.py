@@ -0,0 +1,98 @@
+"""
+Keyset (cursor) pagination and cached totals for list endpoints.
+
+Offset pagination re-reads and discards every row before the requested page
+and runs a COUNT(*) on each request. Keyset pagination instead continues from
+the last row the client saw, ordered by ``(created_at, id)`` descending, so
+every page costs one indexed range read no matter how deep it is. The cursor
+handed to clients is an opaque token; totals come from a short-lived count
+cache rather than a COUNT(*) per page.
+"""
+
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+
+from flask import request
+from sqlalchemy import tuple_
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor token that cannot be decoded"""
+
+def encode_cursor(created_at, row_id):
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+
+def cursor_requested():
+    """True when the client asked for cursor pagination on this request"""
+    return 'cursor' in request.args or request.args.get('pagination') == 'cursor'
+
+def cursor_args(default_limit=DEFAULT_LIMIT, max_limit=MAX_LIMIT):
+    """Read ``cursor`` and ``limit`` from the query string"""
+    limit = request.args.get('limit', default_limit, type=int)
+    limit = max(1, min(limit, max_limit))
+    token = request.args.get('cursor') or None
+    return (decode_cursor(token) if token else None), limit
+
+def keyset_paginate(query, created_column, id_column, cursor=None, limit=DEFAULT_LIMIT):
+    """Return one page of ``query`` newest-first and the cursor for the next page.
+
+    ``cursor`` is a decoded ``(created_at, id)`` pair or None for the first
+    page; the returned next cursor is None on the last page.
+    """
+    if cursor is not None:
+        query = query.filter(tuple_(created_column, id_column) < tuple_(*cursor))
+    rows = query.order_by(created_column.desc(), id_column.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
+
+class CountCache:
+    """Per-process cache of row counts with a short TTL.
+
+    List totals are for display; being a few seconds stale is fine and saves
+    a full COUNT(*) on every page request.
+    """
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def get(self, key, query):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._counts.get(key)
+            if cached and cached[1] > now:
+                return cached[0]
+        count = query.order_by(None).count()
+        with self._lock:
+            self._counts[key] = (count, now + self.ttl)
+        return count
+
+    def invalidate(self, prefix=None):
+        with self._lock:
+            if prefix is None:
+                self._counts.clear()
+            else:
+                for key in [key for key in self._counts if key[0] == prefix]:
+                    del self._counts[key]
+
+count_cache = CountCache()
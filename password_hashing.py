@@ -0,0 +1,128 @@
+"""
+Password hashing service.
+
+Hashing is deliberately expensive, and running it in the request thread lets a
+burst of logins or sign-ups starve every other endpoint. ``PasswordHasher``
+runs werkzeug's hash and verify functions in a bounded process pool instead.
+At most ``workers + queue_size`` hashes may be in flight; beyond that, or when
+a job waits longer than ``timeout``, ``HasherBusy`` is raised and the auth
+routes answer 503 with a Retry-After header rather than queueing without
+limit.
+
+The algorithm and cost come from PASSWORD_HASH_METHOD, in werkzeug's format
+(``scrypt:32768:8:1``, ``pbkdf2:sha256:600000``). ``needs_rehash`` compares a
+stored hash with the configured method, so that login can upgrade old hashes
+transparently. With ``workers=0`` (the default until ``configure_password_hasher``
+runs, e.g. in create-admin.py) hashing happens inline.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool is saturated"""
+
+    def __init__(self, retry_after=1):
+        super().__init__('Authentication service is busy, please retry shortly')
+        self.retry_after = retry_after
+
+def normalize_method(method):
+    """Expand a werkzeug method name to the full string stored in hashes"""
+    name, _, args = method.partition(':')
+    if name == 'scrypt':
+        n, r, p = (args.split(':') + ['', '', ''])[:3]
+        return f"scrypt:{n or 32768}:{r or 8}:{p or 1}"
+    if name == 'pbkdf2':
+        digest, _, iterations = args.partition(':')
+        return f"pbkdf2:{digest or 'sha256'}:{iterations or DEFAULT_PBKDF2_ITERATIONS}"
+    raise ValueError(f"Unsupported password hash method: {method}")
+
+class PasswordHasher:
+    def __init__(self, method=DEFAULT_METHOD, workers=0, queue_size=None, timeout=10, retry_after=1):
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.configure(method, workers, queue_size, timeout, retry_after)
+
+    def configure(self, method=DEFAULT_METHOD, workers=0, queue_size=None, timeout=10, retry_after=1):
+        self.shutdown()
+        self.method = normalize_method(method)
+        self.workers = workers
+        self.queue_size = queue_size if queue_size is not None else workers * 4
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max(1, workers + self.queue_size))
+
+    def _get_executor(self):
+        # Pools do not survive a fork; each worker process starts its own
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _reject(self):
+        with self._lock:
+            self.rejected += 1
+        return HasherBusy(self.retry_after)
+
+    def _run(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise self._reject()
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # The slot is held until the job really ends, even after we stop waiting
+        # for it, so in-flight work never exceeds workers + queue_size
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise self._reject()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when ``password_hash`` was made with other parameters than the configured method"""
+        return password_hash.split('$', 1)[0] != self.method
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_hasher = PasswordHasher()
+
+def configure_password_hasher(app):
+    """Configure the shared hasher from the PASSWORD_HASH_* settings"""
+    password_hasher.configure(
+        method=app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+        workers=app.config.get('PASSWORD_HASH_WORKERS', 0),
+        queue_size=app.config.get('PASSWORD_HASH_QUEUE_SIZE'),
+        timeout=app.config.get('PASSWORD_HASH_TIMEOUT', 10),
+    )
+    logger.info("Password hashing: %s, %d worker(s)", password_hasher.method, password_hasher.workers)
@@ -12,12 +12,22 @@ class Payment(db.Model):
     amount = db.Column(db.Float, nullable=False)
     currency = db.Column(db.String(3), nullable=False, default='USD')
     status = db.Column(db.String(20), nullable=False, default='pending')  # pending, completed, failed, refunded
-    gateway_response = db.Column(db.Text, nullable=True)
+    gateway_response = db.deferred(db.Column(db.Text, nullable=True))  # Loaded on access
     refund_amount = db.Column(db.Float, nullable=True, default=0.0)
     refund_reason = db.Column(db.String(500), nullable=True)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     completed_at = db.Column(db.DateTime, nullable=True)
+    refunded_at = db.Column(db.DateTime, nullable=True)  # Set once by the refunded transition
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # Bumped by every status change
+
+    __table_args__ = (
+        db.Index('ix_payment_order_id', 'order_id'),
+        db.Index('ix_payment_user_created', 'user_id', 'created_at'),
+        db.Index('ix_payment_status_completed', 'status', 'completed_at'),  # Payout window scans
+        db.Index('ix_payment_status_refunded', 'status', 'refunded_at'),
+    )
+    __mapper_args__ = {'version_id_col': version}
 
     # Relationships
     order = db.relationship('Order', backref=db.backref('payments', lazy=True))
@@ -42,6 +52,8 @@ class Payment(db.Model):
             'refund_reason': self.refund_reason,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'refunded_at': self.refunded_at.isoformat() if self.refunded_at else None,
+            'version': self.version
         }
 
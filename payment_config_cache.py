@@ -0,0 +1,229 @@
+"""
+Payment configuration cache.
+
+Orders, checkout and the payment-config listings all need the PaymentConfig
+rows, and ``PaymentConfig.to_dict()`` re-branches on ``payment_method`` for
+every row on every call. These rows change a few times a month but are read
+on every order. The cache therefore keeps one immutable snapshot per process
+with the views precomputed:
+
+* ``public()``: active configs as customers may see them (``to_dict()``),
+* ``admin()``: every config including credentials (``to_dict(include_sensitive=True)``),
+* ``get(method)`` and ``accepts(method)`` for order validation,
+
+plus ready-encoded JSON for both lists and an ETag for the public one, so
+the public listing can answer If-None-Match with 304. Reads return the
+snapshot without touching the database.
+
+Invalidation is driven by change rather than by a TTL. A commit that inserts,
+updates or deletes a PaymentConfig through the ORM bumps the process's
+version counter and the shared marker. The marker is a file (default) or a
+Redis key (PAYMENT_CONFIG_MARKER=redis://...). Other workers look at the
+marker at most every PAYMENT_CONFIG_CHECK_INTERVAL seconds, which is one
+stat() or GET, and rebuild their snapshot when it has moved. Bulk UPDATE
+statements bypass the ORM and must call ``payment_config_cache.invalidate()``
+themselves.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from src.models.user import db
+from src.models.payment_config import PaymentConfig
+from src.serializers import dumps
+from src.http_cache import make_etag
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+DEFAULT_MARKER_PATH = os.path.join(tempfile.gettempdir(), 'gamevault-payment-config.version')
+
+class FileMarker:
+    """Shared marker on a local filesystem; every bump replaces the file"""
+
+    def __init__(self, path=DEFAULT_MARKER_PATH):
+        self.path = path
+
+    def read(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def bump(self):
+        temporary = f"{self.path}.{os.getpid()}.{threading.get_ident()}"
+        with open(temporary, 'w') as marker:
+            marker.write(str(time.time_ns()))
+        os.replace(temporary, self.path)
+
+class RedisMarker:
+    """Shared marker for workers on several hosts: an INCR counter in Redis"""
+
+    def __init__(self, url, key='gamevault:payment-config:version'):
+        if redis is None:
+            raise RuntimeError("PAYMENT_CONFIG_MARKER is a Redis URL but the redis package is not installed")
+        self.client = redis.Redis.from_url(url)
+        self.key = key
+
+    def read(self):
+        return self.client.get(self.key)
+
+    def bump(self):
+        self.client.incr(self.key)
+
+class PaymentConfigSnapshot:
+    """Precomputed views of all PaymentConfig rows at one version"""
+
+    def __init__(self, configs, version, marker):
+        self.version = version
+        self.marker = marker
+        self.admin = [config.to_dict(include_sensitive=True) for config in configs]
+        self.public = [config.to_dict() for config in configs if config.is_active]
+        self.admin_json = dumps(self.admin)
+        self.public_json = dumps(self.public)
+        # Derived from the content, so every worker hands out the same ETag
+        self.public_etag = make_etag(self.public_json)
+
+        # The newest row wins when a method was configured more than once
+        self.admin_by_method = {data['payment_method']: data for data in self.admin}
+        self.public_by_method = {data['payment_method']: data for data in self.public}
+        self.active_methods = frozenset(self.public_by_method)
+
+class PaymentConfigCache:
+    def __init__(self, marker=None, check_interval=1.0):
+        self.marker = marker
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._snapshot = None
+        self._version = 0
+        self._next_check = 0.0
+        self.hits = 0
+        self.rebuilds = 0
+        self.invalidations = 0
+
+    def _read_marker(self):
+        try:
+            return self.marker.read()
+        except Exception:
+            logger.exception("Payment config marker read failed")
+            return None
+
+    def _is_fresh(self, snapshot):
+        if snapshot is None or snapshot.version != self._version:
+            return False
+        if self.marker is None:
+            return True
+        now = time.monotonic()
+        if now < self._next_check:
+            return True
+        self._next_check = now + self.check_interval
+        return self._read_marker() == snapshot.marker
+
+    def snapshot(self):
+        """Return the current snapshot, rebuilding it after an invalidation"""
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            with self._lock:
+                self.hits += 1
+            return snapshot
+
+        # One thread rebuilds; the others wait for its snapshot
+        with self._rebuild_lock:
+            # Read both versions before loading so a change during the load triggers another rebuild
+            version = self._version
+            marker = self._read_marker() if self.marker is not None else None
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == version and snapshot.marker == marker:
+                return snapshot
+            with Session(db.engine) as session:
+                configs = session.execute(select(PaymentConfig).order_by(PaymentConfig.id)).scalars().all()
+                snapshot = PaymentConfigSnapshot(configs, version, marker)
+            self._snapshot = snapshot
+            self._next_check = time.monotonic() + self.check_interval
+            with self._lock:
+                self.rebuilds += 1
+            return snapshot
+
+    def public(self):
+        return self.snapshot().public
+
+    def admin(self):
+        return self.snapshot().admin
+
+    def get(self, payment_method, include_sensitive=False):
+        """The active (or, for admins, any) config for ``payment_method``, or None"""
+        snapshot = self.snapshot()
+        views = snapshot.admin_by_method if include_sensitive else snapshot.public_by_method
+        return views.get(payment_method)
+
+    def accepts(self, payment_method):
+        """Whether orders may use ``payment_method``.
+
+        Until an admin has configured at least one active method every method
+        is accepted, as before payment configuration existed.
+        """
+        active_methods = self.snapshot().active_methods
+        return not active_methods or payment_method in active_methods
+
+    def invalidate(self):
+        """Drop this process's snapshot and tell the other workers to drop theirs"""
+        with self._lock:
+            self._version += 1
+            self.invalidations += 1
+        if self.marker is not None:
+            try:
+                self.marker.bump()
+            except Exception:
+                logger.exception("Payment config marker bump failed; other workers keep their snapshot")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'rebuilds': self.rebuilds,
+                'invalidations': self.invalidations,
+                'version': self._version,
+                'marker': type(self.marker).__name__ if self.marker else None,
+            }
+
+payment_config_cache = PaymentConfigCache()
+
+def configure_payment_config_cache(app):
+    """Set up the shared marker from PAYMENT_CONFIG_MARKER and PAYMENT_CONFIG_CHECK_INTERVAL"""
+    location = app.config.get('PAYMENT_CONFIG_MARKER', DEFAULT_MARKER_PATH)
+    if not location:
+        payment_config_cache.marker = None
+    elif location.startswith(('redis://', 'rediss://', 'unix://')):
+        payment_config_cache.marker = RedisMarker(location)
+    else:
+        payment_config_cache.marker = FileMarker(location)
+    payment_config_cache.check_interval = app.config.get('PAYMENT_CONFIG_CHECK_INTERVAL', 1.0)
+    payment_config_cache.invalidate()
+
+def _remember_config_change(mapper, connection, target):
+    db.session.info['payment_config_changed'] = True
+
+def _invalidate_after_commit(session):
+    if session.info.pop('payment_config_changed', False):
+        payment_config_cache.invalidate()
+
+def _forget_config_change(session, previous_transaction=None):
+    session.info.pop('payment_config_changed', None)
+
+event.listen(PaymentConfig, 'after_insert', _remember_config_change)
+event.listen(PaymentConfig, 'after_update', _remember_config_change)
+event.listen(PaymentConfig, 'after_delete', _remember_config_change)
+event.listen(db.session, 'after_commit', _invalidate_after_commit)
+event.listen(db.session, 'after_soft_rollback', _forget_config_change)
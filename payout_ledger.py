@@ -0,0 +1,25 @@
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+from src.models.user import db
+
+class PayoutLedger(db.Model):
+    payment_config_id = db.Column(db.Integer, db.ForeignKey('payment_config.id'), primary_key=True)
+    currency = db.Column(db.String(3), primary_key=True, default='USD')
+    carried_balance = db.Column(db.Float, nullable=False, default=0.0)  # Below minimum_payout, paid with a later period
+    processed_until = db.Column(db.DateTime, nullable=True)  # Watermark: payments before this are accounted for
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationship
+    payment_config = db.relationship('PaymentConfig', backref=db.backref('payout_ledgers', lazy=True))
+
+    def __repr__(self):
+        return f'<PayoutLedger {self.payment_config_id} {self.currency}>'
+
+    def to_dict(self):
+        return {
+            'payment_config_id': self.payment_config_id,
+            'currency': self.currency,
+            'carried_balance': self.carried_balance,
+            'processed_until': self.processed_until.isoformat() if self.processed_until else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,231 @@
+"""
+Payout computation.
+
+Turns settled payments into PayoutRecord rows for each active PaymentConfig,
+i.e. for each payment method. A run works in four steps:
+
+1. One grouped SQL statement totals the payments per (payment method,
+   currency, day). It counts sales by ``completed_at`` and refunds by
+   ``refunded_at``, which, unlike ``updated_at``, does not move when the
+   payment row is written again later. Only the window that
+   has not been processed yet is read, so the statement returns a few hundred
+   rows whatever the size of the payment table.
+2. The daily totals are rolled up in Python into each config's
+   ``payout_frequency`` periods (daily, weekly starting on Monday, monthly).
+   Only complete periods are included.
+3. Each period's net (sales minus refunds, less ``commission_percentage``)
+   is added to the balance carried forward in PayoutLedger. Once the balance
+   reaches ``minimum_payout`` it is paid out and resets to zero. Smaller
+   balances, and negative ones caused by refunds, carry over to the next
+   period.
+4. The PayoutRecords are bulk-inserted, and the ledger's watermark
+   (``processed_until``) moves to the end of the last complete period, in
+   the same transaction.
+
+Daily runs (run-payouts.py) therefore only touch the payments added since
+the previous run. A watermark that changed concurrently aborts the run with
+PayoutRunConflict, so two overlapping runs cannot pay the same period twice.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, insert, literal, select, union_all, update
+
+from src.models.user import db
+from src.models.payment import Payment
+from src.models.payment_config import PaymentConfig, PayoutRecord
+from src.models.payout_ledger import PayoutLedger
+
+logger = logging.getLogger(__name__)
+
+PAYOUT_FREQUENCIES = ('daily', 'weekly', 'monthly')
+
+class PayoutRunConflict(Exception):
+    """Raised when another payout run moved a watermark first"""
+
+def period_start(day, frequency):
+    """First day of the payout period containing ``day``"""
+    if frequency == 'daily':
+        return day
+    if frequency == 'weekly':
+        return day - timedelta(days=day.weekday())
+    if frequency == 'monthly':
+        return day.replace(day=1)
+    raise ValueError(f"Unknown payout frequency: {frequency}")
+
+def period_end(start, frequency):
+    """First day after the payout period starting on ``start``"""
+    if frequency == 'daily':
+        return start + timedelta(days=1)
+    if frequency == 'weekly':
+        return start + timedelta(days=7)
+    if frequency == 'monthly':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    raise ValueError(f"Unknown payout frequency: {frequency}")
+
+def _midnight(day):
+    return datetime(day.year, day.month, day.day)
+
+def _as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+def daily_totals(low, high):
+    """Grouped (method, currency, day) -> (sales, refunds, sale count) for [low, high)"""
+    sales = select(
+        Payment.payment_method.label('method'),
+        Payment.currency.label('currency'),
+        func.date(Payment.completed_at).label('day'),
+        Payment.amount.label('sales'),
+        literal(0.0).label('refunds'),
+        literal(1).label('sale'),
+    ).where(
+        Payment.status.in_(('completed', 'refunded')),
+        Payment.completed_at < high,
+    )
+    refunds = select(
+        Payment.payment_method.label('method'),
+        Payment.currency.label('currency'),
+        func.date(Payment.refunded_at).label('day'),
+        literal(0.0).label('sales'),
+        func.coalesce(Payment.refund_amount, Payment.amount).label('refunds'),
+        literal(0).label('sale'),
+    ).where(
+        Payment.status == 'refunded',
+        Payment.refunded_at < high,
+    )
+    if low is not None:
+        sales = sales.where(Payment.completed_at >= low)
+        refunds = refunds.where(Payment.refunded_at >= low)
+
+    combined = union_all(sales, refunds).subquery()
+    statement = select(
+        combined.c.method,
+        combined.c.currency,
+        combined.c.day,
+        func.sum(combined.c.sales),
+        func.sum(combined.c.refunds),
+        func.sum(combined.c.sale),
+    ).group_by(combined.c.method, combined.c.currency, combined.c.day)
+
+    totals = defaultdict(list)
+    for method, currency, day, sales_total, refunds_total, count in db.session.execute(statement):
+        totals[method].append((currency, _as_date(day), sales_total or 0.0, refunds_total or 0.0, count or 0))
+    return totals
+
+def active_configs():
+    """The newest active config per payment method"""
+    configs = {}
+    for config in PaymentConfig.query.filter_by(is_active=True).order_by(PaymentConfig.id):
+        configs[config.payment_method] = config
+    return list(configs.values())
+
+def compute_payouts(now=None, lag=timedelta(minutes=10), dry_run=False):
+    """Create PayoutRecords for every complete, unprocessed period; returns a summary.
+
+    ``lag`` keeps payments completed in the last few minutes (whose
+    transactions may still be committing) out of the window.
+    """
+    cutoff = (now or datetime.utcnow()) - lag
+    configs = active_configs()
+    ledgers = defaultdict(dict)
+    for ledger in PayoutLedger.query.filter(PayoutLedger.payment_config_id.in_([config.id for config in configs])):
+        ledgers[ledger.payment_config_id][ledger.currency] = ledger
+
+    # Each config is processed from its own watermark up to its current period
+    windows = {}
+    for config in configs:
+        watermarks = [ledger.processed_until for ledger in ledgers[config.id].values()]
+        low = max(watermarks) if watermarks and None not in watermarks else None
+        high = _midnight(period_start(cutoff.date(), config.payout_frequency))
+        if low is None or low < high:
+            windows[config.id] = (low, high)
+
+    summary = {'payouts': 0, 'amount': 0.0, 'configs': []}
+    if not windows:
+        return summary
+
+    lows = [low for low, _ in windows.values()]
+    totals = daily_totals(None if None in lows else min(lows), max(high for _, high in windows.values()))
+
+    now = datetime.utcnow()
+    records = []
+    for config in configs:
+        if config.id not in windows:
+            continue
+        low, high = windows[config.id]
+        frequency = config.payout_frequency
+
+        periods = defaultdict(lambda: defaultdict(float))
+        sale_count = 0
+        for currency, day, sales, refunds, count in totals.get(config.payment_method, ()):
+            if (low is None or day >= low.date()) and day < high.date():
+                periods[currency][period_start(day, frequency)] += sales - refunds
+                sale_count += count
+
+        config_summary = {
+            'payment_config_id': config.id,
+            'payment_method': config.payment_method,
+            'sales': sale_count,
+            'payouts': 0,
+            'carried': {},
+        }
+        for currency in set(periods) | set(ledgers[config.id]):
+            ledger = ledgers[config.id].get(currency)
+            balance = ledger.carried_balance if ledger else 0.0
+            for start in sorted(periods.get(currency, ())):
+                balance += periods[currency][start] * (1 - config.commission_percentage / 100.0)
+                if balance >= config.minimum_payout:
+                    records.append({
+                        'payment_config_id': config.id,
+                        'amount': round(balance, 2),
+                        'currency': currency,
+                        'status': 'pending',
+                        'payout_method': config.payment_method,
+                        'period_start': _midnight(start),
+                        'period_end': _midnight(period_end(start, frequency)),
+                        'created_at': now,
+                        'updated_at': now,
+                    })
+                    config_summary['payouts'] += 1
+                    balance = 0.0
+            balance = round(balance, 2)
+            config_summary['carried'][currency] = balance
+            _advance_ledger(config.id, currency, ledger, balance, high, now)
+
+        config_summary['processed_until'] = high.isoformat()
+        summary['configs'].append(config_summary)
+
+    if records:
+        db.session.execute(insert(PayoutRecord), records)
+    summary['payouts'] = len(records)
+    summary['amount'] = round(sum(record['amount'] for record in records), 2)
+
+    if dry_run:
+        db.session.rollback()
+    else:
+        db.session.commit()
+        logger.info("Created %d payout records totalling %.2f", summary['payouts'], summary['amount'])
+    return summary
+
+def _advance_ledger(config_id, currency, ledger, balance, processed_until, now):
+    """Store the carried balance and move the watermark, unless another run moved it first"""
+    if ledger is None:
+        db.session.execute(insert(PayoutLedger).values(
+            payment_config_id=config_id, currency=currency, carried_balance=balance,
+            processed_until=processed_until, updated_at=now,
+        ))
+        return
+    if ledger.processed_until is None:
+        watermark = PayoutLedger.processed_until.is_(None)
+    else:
+        watermark = PayoutLedger.processed_until == ledger.processed_until
+    result = db.session.execute(
+        update(PayoutLedger)
+        .where(PayoutLedger.payment_config_id == config_id, PayoutLedger.currency == currency, watermark)
+        .values(carried_balance=balance, processed_until=processed_until, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise PayoutRunConflict(f"Payout ledger for config {config_id} ({currency}) changed during the run")
@@ -0,0 +1,37 @@
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+from src.models.user import db
+
+class ProductKey(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    product_type = db.Column(db.String(50), nullable=False)  # 'steam_key', 'ott_service'
+    product_name = db.Column(db.String(200), nullable=False)
+    key_value = db.Column(db.String(500), nullable=False)  # Steam key or account details
+    status = db.Column(db.String(20), nullable=False, default='available')  # available, sold, revoked
+    batch_reference = db.Column(db.String(100), nullable=True)  # Supplier file the key was loaded from
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sold_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_product_key_stock', 'product_name', 'status', 'id'),
+        db.UniqueConstraint('product_name', 'key_value', name='uq_product_key_value'),
+    )
+
+    # Relationship
+    order = db.relationship('Order', backref=db.backref('product_keys', lazy=True))
+
+    def __repr__(self):
+        return f'<ProductKey {self.id} {self.product_name}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'product_type': self.product_type,
+            'product_name': self.product_name,
+            'status': self.status,
+            'batch_reference': self.batch_reference,
+            'order_id': self.order_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sold_at': self.sold_at.isoformat() if self.sold_at else None
+        }
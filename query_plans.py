@@ -0,0 +1,119 @@
+"""
+Query plan checks for the hot read paths.
+
+Each entry in HOT_QUERIES builds the same statement an endpoint runs and
+names the index it should use. On SQLite, ``EXPLAIN QUERY PLAN`` is used to
+make sure none of them falls back to a full table scan, a temporary sort or
+a different index, so a dropped or mistyped index fails CI (see
+check-query-plans.py) instead of showing up as latency.
+
+``QueryCounter`` counts the statements a block of code runs. It is used by
+check-query-counts.py to catch N+1 regressions in the same way.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import event, select, tuple_
+
+from src.models.user import db
+from src.models.order import Order
+from src.models.payment import Payment
+from src.models.support import SupportTicket, SupportMessage
+from src.models.product_key import ProductKey
+
+HOT_QUERIES = {
+    'orders by user (get_user_orders)': (
+        lambda: select(Order).where(Order.user_id == 1).order_by(Order.created_at.desc()),
+        'ix_order_user_created'),
+    'recent orders (get_all_orders)': (
+        lambda: select(Order).order_by(Order.created_at.desc()).limit(20),
+        'ix_order_created_at'),
+    'orders after cursor (keyset page)': (
+        lambda: select(Order).where(tuple_(Order.created_at, Order.id) < tuple_(datetime(2025, 1, 1), 1)).order_by(Order.created_at.desc(), Order.id.desc()).limit(21),
+        'ix_order_created_at'),
+    'user orders after cursor (keyset page)': (
+        lambda: select(Order).where(Order.user_id == 1, tuple_(Order.created_at, Order.id) < tuple_(datetime(2025, 1, 1), 1)).order_by(Order.created_at.desc(), Order.id.desc()).limit(21),
+        'ix_order_user_created'),
+    'payment by order (refund_order)': (
+        lambda: select(Payment).where(Payment.order_id == 1),
+        'ix_payment_order_id'),
+    'tickets by status': (
+        lambda: select(SupportTicket).where(SupportTicket.status == 'open').order_by(SupportTicket.created_at.desc()).limit(20),
+        'ix_support_ticket_status_created'),
+    'tickets by category': (
+        lambda: select(SupportTicket).where(SupportTicket.category == 'payment').order_by(SupportTicket.created_at.desc()).limit(20),
+        'ix_support_ticket_category_created'),
+    'tickets by priority': (
+        lambda: select(SupportTicket).where(SupportTicket.priority == 'high').order_by(SupportTicket.created_at.desc()).limit(20),
+        'ix_support_ticket_priority_created'),
+    'tickets by user': (
+        lambda: select(SupportTicket).where(SupportTicket.user_id == 1).order_by(SupportTicket.created_at.desc()),
+        'ix_support_ticket_user_created'),
+    'messages by ticket': (
+        lambda: select(SupportMessage).where(SupportMessage.ticket_id == 1).order_by(SupportMessage.created_at),
+        'ix_support_message_ticket_created'),
+    'messages after id (messages_after)': (
+        lambda: select(SupportMessage).where(SupportMessage.ticket_id == 1, SupportMessage.id > 10).order_by(SupportMessage.id).limit(51),
+        'ix_support_message_ticket_id'),
+    'latest messages (ticket detail)': (
+        lambda: select(SupportMessage).where(SupportMessage.ticket_id == 1).order_by(SupportMessage.id.desc()).limit(51),
+        'ix_support_message_ticket_id'),
+    'available keys (key inventory)': (
+        lambda: select(ProductKey.id).where(ProductKey.product_name == 'x', ProductKey.status == 'available').order_by(ProductKey.id).limit(50),
+        'ix_product_key_stock'),
+}
+
+def explain_query_plan(statement, connection=None):
+    """Return the SQLite query plan details for a statement"""
+    connection = connection or db.session.connection()
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True})
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").all()
+    return [row[-1] for row in rows]
+
+def plan_problems(plan, expected_index=None):
+    """Return the plan lines that indicate a full scan or an unindexed sort"""
+    problems = []
+    for detail in plan:
+        if detail.startswith('SCAN') and 'USING' not in detail:
+            problems.append(detail)
+        elif 'USE TEMP B-TREE' in detail:
+            problems.append(detail)
+    if expected_index and not any(expected_index in detail for detail in plan):
+        problems.append(f"expected {expected_index}, got: {' / '.join(plan)}")
+    return problems
+
+def check_hot_queries(connection=None):
+    """Return {query name: problems} for every hot query with a bad plan"""
+    failures = {}
+    for name, (build, expected_index) in HOT_QUERIES.items():
+        problems = plan_problems(explain_query_plan(build(), connection), expected_index)
+        if problems:
+            failures[name] = problems
+    return failures
+
+class QueryCounter:
+    """Collect the SQL statements run on ``engine`` inside a ``with`` block"""
+
+    def __init__(self, engine=None):
+        self.engine = engine or db.engine
+        self.statements = []
+
+    def _record(self, connection, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def problems(self, budget):
+        """Describe the statements when more than ``budget`` ran, else return None"""
+        if self.count <= budget:
+            return None
+        return f"{self.count} queries (budget {budget}): " + ' | '.join(' '.join(sql.split())[:80] for sql in self.statements)
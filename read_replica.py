@@ -0,0 +1,90 @@
+"""
+Read-replica routing.
+
+When DATABASE_REPLICA_URL is set, the session can send reads to a second
+engine (bind key ``replica``) while every write, and every read that follows
+a write in the same transaction, stays on the primary: flushes, INSERT /
+UPDATE / DELETE statements and anything after them until the transaction
+commits or rolls back. Routing is opt-in per
+endpoint: decorate heavy read-only views such as admin listings and
+statistics with ``@read_only``. Checkout and refund flows never opt in, so
+they always read their own writes.
+
+For a single SQLite file, set DATABASE_REPLICA_URL=readonly to open a
+second, read-only connection pool on the same file; with WAL enabled its
+readers never wait on the checkout writer.
+"""
+
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+REPLICA_BIND = 'replica'
+WROTE_KEY = 'read_replica_wrote'
+
+# Pragmas that need write access are skipped on the read-only connection
+REPLICA_SKIPPED_PRAGMAS = ('journal_mode', 'synchronous')
+
+class RoutingSession(Session):
+    """Session that reads from the replica engine inside ``read_only`` views"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if clause is not None and clause.is_dml:
+            self.info[WROTE_KEY] = True
+        elif bind is None and self._routes_to_replica():
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _routes_to_replica(self):
+        if getattr(self, '_flushing', False) or self.new or self.deleted or self.info.get(WROTE_KEY):
+            return False
+        return has_app_context() and g.get('_use_read_replica', False)
+
+def _mark_written(session, flush_context):
+    session.info[WROTE_KEY] = True
+
+def _reset_after_transaction(session, transaction):
+    # Only the outermost transaction ends the writes; a savepoint keeps them
+    if transaction.parent is None:
+        session.info.pop(WROTE_KEY, None)
+
+event.listen(RoutingSession, 'after_flush', _mark_written)
+event.listen(RoutingSession, 'after_transaction_end', _reset_after_transaction)
+
+@contextmanager
+def use_replica():
+    """Route reads in the enclosed block to the replica, if one is configured"""
+    previous = g.get('_use_read_replica', False)
+    g._use_read_replica = True
+    try:
+        yield
+    finally:
+        g._use_read_replica = previous
+
+def read_only(view):
+    """Decorator for read-only views whose queries may be served by the replica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with use_replica():
+            return view(*args, **kwargs)
+    return wrapper
+
+def replica_uri(primary_uri, replica_setting):
+    """Resolve DATABASE_REPLICA_URL; 'readonly' opens the primary SQLite file read-only"""
+    if replica_setting != 'readonly':
+        return replica_setting
+    url = make_url(primary_uri)
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        raise ValueError("DATABASE_REPLICA_URL=readonly needs a file-based SQLite primary")
+    return f"sqlite:///file:{url.database}?mode=ro&uri=true"
+
+def replica_pragmas(pragmas):
+    replica = {name: value for name, value in pragmas.items() if name not in REPLICA_SKIPPED_PRAGMAS}
+    replica['query_only'] = 'ON'
+    return replica
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Rebuild Support Statistics Script
+This script reconciles the materialized support counters behind /support/stats
+with the ticket table. Run it after bulk imports or from a nightly job.
+"""
+
+import json
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from src.models.user import db
+from src.models.support import SupportTicket, SupportMessage
+from src.models.support_counter import SupportStatCounter
+from src.config import get_config
+from src.database import init_database
+from src.support_stats import get_support_stats, rebuild_support_stats
+
+def rebuild():
+    """Recompute the support counters and show what changed"""
+    app = Flask(__name__)
+    app.config.from_object(get_config())
+    init_database(app)
+
+    with app.app_context():
+        db.create_all()
+        before = get_support_stats()
+        after = rebuild_support_stats()
+
+        print("✅ Support statistics rebuilt")
+        if before != after:
+            print(f"Before: {json.dumps(before)}")
+        print(f"Now:    {json.dumps(after)}")
+
+if __name__ == "__main__":
+    rebuild()
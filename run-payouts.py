@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Payout Run Script
+This script creates PayoutRecords for every active payment config whose
+payout period has ended since the last run. Only payments after each
+config's watermark are read, so it is cheap to run from cron every hour or
+day; running it twice in a row creates nothing the second time.
+
+Usage:
+    python run-payouts.py
+    python run-payouts.py --dry-run
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from src.models.user import db
+from src.models.order import Order
+from src.models.payment import Payment
+from src.models.payment_config import PaymentConfig, PayoutRecord
+from src.models.payout_ledger import PayoutLedger
+from src.config import get_config
+from src.database import init_database
+from src.migrations import upgrade
+from src.payouts import PayoutRunConflict, compute_payouts
+
+def run_payouts():
+    """Compute and store pending payouts"""
+    parser = argparse.ArgumentParser(description='Create payout records for completed payout periods')
+    parser.add_argument('--dry-run', action='store_true', help='compute and print, but store nothing')
+    parser.add_argument('--now', type=datetime.fromisoformat, default=None, help='pretend the run happens at this time (ISO format)')
+    args = parser.parse_args()
+
+    # Configure Flask app (same database settings as the API server)
+    app = Flask(__name__)
+    app.config.from_object(get_config())
+    init_database(app)
+
+    with app.app_context():
+        db.create_all()
+        upgrade()
+
+        try:
+            summary = compute_payouts(
+                now=args.now,
+                lag=timedelta(seconds=app.config['PAYOUT_SETTLE_LAG']),
+                dry_run=args.dry_run
+            )
+        except PayoutRunConflict as e:
+            db.session.rollback()
+            print(f"❌ {e}; another payout run is in progress")
+            sys.exit(1)
+
+    print("💸 Payout run" + (" (dry run, nothing stored)" if args.dry_run else ""))
+    print("=" * 60)
+    for config in summary['configs']:
+        carried = ', '.join(f"{amount:.2f} {currency}" for currency, amount in sorted(config['carried'].items())) or 'nothing'
+        print(f"{config['payment_method']:<10} sales: {config['sales']:>9}  payouts: {config['payouts']:>5}  "
+              f"carried: {carried}  processed until {config['processed_until']}")
+    print("=" * 60)
+    print(f"✅ {summary['payouts']} payout records, {summary['amount']:.2f} in total")
+
+if __name__ == "__main__":
+    run_payouts()
@@ -0,0 +1,173 @@
+"""
+Fast JSON serialization for API responses.
+
+Each model gets a precompiled field plan: the ordered field names its
+``to_dict`` exposes, the mapped columns behind them and which of them are
+datetimes. List endpoints use the plan to select only the requested columns
+straight from the database (``serializer.query(...)``) and turn the plain row
+tuples into dicts, without building ORM objects. Responses are encoded with
+orjson when it is installed and the stdlib encoder otherwise; orjson writes
+datetimes natively, so the per-value ``isoformat()`` call is skipped too.
+
+Clients can trim responses with ``?fields=id,order_number,status`` or pick a
+named projection with ``?view=summary``. Summary views leave out the large
+text columns (product keys, gateway responses, ticket descriptions), which
+the models also defer so that only detail endpoints load them.
+"""
+
+import json
+from datetime import datetime
+
+from flask import Response, request
+from sqlalchemy import DateTime
+
+from src.models.user import User
+from src.models.order import Order
+from src.models.payment import Payment
+from src.models.support import SupportTicket, SupportMessage
+from src.models.payment_config import PayoutRecord
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the deployment
+    orjson = None
+
+class UnknownField(ValueError):
+    """Raised when ``fields=`` names a field the model does not expose"""
+
+if orjson is not None:
+    def dumps(payload):
+        return orjson.dumps(payload)
+else:
+    _encoder = json.JSONEncoder(separators=(',', ':'), default=lambda value: value.isoformat())
+
+    def dumps(payload):
+        return _encoder.encode(payload).encode()
+
+def json_response(payload, status=200):
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+class ModelSerializer:
+    """Field plan for one model, compiled once at import time"""
+
+    def __init__(self, model, field_names, views=None):
+        self.model = model
+        self.field_names = tuple(field_names)
+        self.columns = {name: getattr(model, name) for name in self.field_names}
+        self.datetime_fields = frozenset(
+            name for name, column in self.columns.items()
+            if isinstance(column.type, DateTime)
+        )
+        self.views = {name: self.fields(fields) for name, fields in (views or {}).items()}
+        self.views['detail'] = self.field_names
+
+    def fields(self, requested=None):
+        """Validate a requested field list; None means every field"""
+        if not requested:
+            return self.field_names
+        unknown = [name for name in requested if name not in self.columns]
+        if unknown:
+            raise UnknownField(f"Unknown field(s): {', '.join(unknown)}")
+        return tuple(requested)
+
+    def query(self, query, fields, extra=()):
+        """Restrict ``query`` to the columns for ``fields`` (plus ``extra``)"""
+        names = tuple(fields) + tuple(name for name in extra if name not in fields)
+        return query.with_entities(*(self.columns[name].label(name) for name in names))
+
+    def dump(self, obj, fields=None):
+        """Serialize an ORM instance"""
+        fields = fields or self.field_names
+        return self._convert({name: getattr(obj, name) for name in fields})
+
+    def dump_rows(self, rows, fields):
+        """Serialize row tuples selected with ``query`` for the same fields"""
+        fields = tuple(fields)
+        count = len(fields)
+        items = [dict(zip(fields, row[:count])) for row in rows]
+        if orjson is None:
+            dated = [name for name in fields if name in self.datetime_fields]
+            if dated:
+                for item in items:
+                    for name in dated:
+                        value = item[name]
+                        if value is not None:
+                            item[name] = value.isoformat()
+        return items
+
+    def _convert(self, item):
+        if orjson is None:
+            for name in self.datetime_fields.intersection(item):
+                value = item[name]
+                if isinstance(value, datetime):
+                    item[name] = value.isoformat()
+        return item
+
+    def view(self, name):
+        if name not in self.views:
+            raise UnknownField(f"Unknown view: {name}")
+        return self.views[name]
+
+def requested_fields(serializer, default_view='detail'):
+    """Parse ``?fields=a,b,c`` or ``?view=summary`` for ``serializer``"""
+    raw = request.args.get('fields')
+    if raw:
+        return serializer.fields([name.strip() for name in raw.split(',') if name.strip()])
+    return serializer.view(request.args.get('view', default_view))
+
+user_serializer = ModelSerializer(User, [
+    'id', 'username', 'email', 'first_name', 'last_name', 'phone', 'is_active', 'is_admin',
+    'subscription_plan', 'subscription_expires', 'created_at', 'updated_at'
+])
+
+order_serializer = ModelSerializer(Order, [
+    'id', 'user_id', 'order_number', 'product_type', 'product_name', 'product_price',
+    'original_price', 'discount_percentage', 'status', 'payment_method', 'payment_status',
+    'transaction_id', 'product_key', 'created_at', 'updated_at', 'version'
+], views={
+    'summary': [
+        'id', 'order_number', 'product_type', 'product_name', 'product_price', 'status',
+        'payment_status', 'created_at'
+    ],
+    'export': [
+        'id', 'user_id', 'order_number', 'product_type', 'product_name', 'product_price',
+        'original_price', 'discount_percentage', 'status', 'payment_method', 'payment_status',
+        'transaction_id', 'created_at', 'updated_at'
+    ],
+})
+
+payment_serializer = ModelSerializer(Payment, [
+    'id', 'order_id', 'user_id', 'payment_method', 'payment_provider', 'transaction_id',
+    'amount', 'currency', 'status', 'gateway_response', 'refund_amount', 'refund_reason',
+    'created_at', 'updated_at', 'completed_at', 'refunded_at', 'version'
+], views={
+    'summary': [
+        'id', 'order_id', 'user_id', 'payment_method', 'transaction_id', 'amount', 'currency',
+        'status', 'created_at', 'completed_at'
+    ],
+    'export': [
+        'id', 'order_id', 'user_id', 'payment_method', 'payment_provider', 'transaction_id',
+        'amount', 'currency', 'status', 'refund_amount', 'refund_reason', 'created_at',
+        'updated_at', 'completed_at', 'refunded_at'
+    ],
+})
+
+ticket_serializer = ModelSerializer(SupportTicket, [
+    'id', 'user_id', 'ticket_number', 'subject', 'category', 'priority', 'status',
+    'description', 'order_id', 'assigned_to', 'created_at', 'updated_at', 'resolved_at'
+], views={
+    'summary': [
+        'id', 'user_id', 'ticket_number', 'subject', 'category', 'priority', 'status',
+        'order_id', 'assigned_to', 'created_at', 'updated_at'
+    ],
+})
+
+message_serializer = ModelSerializer(SupportMessage, [
+    'id', 'ticket_id', 'sender_type', 'sender_name', 'message', 'created_at'
+])
+
+payout_serializer = ModelSerializer(PayoutRecord, [
+    'id', 'payment_config_id', 'amount', 'currency', 'status', 'payout_method',
+    'transaction_id', 'payout_date', 'failure_reason', 'period_start', 'period_end',
+    'created_at', 'updated_at'
+])
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Settlement Worker Script
+This script runs payment settlement workers outside the API server. They
+share the database queue with the server, so several of these processes can
+settle jobs side by side (set SETTLEMENT_WORKERS=0 on the API server to leave
+settlement to them entirely).
+
+Usage:
+    python settlement-worker.py --workers 8
+"""
+
+import argparse
+import os
+import signal
+import sys
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from src.models.user import db
+from src.models.order import Order
+from src.models.payment import Payment
+from src.models.product_key import ProductKey
+from src.models.settlement_job import SettlementJob
+from src.config import get_config
+from src.database import init_database
+from src.settlement import DatabaseQueue, SettlementWorkerPool, build_gateway
+
+def run_workers():
+    """Settle queued payments until interrupted"""
+    parser = argparse.ArgumentParser(description='Run payment settlement workers')
+    parser.add_argument('--workers', type=int, default=None, help='worker threads (default: SETTLEMENT_WORKERS)')
+    args = parser.parse_args()
+
+    # Configure Flask app (same database settings as the API server)
+    app = Flask(__name__)
+    app.config.from_object(get_config())
+    init_database(app)
+
+    with app.app_context():
+        db.create_all()
+
+    queue = DatabaseQueue(
+        poll_interval=app.config['SETTLEMENT_POLL_INTERVAL'],
+        lease=app.config['SETTLEMENT_LEASE_SECONDS']
+    )
+    pool = SettlementWorkerPool(
+        app,
+        queue,
+        build_gateway(app.config),
+        workers=args.workers or app.config['SETTLEMENT_WORKERS'] or 1,
+        base_backoff=app.config['SETTLEMENT_BACKOFF'],
+        max_backoff=app.config['SETTLEMENT_MAX_BACKOFF']
+    )
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+
+    pool.start()
+    print(f"🚀 Settling payments with {pool.workers} worker(s); press Ctrl+C to stop")
+    stopped.wait()
+    pool.stop()
+    print(f"✅ Stopped after settling {pool.settled} job(s), {pool.retried} retry(ies)")
+
+if __name__ == "__main__":
+    run_workers()
@@ -0,0 +1,431 @@
+"""
+Asynchronous payment settlement.
+
+In async mode process-payment does only the fast, local part of checkout
+inside the request. It holds a product key for the order, creates a pending
+Payment and a SettlementJob, and returns 202 with a status URL. A pool of
+worker threads then settles the jobs against the payment gateway. The slow,
+flaky gateway call runs outside any database transaction. Workers retry
+failures with exponential backoff and jitter, and write the outcome to
+``Payment.status``, ``Order.payment_status`` and ``Order.status``. When the
+last attempt fails, the held key goes back to stock.
+
+SettlementJob rows are the source of truth. Workers claim a job with a
+conditional UPDATE that also sets a lease (``next_attempt_at``). A job whose
+worker dies mid-settlement therefore becomes due again when the lease
+expires. The same reference (the payment's transaction id) is sent to the
+gateway on every attempt so that a real gateway can deduplicate.
+
+There are two queue backends:
+
+* ``database`` - workers poll the table for due jobs. Any number of
+  processes can share it, including settlement-worker.py.
+* ``memory`` - an in-process timer queue with no polling. Jobs are still
+  persisted, and pending ones are reloaded when the workers start.
+
+``MockGateway`` stands in for the real gateway, with configurable latency,
+jitter and failure rate, so that checkout throughput can be load-tested
+separately from gateway latency (see bench-settlement.py).
+"""
+
+import heapq
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.orm.exc import StaleDataError
+
+from src.models.user import db
+from src.models.order import Order
+from src.models.payment import Payment
+from src.models.product_key import ProductKey
+from src.models.settlement_job import SettlementJob
+from src.key_inventory import OutOfStock, assign_product_keys, reserve_product_key
+from src.order_states import TransitionConflict, transition_order, transition_payment
+
+FINISHED_STATUSES = ('succeeded', 'failed')
+
+logger = logging.getLogger(__name__)
+
+class GatewayError(Exception):
+    """Raised by a gateway when a charge fails and may be retried"""
+
+class MockGateway:
+    """Fake payment gateway with configurable latency and failure rate"""
+
+    def __init__(self, latency=0.2, jitter=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+
+    def charge(self, amount, currency, reference):
+        delay = max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+        time.sleep(delay)
+        if random.random() < self.failure_rate:
+            raise GatewayError('Gateway timeout')
+        return {
+            'id': f"ch_{uuid.uuid4().hex[:16]}",
+            'status': 'succeeded',
+            'amount': amount,
+            'currency': currency,
+            'reference': reference,
+            'latency_ms': round(delay * 1000, 1),
+        }
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Exponential backoff with jitter for the given (1-based) attempt"""
+    return min(cap, base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+def claim_job(job_id, lease):
+    """Mark a due job as processing; False if another worker got it first"""
+    now = datetime.utcnow()
+    result = db.session.execute(
+        update(SettlementJob)
+        .where(
+            SettlementJob.id == job_id,
+            SettlementJob.status.in_(('queued', 'processing')),
+            SettlementJob.next_attempt_at <= now,
+        )
+        .values(
+            status='processing',
+            attempts=SettlementJob.attempts + 1,
+            next_attempt_at=now + timedelta(seconds=lease),
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+class DatabaseQueue:
+    """Workers poll SettlementJob for due jobs; safe across processes"""
+
+    def __init__(self, poll_interval=0.5, batch_size=20, lease=300):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.lease = lease
+
+    def push(self, job_id, delay=0):
+        pass  # The row itself is the queue entry
+
+    def pop(self, timeout=None):
+        now = datetime.utcnow()
+        job_ids = db.session.execute(
+            select(SettlementJob.id)
+            .where(
+                SettlementJob.status.in_(('queued', 'processing')),
+                SettlementJob.next_attempt_at <= now,
+            )
+            .order_by(SettlementJob.next_attempt_at)
+            .limit(self.batch_size)
+        ).scalars().all()
+        db.session.commit()
+        # Start at a random offset so that polling workers rarely collide
+        if job_ids:
+            start = random.randrange(len(job_ids))
+            for job_id in job_ids[start:] + job_ids[:start]:
+                if claim_job(job_id, self.lease):
+                    return job_id
+        time.sleep(self.poll_interval if timeout is None else min(timeout, self.poll_interval))
+        return None
+
+class MemoryQueue:
+    """In-process timer queue; settlement workers must run in this process"""
+
+    def __init__(self, lease=300):
+        self.lease = lease
+        self._heap = []
+        self._condition = threading.Condition()
+
+    def push(self, job_id, delay=0):
+        with self._condition:
+            heapq.heappush(self._heap, (time.monotonic() + delay, job_id))
+            self._condition.notify()
+
+    def pop(self, timeout=None):
+        deadline = time.monotonic() + (timeout if timeout is not None else 1.0)
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                if self._heap and self._heap[0][0] <= now:
+                    job_id = heapq.heappop(self._heap)[1]
+                    break
+                if now >= deadline:
+                    return None
+                wait = deadline - now
+                if self._heap:
+                    wait = min(wait, self._heap[0][0] - now)
+                self._condition.wait(wait)
+        return job_id if claim_job(job_id, self.lease) else None
+
+    def recover(self):
+        """Queue every unfinished job found in the table"""
+        rows = db.session.execute(
+            select(SettlementJob.id, SettlementJob.next_attempt_at)
+            .where(SettlementJob.status.in_(('queued', 'processing')))
+        ).all()
+        db.session.commit()
+        now = datetime.utcnow()
+        for job_id, due in rows:
+            self.push(job_id, max(0.0, (due - now).total_seconds()))
+        return len(rows)
+
+def enqueue_settlement(order, payment_provider='stripe', max_attempts=5, fallback_key=None):
+    """Hold a key, create a pending Payment and a SettlementJob (not committed).
+
+    Raises OutOfStock like the synchronous path unless ``fallback_key`` is given.
+    """
+    try:
+        key_id, product_key = reserve_product_key(order.product_type, order.product_name)
+    except OutOfStock:
+        if fallback_key is None:
+            raise
+        key_id, product_key = None, fallback_key(order.product_type, order.product_name)
+
+    order_id = order.id
+    transition_order(order, payment_status='processing', updated_at=datetime.utcnow())
+
+    payment = Payment(
+        order_id=order_id,
+        user_id=order.user_id,
+        payment_method=order.payment_method,
+        payment_provider=payment_provider,
+        transaction_id=f"txn_{uuid.uuid4().hex[:16]}",
+        amount=order.product_price,
+        status='pending'
+    )
+    db.session.add(payment)
+    db.session.flush()
+
+    if key_id is not None:
+        assign_product_keys({key_id: order_id})
+
+    job = SettlementJob(
+        order_id=order_id,
+        payment_id=payment.id,
+        product_key_id=key_id,
+        product_key=product_key,
+        max_attempts=max_attempts
+    )
+    db.session.add(job)
+    db.session.flush()
+    return job
+
+def settle(job_id, gateway, base_backoff=1.0, max_backoff=60.0):
+    """Run one settlement attempt; returns the retry delay, or None when finished"""
+    job = db.session.get(SettlementJob, job_id)
+    claimed_attempt = job.attempts  # identifies this worker's lease
+    payment = db.session.get(Payment, job.payment_id)
+    amount, currency, reference = payment.amount, payment.currency, payment.transaction_id
+    db.session.commit()  # Never hold a transaction open across the gateway call
+
+    try:
+        response = gateway.charge(amount, currency, reference)
+    except Exception as e:
+        return _record_failure(job_id, claimed_attempt, str(e) or type(e).__name__, base_backoff, max_backoff)
+
+    now = datetime.utcnow()
+    job = db.session.get(SettlementJob, job_id)
+    if job.status in FINISHED_STATUSES:
+        # Another worker took over after our lease expired and already finished it
+        db.session.commit()
+        return None
+    payment = db.session.get(Payment, job.payment_id)
+    order = db.session.get(Order, job.order_id)
+    try:
+        transition_payment(
+            payment,
+            'completed',
+            gateway_response=json.dumps(response),
+            completed_at=now,
+            updated_at=now
+        )
+        transition_order(
+            order,
+            status='completed',
+            payment_status='completed',
+            transaction_id=payment.transaction_id,
+            product_key=job.product_key,
+            updated_at=now
+        )
+    except (TransitionConflict, StaleDataError, ValueError) as e:
+        # The order changed under us (e.g. settled twice after a lease expired)
+        db.session.rollback()
+        _finish_conflicted(job_id, e, now)
+        return None
+
+    job.status = 'succeeded'
+    job.last_error = None
+    job.completed_at = now
+    db.session.commit()
+    return None
+
+def _finish_conflicted(job_id, error, now):
+    """Mark a job failed after a conflict, unless another worker already finished it"""
+    job = db.session.get(SettlementJob, job_id)
+    if job.status in FINISHED_STATUSES:
+        db.session.commit()
+        logger.info("Settlement job %s was already %s by another worker", job_id, job.status)
+        return
+    job.status = 'failed'
+    job.last_error = str(error)[:500]
+    job.completed_at = now
+    db.session.commit()
+    logger.warning("Settlement job %s could not be applied: %s", job_id, error)
+
+def _release_lease(job_id, attempt, **values):
+    """Update the job only while this worker's lease holds; False if another worker claimed it"""
+    result = db.session.execute(
+        update(SettlementJob)
+        .where(
+            SettlementJob.id == job_id,
+            SettlementJob.status == 'processing',
+            SettlementJob.attempts == attempt,
+        )
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+def _record_failure(job_id, attempt, error, base_backoff, max_backoff):
+    now = datetime.utcnow()
+    job = db.session.get(SettlementJob, job_id)
+    if attempt < job.max_attempts:
+        delay = backoff_delay(attempt, base_backoff, max_backoff)
+        owned = _release_lease(
+            job_id, attempt, status='queued', last_error=error[:500],
+            next_attempt_at=now + timedelta(seconds=delay), updated_at=now
+        )
+        db.session.commit()
+        if not owned:
+            # The gateway call outlived the lease; the worker holding it now decides
+            logger.info("Settlement job %s attempt %d failed after losing its lease: %s", job_id, attempt, error)
+            return None
+        logger.info("Settlement job %s failed (attempt %d), retrying in %.1fs: %s", job_id, attempt, delay, error)
+        return delay
+
+    if not _release_lease(job_id, attempt, status='failed', last_error=error[:500], completed_at=now, updated_at=now):
+        db.session.commit()
+        logger.info("Settlement job %s attempt %d failed after losing its lease: %s", job_id, attempt, error)
+        return None
+
+    payment = db.session.get(Payment, job.payment_id)
+    order = db.session.get(Order, job.order_id)
+    order_id = order.id
+    try:
+        transition_payment(payment, 'failed', updated_at=now)
+        transition_order(order, status='failed', payment_status='failed', updated_at=now)
+    except (TransitionConflict, StaleDataError, ValueError) as e:
+        # Never leave the job in 'processing': nothing would pick it up again
+        db.session.rollback()
+        _finish_conflicted(job_id, e, now)
+        return None
+
+    # Give the held key back to stock
+    if job.product_key_id is not None:
+        db.session.execute(
+            update(ProductKey)
+            .where(ProductKey.id == job.product_key_id, ProductKey.order_id == order_id)
+            .values(status='available', order_id=None, sold_at=None)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    logger.warning("Settlement job %s failed permanently after %d attempts: %s", job_id, attempt, error)
+    return None
+
+class SettlementWorkerPool:
+    """Threads that take due jobs from the queue and settle them"""
+
+    def __init__(self, app, queue, gateway, workers=2, base_backoff=1.0, max_backoff=60.0):
+        self.app = app
+        self.queue = queue
+        self.gateway = gateway
+        self.workers = workers
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.settled = 0
+        self.retried = 0
+        self._stopped = threading.Event()
+        self._threads = []
+
+    def _run(self):
+        while not self._stopped.is_set():
+            with self.app.app_context():
+                try:
+                    job_id = self.queue.pop(timeout=1.0)
+                    if job_id is None:
+                        continue
+                    delay = settle(job_id, self.gateway, self.base_backoff, self.max_backoff)
+                    if delay is None:
+                        self.settled += 1
+                    else:
+                        self.retried += 1
+                        self.queue.push(job_id, delay)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Settlement worker error")
+                    time.sleep(1.0)
+                finally:
+                    db.session.remove()
+
+    def start(self):
+        if isinstance(self.queue, MemoryQueue):
+            with self.app.app_context():
+                try:
+                    self.queue.recover()
+                finally:
+                    db.session.remove()
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'settlement-worker-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=5):
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+def build_queue(config):
+    backend = config.get('SETTLEMENT_QUEUE', 'database')
+    lease = config.get('SETTLEMENT_LEASE_SECONDS', 300)
+    if backend == 'memory':
+        return MemoryQueue(lease=lease)
+    if backend == 'database':
+        return DatabaseQueue(poll_interval=config.get('SETTLEMENT_POLL_INTERVAL', 0.5), lease=lease)
+    raise ValueError(f"Unknown settlement queue backend: {backend}")
+
+def build_gateway(config):
+    return MockGateway(
+        latency=config.get('MOCK_GATEWAY_LATENCY', 0.2),
+        jitter=config.get('MOCK_GATEWAY_JITTER', 0.0),
+        failure_rate=config.get('MOCK_GATEWAY_FAILURE_RATE', 0.0),
+    )
+
+settlement_queue = DatabaseQueue()
+
+def configure_settlement(app):
+    """Pick the queue backend from SETTLEMENT_QUEUE"""
+    global settlement_queue
+    settlement_queue = build_queue(app.config)
+    return settlement_queue
+
+def notify_settlement(job_id):
+    """Hand a committed job to the queue (only the memory backend needs it)"""
+    settlement_queue.push(job_id)
+
+def start_settlement_workers(app, gateway=None):
+    pool = SettlementWorkerPool(
+        app,
+        settlement_queue,
+        gateway or build_gateway(app.config),
+        workers=app.config.get('SETTLEMENT_WORKERS', 2),
+        base_backoff=app.config.get('SETTLEMENT_BACKOFF', 1.0),
+        max_backoff=app.config.get('SETTLEMENT_MAX_BACKOFF', 60.0),
+    )
+    return pool.start()
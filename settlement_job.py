@@ -0,0 +1,45 @@
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+from src.models.user import db
+
+class SettlementJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
+    payment_id = db.Column(db.Integer, db.ForeignKey('payment.id'), nullable=False)
+    product_key_id = db.Column(db.Integer, db.ForeignKey('product_key.id'), nullable=True)  # Key held for the order
+    product_key = db.Column(db.String(500), nullable=True)  # Delivered to the order once settled
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, processing, succeeded, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_settlement_job_due', 'status', 'next_attempt_at'),
+        db.Index('ix_settlement_job_order', 'order_id'),
+    )
+
+    # Relationships
+    order = db.relationship('Order', backref=db.backref('settlement_jobs', lazy=True))
+    payment = db.relationship('Payment', backref=db.backref('settlement_jobs', lazy=True))
+
+    def __repr__(self):
+        return f'<SettlementJob {self.id} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'order_id': self.order_id,
+            'payment_id': self.payment_id,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
@@ -0,0 +1,164 @@
+"""
+Static asset manifest for the SPA and admin pages.
+
+The catch-all ``serve()`` route used to call ``os.path.exists`` twice per
+request, and it sent every file uncompressed: the SPA bundle, the admin page
+and the screenshots. The static folder is now scanned once at startup into a
+manifest, a dict from URL path to ``Asset``. A request is resolved with one
+dict lookup, and unknown paths fall back to ``index.html`` the same way.
+
+``build-assets.py`` prepares the folder at deploy time:
+
+* Fingerprinting: each asset other than an HTML entry point gets a copy named
+  after its content hash (``App.3f1c0a9d2b.css``). References in HTML and CSS
+  are rewritten to the copy, and ``asset-manifest.json`` records the mapping.
+  Fingerprinted files never change, so they are served with
+  ``Cache-Control: public, max-age=31536000, immutable``. Everything else,
+  including the HTML, is served with ``no-cache`` and an ETag, so browsers
+  revalidate and get 304s.
+* Precompression: text assets get ``.br`` (when the ``brotli`` package is
+  installed) and ``.gz`` siblings. They are served in place of the original
+  according to ``Accept-Encoding``, with ``Vary: Accept-Encoding``. Images
+  such as ``.webp`` are already compressed and are left alone.
+
+Files added after startup are not picked up until the next restart, except in
+debug mode, where a miss rescans the folder.
+"""
+
+import json
+import logging
+import mimetypes
+import os
+import threading
+
+from flask import current_app, request, send_file
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'asset-manifest.json'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))  # in order of preference
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+class Asset:
+    """One servable file, its precompressed variants and its validators"""
+
+    __slots__ = ('name', 'path', 'mimetype', 'size', 'mtime', 'etag', 'immutable', 'variants')
+
+    def __init__(self, name, path, stat, immutable=False):
+        self.name = name
+        self.path = path
+        self.mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        self.immutable = immutable
+        self.variants = {}  # encoding -> (path, size)
+
+    def variant(self, accepted):
+        """The best precompressed (encoding, path) the client accepts, or None"""
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and accepted[encoding]:
+                return encoding, self.variants[encoding][0]
+        return None
+
+class AssetManifest:
+    def __init__(self, folder=None, index='index.html'):
+        self.folder = folder
+        self.index_name = index
+        self.assets = {}
+        self.fingerprints = {}  # logical name -> fingerprinted name
+        self.index = None
+        self._lock = threading.Lock()
+        self.compressed_responses = 0
+
+    def scan(self):
+        """Walk the static folder once and rebuild the manifest"""
+        assets = {}
+        fingerprints = {}
+        if self.folder and os.path.isdir(self.folder):
+            try:
+                with open(os.path.join(self.folder, MANIFEST_NAME)) as manifest:
+                    fingerprints = json.load(manifest).get('assets', {})
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError):
+                logger.exception("Ignoring unreadable %s", MANIFEST_NAME)
+            immutable = set(fingerprints.values())
+
+            compressed = []
+            for directory, _, files in os.walk(self.folder):
+                for filename in files:
+                    path = os.path.join(directory, filename)
+                    name = os.path.relpath(path, self.folder).replace(os.sep, '/')
+                    if name == MANIFEST_NAME:
+                        continue
+                    if name.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                        compressed.append((name, path))
+                        continue
+                    assets[name] = Asset(name, path, os.stat(path), immutable=name in immutable)
+
+            for name, path in compressed:
+                for encoding, suffix in ENCODINGS:
+                    asset = assets.get(name[:-len(suffix)]) if name.endswith(suffix) else None
+                    if asset is not None:
+                        asset.variants[encoding] = (path, os.stat(path).st_size)
+                        break
+                else:
+                    # A .gz or .br someone put there on purpose
+                    assets[name] = Asset(name, path, os.stat(path))
+
+        with self._lock:
+            self.assets = assets
+            self.fingerprints = fingerprints
+            self.index = assets.get(self.index_name)
+        return self
+
+    def lookup(self, name):
+        asset = self.assets.get(name)
+        if asset is None and current_app.debug:
+            asset = self.scan().assets.get(name)
+        return asset
+
+    def resolve(self, path):
+        """The asset for ``path``, ``index.html`` for SPA routes, or None"""
+        return (self.lookup(path) if path else None) or self.index
+
+    def url(self, name):
+        """URL of the fingerprinted copy of ``name`` when there is one"""
+        return '/' + self.fingerprints.get(name, name)
+
+    def count_compressed(self):
+        with self._lock:
+            self.compressed_responses += 1
+
+    def stats(self):
+        return {
+            'assets': len(self.assets),
+            'fingerprinted': len(self.fingerprints),
+            'precompressed': sum(1 for asset in self.assets.values() if asset.variants),
+            'compressed_responses': self.compressed_responses,
+        }
+
+static_assets = AssetManifest()
+
+def configure_static_assets(app):
+    """Build the manifest for ``app.static_folder``"""
+    static_assets.folder = app.static_folder
+    static_assets.scan()
+
+def send_asset(asset):
+    """Send ``asset``, precompressed when the client accepts it, with its cache headers"""
+    variant = asset.variant(request.accept_encodings) if asset.variants else None
+    if variant is None:
+        response = send_file(asset.path, mimetype=asset.mimetype, etag=asset.etag, last_modified=asset.mtime)
+    else:
+        encoding, path = variant
+        response = send_file(path, mimetype=asset.mimetype, etag=f"{asset.etag}-{encoding}", last_modified=asset.mtime)
+        response.headers['Content-Encoding'] = encoding
+        static_assets.count_compressed()
+
+    response.headers['Cache-Control'] = IMMUTABLE if asset.immutable else REVALIDATE
+    if asset.variants:
+        response.vary.add('Accept-Encoding')
+    return response
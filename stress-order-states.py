@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Order State Stress Test Script
+This script fires concurrent process-payment and refund requests at the same
+orders of a scratch SQLite database and checks that every order was paid
+exactly once and refunded exactly once: one success per order, one Payment
+row per order and no refund applied twice. Losing requests must get 400/409.
+
+Usage:
+    python stress-order-states.py --orders 50 --clients 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from sqlalchemy import func, insert, select
+from src.models.user import User, db
+from src.models.order import Order
+from src.models.payment import Payment
+from src.models.product_key import ProductKey
+from src.routes.orders import orders_bp
+from src.database import init_database
+from src.key_inventory import key_pool
+
+def make_app(database_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{database_path}"
+    app.register_blueprint(orders_bp, url_prefix='/api')
+    init_database(app)
+    return app
+
+def seed(app, orders):
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='stress', email='stress@example.com', password_hash='x'))
+        db.session.execute(insert(ProductKey), [
+            {'product_type': 'steam_key', 'product_name': 'Stress Game', 'key_value': f"STRESS-{number:08d}"}
+            for number in range(orders * 2)
+        ])
+        db.session.execute(insert(Order), [
+            {
+                'user_id': 1,
+                'order_number': f"ST{number:010d}",
+                'product_type': 'steam_key',
+                'product_name': 'Stress Game',
+                'product_price': 9.99,
+                'original_price': 19.99,
+                'payment_method': 'stripe',
+            }
+            for number in range(orders)
+        ])
+        db.session.commit()
+        order_ids = db.session.execute(select(Order.id)).scalars().all()
+        db.engine.dispose()
+    key_pool.clear()
+    return order_ids
+
+def hammer(app, order_ids, clients, path):
+    """Send ``clients`` simultaneous POSTs to ``path`` for each order; returns {order_id: Counter}"""
+    results = {}
+
+    def post(order_id, barrier):
+        barrier.wait()
+        response = app.test_client().post(path.format(order_id=order_id), json={'reason': 'Stress test'})
+        return response.status_code
+
+    with ThreadPoolExecutor(clients) as pool:
+        for order_id in order_ids:
+            barrier = threading.Barrier(clients)
+            futures = [pool.submit(post, order_id, barrier) for _ in range(clients)]
+            results[order_id] = Counter(future.result() for future in futures)
+    return results
+
+def report(name, results):
+    """Print status totals and return the orders without exactly one success"""
+    totals = Counter()
+    for counter in results.values():
+        totals.update(counter)
+    broken = [order_id for order_id, counter in results.items() if counter[200] != 1]
+    print(f"{name:<16} responses {dict(sorted(totals.items()))}  orders without exactly one success: {len(broken)}")
+    return broken
+
+def main():
+    """Run the order state stress test"""
+    parser = argparse.ArgumentParser(description='Stress concurrent payments and refunds on the same orders')
+    parser.add_argument('--orders', type=int, default=50)
+    parser.add_argument('--clients', type=int, default=8, help='concurrent requests per order')
+    args = parser.parse_args()
+
+    print("🚀 Order state stress test")
+    print(f"{args.orders} orders x {args.clients} concurrent requests")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'stress.db'))
+        order_ids = seed(app, args.orders)
+
+        paid = hammer(app, order_ids, args.clients, '/api/orders/{order_id}/process-payment')
+        failures = report('process-payment', paid)
+        refunded = hammer(app, order_ids, args.clients, '/api/orders/{order_id}/refund')
+        failures += report('refund', refunded)
+
+        with app.app_context():
+            payments_per_order = Counter(db.session.execute(select(Payment.order_id)).scalars())
+            double_paid = [order_id for order_id in order_ids if payments_per_order[order_id] != 1]
+            not_refunded = db.session.execute(
+                select(func.count(Order.id)).where(Order.status != 'refunded')
+            ).scalar_one()
+            refunded_payments = db.session.execute(
+                select(func.count(Payment.id)).where(Payment.status == 'refunded')
+            ).scalar_one()
+            keys_sold = db.session.execute(
+                select(func.count(ProductKey.id)).where(ProductKey.status == 'sold')
+            ).scalar_one()
+            db.engine.dispose()
+
+    print("=" * 60)
+    print(f"Payments per order != 1: {len(double_paid)}")
+    print(f"Orders not refunded: {not_refunded}, refunded payments: {refunded_payments}, keys sold: {keys_sold}")
+    if failures or double_paid or not_refunded or refunded_payments != len(order_ids) or keys_sold != len(order_ids):
+        print("❌ Concurrency violation detected")
+        sys.exit(1)
+    print("✅ Every order was paid once and refunded once")
+
+if __name__ == "__main__":
+    main()
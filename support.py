@@ -7,16 +7,26 @@ class SupportTicket(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     ticket_number = db.Column(db.String(20), unique=True, nullable=False)
     subject = db.Column(db.String(200), nullable=False)
-    category = db.Column(db.String(50), nullable=False)  # 'payment', 'technical', 'account', 'refund', 'general'
-    priority = db.Column(db.String(20), nullable=False, default='medium')  # low, medium, high, urgent
-    status = db.Column(db.String(20), nullable=False, default='open')  # open, in_progress, resolved, closed
-    description = db.Column(db.Text, nullable=False)
+    # active_history: a change to an expired ticket still loads the old value,
+    # which support_stats needs to move the counters
+    category = db.column_property(db.Column(db.String(50), nullable=False), active_history=True)  # 'payment', 'technical', 'account', 'refund', 'general'
+    priority = db.column_property(db.Column(db.String(20), nullable=False, default='medium'), active_history=True)  # low, medium, high, urgent
+    status = db.column_property(db.Column(db.String(20), nullable=False, default='open'), active_history=True)  # open, in_progress, resolved, closed
+    description = db.deferred(db.Column(db.Text, nullable=False))  # Loaded on access
     order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=True)
     assigned_to = db.Column(db.String(100), nullable=True)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     resolved_at = db.Column(db.DateTime, nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_support_ticket_user_created', 'user_id', 'created_at'),
+        db.Index('ix_support_ticket_status_created', 'status', 'created_at'),
+        db.Index('ix_support_ticket_category_created', 'category', 'created_at'),
+        db.Index('ix_support_ticket_priority_created', 'priority', 'created_at'),
+        db.Index('ix_support_ticket_created_at', 'created_at'),
+    )
+
     # Relationships
     user = db.relationship('User', backref=db.backref('support_tickets', lazy=True))
     order = db.relationship('Order', backref=db.backref('support_tickets', lazy=True))
@@ -49,6 +59,11 @@ class SupportMessage(db.Model):
     message = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_support_message_ticket_created', 'ticket_id', 'created_at'),
+        db.Index('ix_support_message_ticket_id', 'ticket_id', 'id'),  # after_id reads
+    )
+
     # Relationship
     ticket = db.relationship('SupportTicket', backref=db.backref('messages', lazy=True, order_by='SupportMessage.created_at'))
 
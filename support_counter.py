@@ -0,0 +1,20 @@
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+from src.models.user import db
+
+class SupportStatCounter(db.Model):
+    dimension = db.Column(db.String(20), primary_key=True)  # 'total', 'status', 'category', 'priority'
+    value = db.Column(db.String(50), primary_key=True)  # e.g. 'open', 'payment', 'high' ('all' for total)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SupportStatCounter {self.dimension}:{self.value}={self.count}>'
+
+    def to_dict(self):
+        return {
+            'dimension': self.dimension,
+            'value': self.value,
+            'count': self.count,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
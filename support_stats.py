@@ -0,0 +1,142 @@
+"""
+Materialized support statistics.
+
+The /support/stats totals (by status, category and priority) are kept in the
+SupportStatCounter table instead of being recomputed from the ticket table on
+every dashboard refresh. A flush listener adjusts the counters on the same
+connection, and therefore in the same transaction, as every ticket insert,
+status/category/priority change and delete, so the counters commit or roll
+back with the ticket itself. ``get_support_stats`` then reads a handful of
+rows regardless of ticket volume, and ``rebuild_support_stats`` recomputes
+everything from the ticket table to repair drift (run it from
+rebuild-support-stats.py or a nightly job).
+"""
+
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import event, func, inspect, select
+
+from src.models.user import db
+from src.models.support import SupportTicket
+from src.models.support_counter import SupportStatCounter
+
+TRACKED_FIELDS = ('status', 'category', 'priority')
+STATUSES = ('open', 'in_progress', 'resolved', 'closed')
+CATEGORIES = ('payment', 'technical', 'account', 'refund', 'general')
+PRIORITIES = ('low', 'medium', 'high', 'urgent')
+TOTAL = ('total', 'all')
+
+def _column_default(field):
+    default = SupportTicket.__table__.c[field].default
+    return default.arg if default is not None else None
+
+def _ticket_keys(values):
+    keys = [TOTAL]
+    for field in TRACKED_FIELDS:
+        if values.get(field) is not None:
+            keys.append((field, values[field]))
+    return keys
+
+def _current_values(ticket):
+    return {field: getattr(ticket, field) or _column_default(field) for field in TRACKED_FIELDS}
+
+def _deltas_for_flush(session):
+    deltas = Counter()
+    for ticket in session.new:
+        if isinstance(ticket, SupportTicket):
+            for key in _ticket_keys(_current_values(ticket)):
+                deltas[key] += 1
+    for ticket in session.deleted:
+        if isinstance(ticket, SupportTicket):
+            state = inspect(ticket)
+            old = {field: (state.attrs[field].history.deleted or [getattr(ticket, field)])[0] for field in TRACKED_FIELDS}
+            for key in _ticket_keys(old):
+                deltas[key] -= 1
+    for ticket in session.dirty:
+        if isinstance(ticket, SupportTicket) and ticket not in session.deleted:
+            state = inspect(ticket)
+            for field in TRACKED_FIELDS:
+                history = state.attrs[field].history
+                if history.added and history.deleted and history.added[0] != history.deleted[0]:
+                    deltas[(field, history.deleted[0])] -= 1
+                    deltas[(field, history.added[0])] += 1
+    return {key: delta for key, delta in deltas.items() if delta}
+
+def apply_deltas(connection, deltas):
+    """Add ``deltas`` ({(dimension, value): delta}) to the counter rows"""
+    table = SupportStatCounter.__table__
+    now = datetime.utcnow()
+    for (dimension, value), delta in sorted(deltas.items()):
+        result = connection.execute(
+            table.update()
+            .where(table.c.dimension == dimension, table.c.value == value)
+            .values(count=table.c.count + delta, updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(
+                dimension=dimension, value=value, count=delta, updated_at=now
+            ))
+
+def _capture_deltas(session, flush_context, instances):
+    # History is only reliable before the flush runs; apply the deltas after it
+    deltas = _deltas_for_flush(session)
+    if deltas:
+        session.info.setdefault('support_stat_deltas', Counter()).update(deltas)
+
+def _apply_captured_deltas(session, flush_context):
+    deltas = session.info.pop('support_stat_deltas', None)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+def _discard_deltas(session, previous_transaction=None):
+    session.info.pop('support_stat_deltas', None)
+
+event.listen(db.session, 'before_flush', _capture_deltas)
+event.listen(db.session, 'after_flush', _apply_captured_deltas)
+event.listen(db.session, 'after_soft_rollback', _discard_deltas)
+
+def rebuild_counters(connection):
+    """Recompute every counter from the ticket table on ``connection``"""
+    counts = {TOTAL: connection.execute(select(func.count(SupportTicket.id))).scalar_one()}
+    for field in TRACKED_FIELDS:
+        column = getattr(SupportTicket, field)
+        for value, count in connection.execute(select(column, func.count(SupportTicket.id)).group_by(column)):
+            counts[(field, value)] = count
+
+    # Keep a row for every documented value so the dashboard always sees zeros
+    for dimension, values in (('status', STATUSES), ('category', CATEGORIES), ('priority', PRIORITIES)):
+        for value in values:
+            counts.setdefault((dimension, value), 0)
+
+    table = SupportStatCounter.__table__
+    now = datetime.utcnow()
+    connection.execute(table.delete())
+    connection.execute(table.insert(), [
+        {'dimension': dimension, 'value': value, 'count': count, 'updated_at': now}
+        for (dimension, value), count in counts.items()
+    ])
+
+def rebuild_support_stats():
+    """Reconcile the counters with the ticket table; returns the new stats"""
+    rebuild_counters(db.session.connection())
+    db.session.commit()
+    return get_support_stats()
+
+def get_support_stats():
+    """Return the /support/stats payload from the counter rows"""
+    rows = db.session.execute(select(SupportStatCounter.dimension, SupportStatCounter.value, SupportStatCounter.count)).all()
+    grouped = {'total': {}, 'status': {}, 'category': {}, 'priority': {}}
+    for dimension, value, count in rows:
+        grouped.setdefault(dimension, {})[value] = count
+
+    stats = {'total_tickets': grouped['total'].get('all', 0)}
+    for status in STATUSES:
+        stats[f'{status}_tickets'] = grouped['status'].get(status, 0)
+    stats['categories'] = {category: grouped['category'].get(category, 0) for category in CATEGORIES}
+    stats['priorities'] = {priority: grouped['priority'].get(priority, 0) for priority in PRIORITIES}
+    # Values outside the documented sets are still reported
+    for dimension, key in (('category', 'categories'), ('priority', 'priorities')):
+        for value, count in grouped[dimension].items():
+            stats[key].setdefault(value, count)
+    return stats
@@ -0,0 +1,204 @@
+"""
+Live ticket events.
+
+Agent dashboards and the customer ticket view used to re-fetch
+``/support/tickets/<id>`` every few seconds. Each fetch loaded the ticket and
+every message, even when nothing had changed. They can now hold one
+Server-Sent Events stream per ticket instead (``/support/tickets/<id>/events``
+in routes/tickets.py).
+
+* Publishing: mapper events collect new SupportMessages and ticket status
+  changes during a flush. They are published after the commit, so readers
+  never see a message that was rolled back.
+* Delivery: a broker fans each event out to the streams subscribed to that
+  ticket. ``LocalBroker`` works inside one process. ``RedisBroker``
+  (TICKET_EVENTS_REDIS_URL) relays events through Redis pub/sub, so a message
+  written by one worker reaches streams held by every worker.
+* Resuming: message events carry the message id as their SSE ``id``. A
+  reconnecting client sends ``Last-Event-ID`` and first receives only the
+  messages after it, read with one indexed query. An idle stream holds no
+  database connection and issues no queries.
+
+A subscriber that falls more than MAX_PENDING events behind is marked as
+overflowed. Its stream then ends, and the client resumes from its last id.
+"""
+
+import json
+import logging
+import threading
+from collections import deque
+
+from sqlalchemy import event, inspect
+
+from src.models.user import db
+from src.models.support import SupportTicket, SupportMessage
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+MAX_PENDING = 1000
+
+class Subscription:
+    """Events for one ticket, buffered for one stream"""
+
+    def __init__(self, broker, ticket_id, max_pending=MAX_PENDING):
+        self.broker = broker
+        self.ticket_id = ticket_id
+        self.max_pending = max_pending
+        self.overflowed = False
+        self._events = deque()
+        self._condition = threading.Condition()
+
+    def put(self, ticket_event):
+        with self._condition:
+            if len(self._events) >= self.max_pending:
+                self.overflowed = True
+            else:
+                self._events.append(ticket_event)
+            self._condition.notify()
+
+    def get(self, timeout):
+        """Next event, or None after ``timeout`` seconds without one"""
+        with self._condition:
+            if not self._events and not self.overflowed:
+                self._condition.wait(timeout)
+            return self._events.popleft() if self._events else None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class LocalBroker:
+    """In-process pub/sub: ticket id -> subscriptions"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+        self.published = 0
+
+    def subscribe(self, ticket_id):
+        subscription = Subscription(self, ticket_id)
+        with self._lock:
+            self._subscriptions.setdefault(ticket_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.ticket_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.ticket_id]
+
+    def dispatch(self, ticket_event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(ticket_event['ticket_id'], ()))
+        for subscription in subscriptions:
+            subscription.put(ticket_event)
+
+    def publish(self, ticket_event):
+        self.published += 1
+        self.dispatch(ticket_event)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': type(self).__name__,
+                'tickets_watched': len(self._subscriptions),
+                'subscribers': sum(len(subscriptions) for subscriptions in self._subscriptions.values()),
+                'published': self.published,
+            }
+
+class RedisBroker(LocalBroker):
+    """Cross-worker pub/sub: events go through one Redis channel and are dispatched locally"""
+
+    def __init__(self, url, channel='gamevault:ticket-events'):
+        if redis is None:
+            raise RuntimeError("TICKET_EVENTS_REDIS_URL is set but the redis package is not installed")
+        super().__init__()
+        self.client = redis.Redis.from_url(url)
+        self.channel = channel
+        self._listener = None
+
+    def _listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        for message in pubsub.listen():
+            try:
+                self.dispatch(json.loads(message['data']))
+            except Exception:
+                logger.exception("Dropping malformed ticket event")
+
+    def subscribe(self, ticket_id):
+        # The listener thread starts lazily, so workers without streams never connect
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='ticket-events', daemon=True)
+                self._listener.start()
+        return super().subscribe(ticket_id)
+
+    def publish(self, ticket_event):
+        self.published += 1
+        self.client.publish(self.channel, json.dumps(ticket_event))
+
+class TicketEvents:
+    """Holds the configured broker; ``ticket_events.broker`` may be swapped at startup"""
+
+    def __init__(self, broker=None):
+        self.broker = broker or LocalBroker()
+
+    def subscribe(self, ticket_id):
+        return self.broker.subscribe(ticket_id)
+
+    def publish(self, ticket_event):
+        try:
+            self.broker.publish(ticket_event)
+        except Exception:
+            logger.exception("Publishing ticket event failed; streams will catch up on reconnect")
+
+    def stats(self):
+        return self.broker.stats()
+
+ticket_events = TicketEvents()
+
+def configure_ticket_events(app):
+    """Pick the broker from TICKET_EVENTS_REDIS_URL"""
+    redis_url = app.config.get('TICKET_EVENTS_REDIS_URL')
+    ticket_events.broker = RedisBroker(redis_url) if redis_url else LocalBroker()
+
+def message_event(message_data):
+    return {'type': 'message', 'id': message_data['id'], 'ticket_id': message_data['ticket_id'], 'data': message_data}
+
+def status_event(ticket_id, status):
+    return {'type': 'status', 'id': None, 'ticket_id': ticket_id, 'data': {'ticket_id': ticket_id, 'status': status}}
+
+def _queue_event(ticket_event):
+    db.session.info.setdefault('ticket_events', []).append(ticket_event)
+
+def _message_added(mapper, connection, target):
+    _queue_event(message_event(target.to_dict()))
+
+def _ticket_updated(mapper, connection, target):
+    if inspect(target).attrs.status.history.has_changes():
+        _queue_event(status_event(target.id, target.status))
+
+def _publish_after_commit(session):
+    for ticket_event in session.info.pop('ticket_events', ()):
+        ticket_events.publish(ticket_event)
+
+def _discard_after_rollback(session, previous_transaction=None):
+    session.info.pop('ticket_events', None)
+
+event.listen(SupportMessage, 'after_insert', _message_added)
+event.listen(SupportTicket, 'after_update', _ticket_updated)
+event.listen(db.session, 'after_commit', _publish_after_commit)
+event.listen(db.session, 'after_soft_rollback', _discard_after_rollback)
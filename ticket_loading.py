@@ -0,0 +1,122 @@
+"""
+Loading strategies for ticket list, detail and message reads.
+
+``SupportTicket.user``, ``.order`` and ``.messages`` are lazy relationships.
+A ticket list that shows each ticket's user and order therefore ran
+1 + 2N queries, and the detail view serialized every message of a ticket on
+each view. The helpers here are what the support views call instead:
+
+* ``ticket_list_query`` and ``load_ticket`` batch-load user and order with
+  the strategy named by TICKET_LOADING_STRATEGY. ``selectin`` (the default)
+  uses one extra ``IN`` query per relationship, ``joined`` uses LEFT OUTER
+  JOINs, and ``lazy`` keeps the old per-row behaviour for comparison.
+* ``recent_messages`` returns the last page of a ticket's messages for the
+  detail view.
+* ``messages_after`` serves ``GET /support/tickets/<id>/messages?after_id=``,
+  so clients fetch only the messages they have not seen yet, with one range
+  read on the (ticket_id, id) index.
+
+The query counts are fixed by QUERY_BUDGETS and checked by
+check-query-counts.py. The number of statements must not grow with the
+number of tickets or messages.
+"""
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, lazyload, selectinload
+
+from src.models.user import db
+from src.models.support import SupportTicket, SupportMessage
+
+LOADING_STRATEGIES = {
+    'selectin': selectinload,
+    'joined': joinedload,
+    'lazy': lazyload,
+}
+DEFAULT_MESSAGE_LIMIT = 50
+MAX_MESSAGE_LIMIT = 200
+
+# Statements per request, whatever the number of rows
+QUERY_BUDGETS = {
+    'ticket list': 4,  # tickets, count, users, orders
+    'ticket detail': 4,  # ticket, user, order, latest messages
+    'messages after id': 2,  # ticket owner, messages
+}
+
+class UnknownLoadingStrategy(ValueError):
+    """Raised for a TICKET_LOADING_STRATEGY that is not in LOADING_STRATEGIES"""
+
+def loading_strategy(name=None):
+    name = name or current_app.config.get('TICKET_LOADING_STRATEGY', 'selectin')
+    if name not in LOADING_STRATEGIES:
+        raise UnknownLoadingStrategy(f"Unknown ticket loading strategy: {name}")
+    return LOADING_STRATEGIES[name]
+
+def related_options(strategy=None):
+    """Loader options for a ticket's user and order"""
+    loader = loading_strategy(strategy)
+    return (loader(SupportTicket.user), loader(SupportTicket.order))
+
+def ticket_list_query(status=None, category=None, priority=None, user_id=None, strategy=None):
+    """Tickets newest first, with user and order batch-loaded"""
+    query = SupportTicket.query.options(*related_options(strategy), db.undefer(SupportTicket.description))
+    for field, value in (('status', status), ('category', category), ('priority', priority)):
+        if value:
+            query = query.filter(getattr(SupportTicket, field) == value)
+    if user_id is not None:
+        query = query.filter(SupportTicket.user_id == user_id)
+    return query.order_by(SupportTicket.created_at.desc(), SupportTicket.id.desc())
+
+def ticket_owner(ticket_id):
+    """The ticket's user_id, or None when the ticket does not exist"""
+    return db.session.execute(
+        select(SupportTicket.user_id).where(SupportTicket.id == ticket_id)
+    ).scalar_one_or_none()
+
+def load_ticket(ticket_id, strategy=None):
+    """One ticket with user and order loaded, or None"""
+    return SupportTicket.query.options(*related_options(strategy), db.undefer(SupportTicket.description)).filter(
+        SupportTicket.id == ticket_id
+    ).first()
+
+def ticket_summary(ticket):
+    """``ticket.to_dict()`` plus the user and order shown next to it in lists"""
+    data = ticket.to_dict()
+    data['user'] = {'id': ticket.user.id, 'username': ticket.user.username} if ticket.user else None
+    data['order'] = {
+        'id': ticket.order.id,
+        'order_number': ticket.order.order_number,
+        'product_name': ticket.order.product_name,
+        'status': ticket.order.status,
+    } if ticket.order else None
+    return data
+
+def message_limit(limit, default=DEFAULT_MESSAGE_LIMIT):
+    return max(1, min(limit or default, MAX_MESSAGE_LIMIT))
+
+def recent_messages(ticket_id, limit=DEFAULT_MESSAGE_LIMIT):
+    """The newest ``limit`` messages in chronological order, and whether older ones exist"""
+    limit = message_limit(limit)
+    messages = SupportMessage.query.filter(SupportMessage.ticket_id == ticket_id).order_by(
+        SupportMessage.id.desc()
+    ).limit(limit + 1).all()
+    return list(reversed(messages[:limit])), len(messages) > limit
+
+def messages_after(ticket_id, after_id=0, limit=DEFAULT_MESSAGE_LIMIT):
+    """Messages with an id above ``after_id`` in order, and whether more follow"""
+    limit = message_limit(limit)
+    messages = SupportMessage.query.filter(
+        SupportMessage.ticket_id == ticket_id, SupportMessage.id > (after_id or 0)
+    ).order_by(SupportMessage.id).limit(limit + 1).all()
+    return messages[:limit], len(messages) > limit
+
+def ticket_detail(ticket_id, limit=DEFAULT_MESSAGE_LIMIT, strategy=None):
+    """Detail payload: the ticket summary with its latest messages, or None"""
+    ticket = load_ticket(ticket_id, strategy)
+    if ticket is None:
+        return None
+    messages, has_older = recent_messages(ticket_id, limit)
+    data = ticket_summary(ticket)
+    data['messages'] = [message.to_dict() for message in messages]
+    data['has_older_messages'] = has_older
+    return data
@@ -0,0 +1,249 @@
+"""
+Full-text search over support tickets and messages.
+
+Agents used to find tickets with LIKE '%word%' over subjects, descriptions
+and messages. That scans every row and gets linearly slower as history grows.
+On SQLite, search now uses an FTS5 index, ``support_search``, with one row
+per ticket (subject and description, rowid = -ticket id) and one row per
+message (rowid = message id). Both carry the ticket id, so a search is a
+MATCH on the index grouped by ticket. Every word has to appear somewhere in
+the ticket, but not necessarily in the same row: a word from the subject and
+one from a reply still find the ticket, as with LIKE matching. Tickets are
+ranked by their best bm25 score, with subject hits weighted above body hits,
+and come with a snippet of the best-matching text.
+
+The index is kept in sync by mapper events that write to it on the flush
+connection, so an index row commits or rolls back together with its ticket
+or message. Bulk INSERT statements bypass the ORM. After one, call
+``rebuild_search_index``. Migration 5 creates and fills the index for
+existing databases. Where FTS5 is unavailable (other databases, or an SQLite
+built without it), ``search_tickets`` falls back to LIKE matching.
+"""
+
+import logging
+import re
+import time
+
+from sqlalchemy import and_, column, event, exists, func, inspect, literal, literal_column, or_, select, table, text, union_all
+
+from src.models.user import db
+from src.models.support import SupportTicket, SupportMessage
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'support_search'
+SUBJECT_WEIGHT = 5.0
+BODY_WEIGHT = 1.0
+MAX_TERMS = 16
+INDEX_RECHECK_INTERVAL = 30.0  # seconds before a missing index is looked for again
+
+search_index = table(SEARCH_TABLE, column('rowid'), column('ticket_id'))
+_fts = literal_column(SEARCH_TABLE)
+_index_available = {}  # url -> True, or the monotonic time the index was found missing
+
+class InvalidSearch(ValueError):
+    """Raised for a search string without any searchable words"""
+
+def index_available(connection, recheck=False):
+    """Whether ``connection``'s database has the FTS index.
+
+    A found index is remembered for good. For searches a missing one is
+    looked for again after INDEX_RECHECK_INTERVAL, so workers started before
+    migrate-db.py created it pick it up without a restart. The write
+    listeners pass ``recheck=True`` and look every time: a row written while
+    a stale "missing" answer is cached would stay out of the index for good.
+    """
+    if connection.dialect.name != 'sqlite':
+        return False
+    key = str(connection.engine.url)
+    cached = _index_available.get(key)
+    if cached is True:
+        return True
+    now = time.monotonic()
+    if cached is not None and not recheck and now - cached < INDEX_RECHECK_INTERVAL:
+        return False
+    found = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': SEARCH_TABLE}
+    ).first() is not None
+    _index_available[key] = True if found else now
+    return found
+
+def create_search_index(connection):
+    """Create the FTS5 table; returns False where FTS5 is unavailable"""
+    if connection.dialect.name != 'sqlite':
+        logger.info("Full-text search index skipped: %s uses LIKE search", connection.dialect.name)
+        return False
+    try:
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+            "USING fts5(subject, body, ticket_id UNINDEXED, tokenize = 'porter unicode61')"
+        ))
+    except Exception:
+        logger.warning("SQLite was built without FTS5; ticket search uses LIKE", exc_info=True)
+        return False
+    _index_available[str(connection.engine.url)] = True
+    return True
+
+def rebuild_search_index(connection):
+    """Refill the index from the ticket and message tables"""
+    if not index_available(connection):
+        return
+    connection.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    connection.execute(text(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, subject, body, ticket_id) "
+        "SELECT -id, subject, description, id FROM support_ticket"
+    ))
+    connection.execute(text(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, subject, body, ticket_id) "
+        "SELECT id, '', message, ticket_id FROM support_message"
+    ))
+
+def search_terms(query_text):
+    """The distinct words of ``query_text`` (at most MAX_TERMS)"""
+    terms = list(dict.fromkeys(term.lower() for term in re.findall(r'\w+', query_text or '', re.UNICODE)))[:MAX_TERMS]
+    if not terms:
+        raise InvalidSearch('Search query must contain at least one word')
+    return terms
+
+def match_expression(terms):
+    """Turn words into an FTS5 query for rows that contain any of them.
+
+    Words are quoted so FTS5 operators in the input are searched as plain
+    text. The porter tokenizer stems them like the index, so "refunded"
+    finds "refund".
+    """
+    return ' OR '.join(f'"{term}"' for term in terms)
+
+def _tickets_with_every_term(terms):
+    """Ticket ids whose index rows, taken together, contain every one of ``terms``"""
+    per_term = union_all(*(
+        select(search_index.c.ticket_id.label('ticket_id'), literal(position).label('term'))
+        .where(_fts.op('MATCH')(match_expression([term])))
+        for position, term in enumerate(terms)
+    )).subquery()
+    return (
+        select(per_term.c.ticket_id)
+        .group_by(per_term.c.ticket_id)
+        .having(func.count(per_term.c.term.distinct()) == len(terms))
+    )
+
+def _filters(status=None, category=None, priority=None, user_id=None):
+    criteria = []
+    for field, value in (('status', status), ('category', category), ('priority', priority)):
+        if value:
+            criteria.append(getattr(SupportTicket, field).in_(value.split(',')))
+    if user_id is not None:
+        criteria.append(SupportTicket.user_id == user_id)
+    return criteria
+
+def search_tickets(query_text, status=None, category=None, priority=None, user_id=None, page=1, per_page=20):
+    """Return ``(results, total)`` for one page of tickets matching ``query_text``.
+
+    Each result is ``(ticket, score, hits, snippet)``. Score and snippet are
+    None when the LIKE fallback is in use. Lower scores rank higher.
+    """
+    terms = search_terms(query_text)
+    criteria = _filters(status, category, priority, user_id)
+    if not index_available(db.session.connection()):
+        return _like_search(query_text, criteria, page, per_page)
+
+    # Rows with any of the words are scored; the AND applies per ticket
+    matching = _fts.op('MATCH')(match_expression(terms))
+    if len(terms) > 1:
+        criteria.append(SupportTicket.id.in_(_tickets_with_every_term(terms)))
+
+    # Per-row scores first: FTS5 functions cannot run inside an aggregate, and
+    # LIMIT -1 keeps SQLite from flattening the subquery into one
+    hits = (
+        select(
+            search_index.c.ticket_id.label('ticket_id'),
+            search_index.c.rowid.label('rowid'),
+            func.bm25(_fts, SUBJECT_WEIGHT, BODY_WEIGHT).label('score'),
+        )
+        .where(matching)
+        .limit(-1)
+        .subquery()
+    )
+    # SQLite takes the bare rowid from the row holding min(score)
+    matches = (
+        select(hits.c.ticket_id, func.min(hits.c.score).label('score'), func.count().label('hits'), hits.c.rowid)
+        .group_by(hits.c.ticket_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(SupportTicket, matches.c.score, matches.c.hits, matches.c.rowid, func.count().over().label('total'))
+        .join(matches, matches.c.ticket_id == SupportTicket.id)
+        .where(*criteria)
+        .options(db.undefer(SupportTicket.description))
+        .order_by(matches.c.score, SupportTicket.id.desc())
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+    ).all()
+
+    if rows:
+        total = rows[0].total
+    else:
+        total = db.session.execute(
+            select(func.count()).select_from(matches).join(SupportTicket, matches.c.ticket_id == SupportTicket.id).where(*criteria)
+        ).scalar_one() if page > 1 else 0
+
+    # Snippets only for the page, from each ticket's best-matching row
+    snippets = dict(db.session.execute(
+        select(search_index.c.rowid, func.snippet(_fts, -1, '[', ']', '…', 12))
+        .where(matching, search_index.c.rowid.in_([row.rowid for row in rows]))
+    ).all()) if rows else {}
+    return [(row[0], row.score, row.hits, snippets.get(row.rowid)) for row in rows], total
+
+def _like_search(query_text, criteria, page, per_page):
+    for term in search_terms(query_text):
+        pattern = f'%{term}%'
+        criteria.append(or_(
+            SupportTicket.subject.ilike(pattern),
+            SupportTicket.description.ilike(pattern),
+            exists().where(and_(SupportMessage.ticket_id == SupportTicket.id, SupportMessage.message.ilike(pattern))),
+        ))
+    query = SupportTicket.query.options(db.undefer(SupportTicket.description)).filter(*criteria)
+    total = query.order_by(None).count()
+    tickets = query.order_by(SupportTicket.created_at.desc(), SupportTicket.id.desc()).limit(per_page).offset((page - 1) * per_page).all()
+    return [(ticket, None, None, None) for ticket in tickets], total
+
+def _index_ticket(mapper, connection, target):
+    if not index_available(connection, recheck=True):
+        return
+    # The description is deferred, so the row is copied from the table itself
+    connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"), {'rowid': -target.id})
+    connection.execute(text(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, subject, body, ticket_id) "
+        "SELECT -id, subject, description, id FROM support_ticket WHERE id = :id"
+    ), {'id': target.id})
+
+def _index_message(mapper, connection, target):
+    if not index_available(connection, recheck=True):
+        return
+    connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"), {'rowid': target.id})
+    connection.execute(text(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, subject, body, ticket_id) VALUES (:id, '', :message, :ticket_id)"
+    ), {'id': target.id, 'message': target.message, 'ticket_id': target.ticket_id})
+
+def _reindex_if_changed(index, fields):
+    def listener(mapper, connection, target):
+        if _text_changed(target, fields):
+            index(mapper, connection, target)
+    return listener
+
+def _text_changed(target, fields):
+    state = inspect(target)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+def _unindex(rowid):
+    def listener(mapper, connection, target):
+        if index_available(connection, recheck=True):
+            connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"), {'rowid': rowid(target)})
+    return listener
+
+event.listen(SupportTicket, 'after_insert', _index_ticket)
+event.listen(SupportTicket, 'after_update', _reindex_if_changed(_index_ticket, ('subject', 'description')))
+event.listen(SupportTicket, 'after_delete', _unindex(lambda ticket: -ticket.id))
+event.listen(SupportMessage, 'after_insert', _index_message)
+event.listen(SupportMessage, 'after_update', _reindex_if_changed(_index_message, ('message', 'ticket_id')))
+event.listen(SupportMessage, 'after_delete', _unindex(lambda message: message.id))
@@ -0,0 +1,164 @@
+from flask import Blueprint, Response, current_app, jsonify, request, session
+from src.models.user import db
+from src.models.support import SupportTicket, SupportMessage
+from src.read_replica import read_only
+from src.serializers import dumps, json_response
+from src.ticket_events import message_event, ticket_events
+from src.ticket_search import InvalidSearch, search_tickets
+from src.ticket_loading import messages_after, ticket_owner
+import time
+
+tickets_bp = Blueprint('tickets', __name__)
+
+MAX_PER_PAGE = 100
+RESUME_LIMIT = 500
+
+@tickets_bp.route('/support/search', methods=['GET'])
+@read_only
+def search():
+    """Full-text search over tickets and their messages"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    try:
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), MAX_PER_PAGE)
+
+        # Customers only ever search their own tickets
+        results, total = search_tickets(
+            request.args.get('q', ''),
+            status=request.args.get('status'),
+            category=request.args.get('category'),
+            priority=request.args.get('priority'),
+            user_id=None if session.get('is_admin') else session['user_id'],
+            page=page,
+            per_page=per_page
+        )
+
+        tickets = []
+        for ticket, score, hits, snippet in results:
+            data = ticket.to_dict()
+            data.update({'score': score, 'matches': hits, 'snippet': snippet})
+            tickets.append(data)
+
+        return json_response({
+            'tickets': tickets,
+            'total': total,
+            'pages': -(-total // per_page),
+            'current_page': page
+        })
+    except InvalidSearch as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@tickets_bp.route('/support/tickets/<int:ticket_id>/messages', methods=['GET'])
+@read_only
+def get_ticket_messages(ticket_id):
+    """Messages of a ticket after ?after_id=, oldest first (at most ?limit=)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    try:
+        owner_id = ticket_owner(ticket_id)
+        if owner_id is None:
+            return jsonify({'error': 'Ticket not found'}), 404
+        if owner_id != session['user_id'] and not session.get('is_admin'):
+            return jsonify({'error': 'Access denied'}), 403
+
+        after_id = request.args.get('after_id', 0, type=int)
+        messages, has_more = messages_after(ticket_id, after_id, request.args.get('limit', type=int))
+
+        return json_response({
+            'messages': [message.to_dict() for message in messages],
+            'last_id': messages[-1].id if messages else after_id,
+            'has_more': has_more
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def sse(ticket_event):
+    """Encode one ticket event in the text/event-stream format"""
+    lines = []
+    if ticket_event['id'] is not None:
+        lines.append(f"id: {ticket_event['id']}")
+    lines.append(f"event: {ticket_event['type']}")
+    lines.append(f"data: {dumps(ticket_event['data']).decode()}")
+    return ('\n'.join(lines) + '\n\n').encode()
+
+def event_stream(subscription, backlog, last_id, resume_complete, heartbeat, max_duration):
+    """Yield the backlog, then live events until ``max_duration`` runs out"""
+    try:
+        yield b"retry: 3000\n\n"
+        for ticket_event in backlog:
+            yield sse(ticket_event)
+        if not resume_complete:
+            # More history than one resume page: the client reconnects for the rest
+            return
+
+        deadline = time.monotonic() + max_duration
+        while time.monotonic() < deadline and not subscription.overflowed:
+            ticket_event = subscription.get(timeout=min(heartbeat, max(deadline - time.monotonic(), 0)))
+            if ticket_event is None:
+                yield b": keep-alive\n\n"
+            elif ticket_event['id'] is None or ticket_event['id'] > last_id:
+                # Messages already sent as backlog may also arrive live
+                if ticket_event['id'] is not None:
+                    last_id = ticket_event['id']
+                yield sse(ticket_event)
+    finally:
+        subscription.close()
+
+@tickets_bp.route('/support/tickets/<int:ticket_id>/events', methods=['GET'])
+def ticket_event_stream(ticket_id):
+    """Stream new messages and status changes of a ticket as Server-Sent Events"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    try:
+        last_id = request.headers.get('Last-Event-ID', type=int) or request.args.get('after_id', 0, type=int)
+
+        # Subscribe before reading the backlog so nothing committed in between is lost
+        subscription = ticket_events.subscribe(ticket_id)
+        try:
+            ticket = db.session.get(SupportTicket, ticket_id)
+            if ticket is None:
+                subscription.close()
+                return jsonify({'error': 'Ticket not found'}), 404
+            if ticket.user_id != session['user_id'] and not session.get('is_admin'):
+                subscription.close()
+                return jsonify({'error': 'Access denied'}), 403
+
+            backlog = []
+            if last_id:
+                messages = SupportMessage.query.filter(
+                    SupportMessage.ticket_id == ticket_id, SupportMessage.id > last_id
+                ).order_by(SupportMessage.id).limit(RESUME_LIMIT + 1).all()
+                backlog = [message_event(message.to_dict()) for message in messages[:RESUME_LIMIT]]
+                if backlog:
+                    last_id = backlog[-1]['id']
+                resume_complete = len(messages) <= RESUME_LIMIT
+            else:
+                resume_complete = True
+        except Exception:
+            subscription.close()
+            raise
+        finally:
+            # The stream itself never touches the database
+            db.session.remove()
+
+        response = Response(
+            event_stream(
+                subscription,
+                backlog,
+                last_id,
+                resume_complete,
+                heartbeat=current_app.config.get('SSE_HEARTBEAT_INTERVAL', 15),
+                max_duration=current_app.config.get('SSE_MAX_DURATION', 300)
+            ),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+        response.call_on_close(subscription.close)
+        return response
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
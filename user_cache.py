@@ -0,0 +1,187 @@
+"""
+Session user cache.
+
+``/auth/me`` runs on every page load, and each call used to fetch the User
+row again. The cache keeps a JSON-ready snapshot (``User.to_dict()``) per
+user id in a per-process LRU with a TTL, or in Redis when USER_CACHE_REDIS_URL
+is set so that every worker sees the same entries.
+
+Entries are invalidated after commit whenever the ORM updates or deletes a
+User row: profile and password changes, subscriptions and deactivation, from
+auth.py or any other module. Bulk UPDATE statements bypass the ORM and must
+call ``user_cache.invalidate`` themselves. With the per-process backend, other
+workers may serve a stale snapshot for at most USER_CACHE_TTL seconds.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+from src.models.user import User, db
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+class LocalBackend:
+    """Thread-safe LRU with per-entry expiry"""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class RedisBackend:
+    """Shared backend; snapshots are stored as JSON with a Redis TTL"""
+
+    def __init__(self, url, prefix='gamevault:user:'):
+        if redis is None:
+            raise RuntimeError("USER_CACHE_REDIS_URL is set but the redis package is not installed")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.evictions = 0
+
+    def get(self, key):
+        raw = self.client.get(f"{self.prefix}{key}")
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(f"{self.prefix}{key}", json.dumps(value), ex=max(1, int(ttl)))
+
+    def delete(self, key):
+        self.client.delete(f"{self.prefix}{key}")
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(key)
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(f"{self.prefix}*"))
+
+class UserCache:
+    def __init__(self, backend=None, ttl=60):
+        self.backend = backend or LocalBackend()
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id):
+        """Return the cached snapshot for ``user_id``, loading it on a miss"""
+        try:
+            snapshot = self.backend.get(user_id)
+        except Exception:
+            logger.exception("User cache read failed; falling back to the database")
+            snapshot = None
+        if snapshot is not None:
+            with self._lock:
+                self.hits += 1
+            return snapshot
+
+        with self._lock:
+            self.misses += 1
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        snapshot = user.to_dict()
+        try:
+            self.backend.set(user_id, snapshot, self.ttl)
+        except Exception:
+            logger.exception("User cache write failed")
+        return snapshot
+
+    def prime(self, user):
+        """Store a fresh snapshot for a User the caller has already loaded"""
+        try:
+            self.backend.set(user.id, user.to_dict(), self.ttl)
+        except Exception:
+            logger.exception("User cache write failed")
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self.invalidations += 1
+        try:
+            self.backend.delete(user_id)
+        except Exception:
+            logger.exception("User cache invalidation failed for user %s", user_id)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'evictions': self.backend.evictions,
+                'backend': type(self.backend).__name__,
+            }
+
+user_cache = UserCache()
+
+def configure_user_cache(app):
+    """Set up the cache from USER_CACHE_TTL, USER_CACHE_SIZE and USER_CACHE_REDIS_URL"""
+    redis_url = app.config.get('USER_CACHE_REDIS_URL')
+    if redis_url:
+        user_cache.backend = RedisBackend(redis_url)
+    else:
+        user_cache.backend = LocalBackend(app.config.get('USER_CACHE_SIZE', 10000))
+    user_cache.ttl = app.config.get('USER_CACHE_TTL', 60)
+
+def _remember_changed_user(mapper, connection, target):
+    db.session.info.setdefault('changed_user_ids', set()).add(target.id)
+
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        user_cache.invalidate(user_id)
+
+def _forget_changed_users(session, previous_transaction=None):
+    session.info.pop('changed_user_ids', None)
+
+event.listen(User, 'after_update', _remember_changed_user)
+event.listen(User, 'after_delete', _remember_changed_user)
+event.listen(db.session, 'after_commit', _invalidate_changed_users)
+event.listen(db.session, 'after_soft_rollback', _forget_changed_users)